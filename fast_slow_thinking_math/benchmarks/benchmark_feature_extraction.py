@@ -0,0 +1,183 @@
+"""
+Benchmark of the single-pass FeatureExtractor against the per-pattern extractor.
+
+Usage:
+    python -m benchmarks.benchmark_feature_extraction [--repeat N]
+
+The legacy extractor below is the previous implementation, which rescans the
+text once per operation pattern, domain keyword and clause marker. It is kept
+here as the reference: the benchmark fails if the two extractors disagree on
+any problem.
+"""
+
+import argparse
+import json
+import os
+import re
+import timeit
+
+import config
+from src.complexity_analyzer.features import FeatureExtractor
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'math_problems.json')
+
+
+class LegacyFeatureExtractor:
+    """
+    The per-pattern feature extractor, kept as a reference implementation.
+    """
+
+    def __init__(self):
+        """Initialize the legacy extractor with configuration settings."""
+        self.domain_complexity = config.COMPLEXITY_ANALYZER['DOMAIN_COMPLEXITY']
+        self.operation_complexity = config.COMPLEXITY_ANALYZER['OPERATION_COMPLEXITY']
+
+        self.variable_pattern = re.compile(r'[a-zA-Z](?!\w)')
+        self.operation_patterns = {
+            'addition': re.compile(r'[+]|\bplus\b|\badd\b|\bsum\b|\btotal\b'),
+            'subtraction': re.compile(r'[-]|\bminus\b|\bsubtract\b|\bdifference\b'),
+            'multiplication': re.compile(r'[*×]|\btimes\b|\bmultiply\b|\bproduct\b'),
+            'division': re.compile(r'[/÷]|\bdivide\b|\bquotient\b|\bratio\b'),
+            'exponentiation': re.compile(r'[\^]|\bpower\b|\bsquared\b|\bcubed\b|\bexponent\b'),
+            'root': re.compile(r'\broot\b|\bsquare root\b|\bcube root\b|\b\sqrt\b'),
+            'logarithm': re.compile(r'\blog\b|\bln\b|\blogarithm\b'),
+            'trigonometric': re.compile(r'\bsin\b|\bcos\b|\btan\b|\bsine\b|\bcosine\b|\btangent\b'),
+            'derivative': re.compile(r'\bderivative\b|\bdifferentiate\b|\bd/dx\b'),
+            'integral': re.compile(r'\bintegral\b|\bintegrate\b|\b∫\b'),
+            'limit': re.compile(r'\blimit\b|\blim\b'),
+            'summation': re.compile(r'\bsummation\b|\bsum of\b|\b∑\b'),
+            'product': re.compile(r'\bproduct of\b|\b∏\b'),
+        }
+
+        self.domain_keywords = {
+            'arithmetic': ['add', 'subtract', 'multiply', 'divide', 'plus', 'minus', 'times'],
+            'algebra': ['equation', 'solve', 'variable', 'expression', 'polynomial', 'factor', 'simplify'],
+            'geometry': ['angle', 'triangle', 'circle', 'square', 'rectangle', 'polygon', 'area', 'volume', 'perimeter'],
+            'calculus': ['derivative', 'integral', 'limit', 'differentiate', 'integrate', 'rate of change'],
+            'statistics': ['probability', 'mean', 'median', 'mode', 'standard deviation', 'variance', 'distribution'],
+            'number_theory': ['prime', 'divisor', 'factor', 'remainder', 'modulo', 'congruence'],
+            'combinatorics': ['combination', 'permutation', 'factorial', 'choose', 'arrangement'],
+        }
+
+    def extract_features(self, problem_text):
+        """Extract features by scanning the text once per pattern."""
+        normalized_text = problem_text.lower()
+        tokens = normalized_text.split()
+
+        return {
+            'length': min(1.0, len(normalized_text) / 200.0),
+            'sentence_structure': self._extract_sentence_structure_feature(normalized_text),
+            'variables': self._extract_variables_feature(normalized_text),
+            'keywords': self._extract_keywords_feature(tokens),
+            'domain': self._extract_domain_feature(normalized_text),
+            'operations': self._extract_operations_feature(normalized_text),
+        }
+
+    def _extract_sentence_structure_feature(self, text):
+        clause_markers = [',', ' and ', ' or ', ' but ', ' because ', ' if ', ' then ', ' when ', ' while ']
+        clause_count = sum(text.count(marker) for marker in clause_markers) + 1
+        return min(1.0, clause_count / 5.0)
+
+    def _extract_variables_feature(self, text):
+        variables = set(re.findall(self.variable_pattern, text))
+        return min(1.0, len(variables) / 4.0)
+
+    def _extract_keywords_feature(self, tokens):
+        math_keywords = ['solve', 'find', 'calculate', 'determine', 'evaluate', 'simplify', 'factor', 'expand']
+        keyword_count = sum(token in math_keywords for token in tokens)
+        return min(1.0, keyword_count / 3.0)
+
+    def _extract_domain_feature(self, text):
+        domain_scores = {}
+        for domain, keywords in self.domain_keywords.items():
+            score = sum(keyword in text for keyword in keywords)
+            if score > 0:
+                domain_scores[domain] = score
+
+        if not domain_scores:
+            return self.domain_complexity['arithmetic']
+
+        primary_domain = max(domain_scores, key=domain_scores.get)
+        return self.domain_complexity[primary_domain]
+
+    def _extract_operations_feature(self, text):
+        operation_scores = {}
+        for operation, pattern in self.operation_patterns.items():
+            matches = pattern.findall(text)
+            if matches:
+                operation_scores[operation] = len(matches) * self.operation_complexity[operation]
+
+        if not operation_scores:
+            return self.operation_complexity['addition']
+
+        total_complexity = sum(operation_scores.values())
+        total_operations = sum(len(pattern.findall(text)) for pattern in self.operation_patterns.values())
+
+        if total_operations == 0:
+            return 0.1
+
+        return min(1.0, total_complexity / total_operations)
+
+
+def load_problems():
+    """
+    Build the benchmark corpus: the sample problems and long word problems.
+
+    Returns:
+        dict: Corpus name -> list of problem texts.
+    """
+    with open(DATA_PATH, 'r') as f:
+        problems = [item['problem'] for item in json.load(f)]
+
+    # Long word problems made of several sample problems joined together
+    long_problems = [
+        ' '.join(problems[start:] + problems[:start]) for start in range(len(problems))
+    ]
+    return {'sample problems': problems, 'long word problems': long_problems}
+
+
+def time_extractor(extractor, problems, repeat):
+    """
+    Time feature extraction over a corpus.
+
+    Args:
+        extractor: An object with an extract_features method.
+        problems (list): Problem texts.
+        repeat (int): Number of timed passes over the corpus.
+
+    Returns:
+        float: Best time per problem in microseconds.
+    """
+    timer = timeit.Timer(lambda: [extractor.extract_features(problem) for problem in problems])
+    best = min(timer.repeat(repeat=repeat, number=1))
+    return best / len(problems) * 1e6
+
+
+def main(argv=None):
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description="Benchmark feature extraction.")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed passes per corpus")
+    args = parser.parse_args(argv)
+
+    legacy = LegacyFeatureExtractor()
+    single_pass = FeatureExtractor()
+
+    print(f"{'corpus':<20} {'chars':>7} {'legacy µs':>10} {'single-pass µs':>15} {'speedup':>8}")
+    for name, problems in load_problems().items():
+        for problem in problems:
+            expected = legacy.extract_features(problem)
+            actual = single_pass.extract_features(problem)
+            if actual != expected:
+                raise AssertionError(f"Feature mismatch for {problem!r}: {actual} != {expected}")
+
+        average_length = sum(len(problem) for problem in problems) / len(problems)
+        legacy_time = time_extractor(legacy, problems, args.repeat)
+        single_pass_time = time_extractor(single_pass, problems, args.repeat)
+        print(
+            f"{name:<20} {average_length:>7.0f} {legacy_time:>10.1f} "
+            f"{single_pass_time:>15.1f} {legacy_time / single_pass_time:>7.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Import-time report for the application entry point.
+
+Usage:
+    python -m benchmarks.import_time [--module main] [--top 15] [--budget-ms 300]
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, prints
+the slowest modules and the time per top-level package, and lists any heavy
+dependency that was imported eagerly. With --budget-ms it exits non-zero when
+the total exceeds the budget or a heavy dependency is imported, so startup
+regressions fail CI.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that must only be imported on first use
+HEAVY_MODULES = ('sympy', 'openai', 'nltk', 'numpy', 'aiohttp', 'dotenv')
+
+
+def measure_imports(module='main'):
+    """
+    Import a module in a fresh interpreter and collect -X importtime data.
+
+    The interpreter runs in a temporary directory so import-time side effects
+    (such as log files) do not touch the working tree.
+
+    Args:
+        module (str): Module to import.
+
+    Returns:
+        list: (name, self_us, cumulative_us) tuples in import order.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+    with tempfile.TemporaryDirectory() as working_dir:
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=working_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def build_report(imports, module='main', top=15):
+    """
+    Summarize import timings.
+
+    Args:
+        imports (list): (name, self_us, cumulative_us) tuples.
+        module (str): The module that was imported.
+        top (int): Number of slowest modules to list.
+
+    Returns:
+        dict: Total time, slowest modules, time per package and heavy modules imported.
+    """
+    cumulative = {name: cumulative_us for name, _, cumulative_us in imports}
+    per_package = defaultdict(int)
+    for name, self_us, _ in imports:
+        per_package[name.split('.')[0]] += self_us
+
+    return {
+        'total_ms': cumulative.get(module, 0) / 1000.0,
+        'slowest': sorted(imports, key=lambda item: item[1], reverse=True)[:top],
+        'packages': sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:top],
+        'heavy_imported': [name for name in HEAVY_MODULES if name in cumulative],
+    }
+
+
+def main(argv=None):
+    """Print the import-time report and enforce the optional budget."""
+    parser = argparse.ArgumentParser(description="Report the import time of the application.")
+    parser.add_argument('--module', default='main', help="Module to import (default: main)")
+    parser.add_argument('--top', type=int, default=15, help="Number of modules to list")
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="Fail if the import takes longer or loads a heavy dependency")
+    args = parser.parse_args(argv)
+
+    report = build_report(measure_imports(args.module), args.module, args.top)
+
+    print(f"import {args.module}: {report['total_ms']:.1f} ms")
+    print(f"\n{'self ms':>9}  slowest modules")
+    for name, self_us, _ in report['slowest']:
+        print(f"{self_us / 1000.0:>9.1f}  {name}")
+    print(f"\n{'self ms':>9}  per top-level package")
+    for package, self_us in report['packages']:
+        print(f"{self_us / 1000.0:>9.1f}  {package}")
+
+    if report['heavy_imported']:
+        print(f"\nHeavy dependencies imported eagerly: {', '.join(report['heavy_imported'])}")
+    else:
+        print(f"\nNo heavy dependencies imported ({', '.join(HEAVY_MODULES)})")
+
+    if args.budget_ms is not None:
+        if report['heavy_imported'] or report['total_ms'] > args.budget_ms:
+            print(f"FAILED: import budget is {args.budget_ms:.0f} ms with no heavy dependencies")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -19,6 +19,13 @@ COMPLEXITY_ANALYZER = {
         'operations': 0.25,        # Weight for mathematical operations
     },
     
+    # Learned complexity model (fitted with python -m src.complexity_analyzer.learned_model);
+    # its score is the probability that Fast Thinking fails on the problem
+    'MODEL_PATH': None,           # Model file (.npz); None scores with FEATURE_WEIGHTS
+    'MODEL_L2': 0.01,             # L2 penalty on the model's weights when fitting
+    'MODEL_ITERATIONS': 2000,     # Gradient descent iterations when fitting
+    'MODEL_LEARNING_RATE': 0.5,   # Gradient descent step size when fitting
+    
     # Mathematical domains and their complexity scores
     'DOMAIN_COMPLEXITY': {
         'arithmetic': 0.2,
@@ -68,6 +75,7 @@ THINKING_STRATEGIES = {
     'FAST_THEN_SLOW': {
         'confidence_threshold': 0.7, # Threshold for switching from Fast to Slow
         'max_fast_steps': 2,      # Maximum steps in Fast mode before considering switch
+        'speculative': False,     # Start Slow Thinking in parallel and cancel it if not needed
     },
 }
 
@@ -85,11 +93,135 @@ SWITCHING_MECHANISM = {
     'ERROR_DETECTION_THRESHOLD': 0.3, # Threshold for error detection
 }
 
+# Adaptive routing settings (per-domain thresholds learned from monitoring feedback)
+ADAPTIVE_ROUTING = {
+    'ENABLED': False,             # Route with learned per-domain SIMPLE/MEDIUM thresholds
+    'STATE_FILE': 'cache/routing_thresholds.json', # Learned thresholds, kept across restarts (relative to this directory)
+    'LEARNING_RATE': 0.1,         # Share of the distance to a problem's score a threshold moves per update
+    'MARGIN': 0.02,               # How far past a problem's score a threshold is moved
+    'SAVE_INTERVAL': 20,          # Threshold updates between saves of the state file
+}
+
+# Expected-cost strategy selection (replaces STRATEGY_MAPPING when enabled)
+STRATEGY_SELECTOR = {
+    'ENABLED': False,             # Select strategies by expected cost under a deadline or accuracy target
+    'WINDOW': 200,                # Recent solves kept per complexity level and strategy
+    'PRIOR_WEIGHT': 5,            # Number of solves the priors below count as
+    'ACCURACY_TARGET': 0.8,       # Success probability required when the caller sets none (None: no target)
+    'LATENCY_TOKEN_COST': 100,    # Tokens one second of latency is worth
+    'EXPLORATION_RATE': 0.05,     # Share of problems given the least observed strategy instead
+    # Priors (escalations included); with no history they select as STRATEGY_MAPPING does
+    'PRIOR_LATENCY': {'FAST': 1.0, 'FAST_THEN_SLOW': 2.5, 'SLOW': 4.0}, # Seconds per solve
+    'PRIOR_TOKENS': {'FAST': 100, 'FAST_THEN_SLOW': 300, 'SLOW': 500},  # Tokens per solve
+    'PRIOR_SUCCESS': {            # Success probability per complexity level
+        'Simple': {'FAST': 0.9, 'FAST_THEN_SLOW': 0.95, 'SLOW': 0.95},
+        'Medium': {'FAST': 0.6, 'FAST_THEN_SLOW': 0.85, 'SLOW': 0.9},
+        'Complex': {'FAST': 0.3, 'FAST_THEN_SLOW': 0.7, 'SLOW': 0.85},
+    },
+}
+
+# Deadline propagation: stages a solve skips when its deadline is near
+DEADLINES = {
+    'MIN_LLM_SECONDS': 0.5,       # Time left required to start an LLM call
+    'MIN_VERIFICATION_SECONDS': 1.0, # Time left required to verify or refine a solution
+    'MIN_SLOW_SECONDS': 3.0,      # Time left required to escalate to Slow Thinking
+}
+
+# Arithmetic evaluator settings
+ARITHMETIC = {
+    'CACHE_SIZE': 4096,           # Number of compiled expressions kept
+    'MAX_RESULT_BITS': 100000,    # Largest exact power computed (guards against huge results)
+}
+
+# Sympy settings
+SYMPY = {
+    'PARSE_CACHE_SIZE': 2048,     # Number of parsed expressions shared by all strategies
+    'WORKER_POOL_ENABLED': True,  # Run solve/integrate/simplify in worker processes
+    'WORKER_POOL_SIZE': 2,        # Number of sympy worker processes
+    'WORKER_TIMEOUT': 10.0,       # Seconds a single sympy call may run
+    'WORKER_MEMORY_LIMIT_MB': 1024,  # Extra memory a worker may allocate (0 = no limit)
+    'WORKER_START_METHOD': 'forkserver',  # multiprocessing start method for workers
+}
+
+# Answer checker settings
+ANSWER_CHECKER = {
+    'CACHE_SIZE': 4096,           # Canonical forms (and comparison results) kept in the LRU caches
+    'SPOT_CHECKS': 5,             # Random points at which two expressions are compared numerically
+    'TOLERANCE': 1e-9,            # Absolute tolerance of numeric comparisons near 0 (exact numbers compare exactly)
+    'RELATIVE_TOLERANCE': 1e-12,  # Relative tolerance of numeric comparisons away from 0
+    'SIMPLIFY_TIMEOUT': 5.0,      # Seconds allowed for the symbolic fallback when spot-checks are inconclusive
+}
+
+# Solution verification settings
+VERIFICATION = {
+    'RTOL': 1e-9,                 # Relative tolerance of numeric root checks (absolute for values below 1)
+    'COMPILE_CACHE_SIZE': 256,    # Equations kept compiled (lambdify) for numeric verification
+    'IDENTITY_POINTS': 16,        # Random points of derivative/integral identity tests
+    'IDENTITY_MIN_POINTS': 4,     # Fewer evaluable points than this make the test borderline
+    'IDENTITY_RTOL': 1e-6,        # Largest relative error of a passing identity test
+    'IDENTITY_FAIL_RTOL': 1e-3,   # Smallest relative error of a failing test; in between, simplify decides
+    'FD_STEP': 1e-5,              # Relative step of central finite differences
+    'IDENTITY_SEED': None,        # Seed of the random points (None: fresh points on every test)
+}
+
 # Resource Allocator settings
 RESOURCE_ALLOCATOR = {
     'BASE_TOKEN_BUDGET': 100,     # Base token budget
     'STEP_TOKEN_COST': 10,        # Token cost per reasoning step
     'VERIFICATION_TOKEN_COST': 20, # Token cost for verification
+    'REFINEMENT_EFFORT': 0.5,     # Verification effort needed to refine a solution that failed verification
+    'FAST_TOKEN_SHARE': 0.3,      # Share of a Fast-then-Slow token budget given to the Fast phase
+}
+
+# Shared token budget settings (one budget for all in-flight problems)
+BUDGET_POOL = {
+    'ENABLED': False,             # Reserve each problem's token budget from a shared per-window budget
+    'TOKENS_PER_WINDOW': 1000000, # Provider tokens (prompt plus completion) that may be spent per window
+    'WINDOW': 3600.0,             # Window length in seconds
+    'PRESSURE_THRESHOLD': 0.8,    # Utilization from which problems are forced to FAST with smaller budgets
+    'DEGRADED_TOKEN_SHARE': 0.5,  # Share of the requested tokens granted under pressure
+}
+
+# LLM client settings
+LLM_CLIENT = {
+    'MAX_IN_FLIGHT': 8,           # Maximum concurrent async requests (also the connection pool size)
+    'REQUESTS_PER_SECOND': 5.0,   # Sustained request rate of the token-bucket rate limiter
+    'BURST': 10,                  # Maximum burst of requests above the sustained rate
+    'BACKEND': 'openai',          # 'openai' or 'local' (offline stand-in that defers to the local solvers)
+    'LOCAL_LATENCY': 0.0,         # Simulated response time of the local backend in seconds
+    # Token budgets count words of solution steps, max_tokens counts provider tokens
+    'TOKENS_PER_BUDGET_UNIT': 2.0, # Provider tokens per budget unit (JSON and math notation take ~2 per word)
+    'MIN_MAX_TOKENS': 256,        # Lowest response limit a token budget can set (room for the JSON answer)
+}
+
+# LLM request hedging settings
+LLM_HEDGING = {
+    'ENABLED': False,             # Send a duplicate request when the first one is slow
+    'PERCENTILE': 95,             # Hedge once a request is slower than this latency percentile
+    'WINDOW': 200,                # Number of recent latencies used for the percentile
+    'MIN_SAMPLES': 20,            # Latencies needed before hedging starts
+    'BUDGET_RATIO': 0.05,         # Hedges earned per request (0.05 = at most ~5% extra requests)
+    'MAX_BURST': 5,               # Maximum number of unspent hedges
+    'MAX_WORKERS': 32,            # Threads running hedged synchronous requests
+}
+
+# LLM response cache settings
+LLM_CACHE = {
+    'ENABLED': True,              # Serve repeated LLM requests from the cache
+    'PATH': 'cache/llm_responses.sqlite3', # On-disk cache file (relative to this directory)
+    'MAX_SIZE_BYTES': 50 * 1024 * 1024, # Size cap of the on-disk tier (LRU eviction)
+    'TTL_SECONDS': 7 * 24 * 3600, # Cached responses expire after this many seconds
+    'MEMORY_ENTRIES': 1024,       # Number of responses kept in the in-process tier
+    'TOUCH_INTERVAL': 60.0,       # Seconds between writes of in-process hits to the on-disk access times
+}
+
+# Problem cache settings (answers near-duplicate problems without solving them again)
+PROBLEM_CACHE = {
+    'ENABLED': True,              # Look problems up by their structure before solving them
+    'MAX_ENTRIES': 10000,         # Number of solved problems kept (LRU eviction)
+    'MAX_TEMPLATES': 1000,        # Number of solution plans kept for problems of the same form
+    'MIN_CONFIDENCE': 0.8,        # Confidence a solution needs to be cached
+    'KEY_CACHE_SIZE': 4096,       # Number of problem texts whose structural keys are memoized
 }
 
 # Data settings
@@ -97,6 +229,29 @@ DATA = {
     'MATH_PROBLEMS_FILE': 'data/math_problems.json',
 }
 
+# Evaluation settings
+EVALUATION = {
+    'MAX_CONCURRENCY': 1,         # Number of problems solved in parallel by evaluate_problems
+    'RESULTS_FILE': 'evaluation_results.json', # Results of a JSON input file
+    'STREAM_RESULTS_FILE': 'evaluation_results.jsonl', # Results of a JSONL input file, one line per problem
+    'PROGRESS_INTERVAL': 100,     # Log running accuracy every this many streamed problems
+    'CHECKPOINT_FILE': 'evaluation_checkpoint.jsonl', # Completed results of a JSON input run, for --resume
+    'CHECKPOINT_INTERVAL': 10,    # Results between fsyncs of the checkpoint
+    'TIME_LIMIT': None,           # Seconds each problem may take (None: no deadline)
+}
+
+# HTTP server settings
+SERVER = {
+    'HOST': '127.0.0.1',          # Address the server listens on
+    'PORT': 8000,                 # Port the server listens on
+    'WORKERS': 2,                 # Pre-forked worker processes
+    'WORKER_THREADS': 4,          # Requests solved concurrently by each worker
+    'QUEUE_SIZE': 16,             # Requests waiting per worker before new ones get a 503
+    'RETRY_AFTER': 1,             # Retry-After seconds sent with a 503
+    'MAX_BATCH_SIZE': 100,        # Maximum number of problems per /solve_batch request
+    'MAX_BODY_BYTES': 1024 * 1024, # Maximum request body size
+}
+
 # Logging settings
 LOGGING = {
     'LEVEL': 'INFO',              # Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
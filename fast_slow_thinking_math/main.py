@@ -2,17 +2,31 @@
 Main application file for the Fast-Slow Thinking Math system.
 """
 
+import argparse
+import functools
 import json
 import time
 import logging
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from src.complexity_analyzer.analyzer import ComplexityAnalyzer
 from src.thinking_strategies.fast_thinking import FastThinking
 from src.thinking_strategies.slow_thinking import SlowThinking
 from src.thinking_strategies.combined import FastThenSlow
 from src.switching_mechanism.switcher import ThinkingSwitcher
 from src.switching_mechanism.monitor import ReasoningMonitor
+from src.switching_mechanism.routing_policy import AdaptiveThresholds
+from src.switching_mechanism.strategy_selector import ExpectedCostSelector
 from src.resource_allocator.allocator import ResourceAllocator
+from src.math_engine.parsing import parse_expression
+from src.math_engine.answers import AnswerChecker
+from src.problem_cache import ProblemCache
+from src.deadlines import deadline_scope
+from src.server import serve
+from src.checkpoint import EvaluationCheckpoint
+from src import llm_integration
+from src.lazy_imports import load_now
 import config
 
 # Configure logging
@@ -27,6 +41,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Problem id of results whose problem has none (batch runs cannot resume them)
+UNKNOWN_PROBLEM_ID = 'unknown'
+
 class FastSlowThinkingMath:
     """
     Main application class for the Fast-Slow Thinking Math system.
@@ -42,17 +59,40 @@ class FastSlowThinkingMath:
         self.slow_strategy = SlowThinking()
         self.combined_strategy = FastThenSlow(self.fast_strategy, self.slow_strategy)
         self.resource_allocator = ResourceAllocator()
+        self.routing_policy = AdaptiveThresholds() if config.ADAPTIVE_ROUTING['ENABLED'] else None
+        self.strategy_selector = ExpectedCostSelector() if config.STRATEGY_SELECTOR['ENABLED'] else None
         self.switcher = ThinkingSwitcher(
             analyzer=self.analyzer,
             fast_strategy=self.fast_strategy,
             slow_strategy=self.slow_strategy,
             combined_strategy=self.combined_strategy,
-            resource_allocator=self.resource_allocator
+            resource_allocator=self.resource_allocator,
+            routing_policy=self.routing_policy,
+            strategy_selector=self.strategy_selector
         )
         self.monitor = ReasoningMonitor()
+        self.answer_checker = AnswerChecker()
+        self.problem_cache = (
+            ProblemCache(self.slow_strategy, self.answer_checker)
+            if config.PROBLEM_CACHE['ENABLED'] else None
+        )
         
         logger.info("System initialization complete")
     
+    def warm_up(self):
+        """
+        Load the lazily imported dependencies and fill caches ahead of the first problem.
+        
+        The server calls this once before forking its workers, so they share
+        the loaded modules instead of each importing them on its first request.
+        """
+        logger.info("Warming up")
+        self.analyzer.analyze_batch(["Solve for x: 2x + 3 = 7"])
+        parse_expression("x**2 + 2*x + 1")
+        if config.LLM_CLIENT['BACKEND'] == 'openai':
+            load_now(llm_integration.openai)
+            load_now(llm_integration.aiohttp)
+    
     def load_problems(self, file_path):
         """
         Load mathematical problems from a JSON file.
@@ -73,12 +113,44 @@ class FastSlowThinkingMath:
             logger.error(f"Error loading problems: {str(e)}")
             return []
     
-    def solve_problem(self, problem_text):
+    def stream_problems(self, file_path):
+        """
+        Read mathematical problems one at a time from a JSONL file.
+        
+        Lines that are blank or not valid JSON are logged and skipped.
+        
+        Args:
+            file_path (str): Path to the JSONL file (one problem dictionary per line).
+            
+        Yields:
+            dict: Problem dictionaries.
+        """
+        logger.info(f"Streaming problems from {file_path}")
+        try:
+            with open(file_path, 'r') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        logger.error(f"Skipping line {line_number} of {file_path}: {str(e)}")
+        except OSError as e:
+            logger.error(f"Error loading problems: {str(e)}")
+    
+    def solve_problem(self, problem_text, deadline=None, accuracy_target=None, expected_answer=None):
         """
         Solve a mathematical problem using the Fast-Slow Thinking system.
         
         Args:
             problem_text (str): The text of the mathematical problem.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+                Every stage of the solve skips or shortens itself when it is near.
+            accuracy_target (float, optional): Required probability that the solve succeeds.
+                With the expected-cost strategy selector, a tight deadline or a low
+                target selects cheaper strategies.
+            expected_answer (str, optional): Known correct answer; the strategy selector
+                then learns whether the answer was correct rather than confident.
             
         Returns:
             dict: Solution results.
@@ -88,8 +160,20 @@ class FastSlowThinkingMath:
         # Measure solution time
         start_time = time.time()
         
-        # Solve the problem using the switching mechanism
-        solution = self.switcher.solve(problem_text)
+        # Answer near-duplicates of solved problems from the cache, otherwise
+        # solve the problem using the switching mechanism (sympy work in both
+        # is cut short at the deadline)
+        with deadline_scope(deadline):
+            solution = self.problem_cache.lookup(problem_text) if self.problem_cache else None
+            if solution is None:
+                check_answer = None
+                if expected_answer:
+                    check_answer = functools.partial(self._check_answer, expected_answer=expected_answer)
+                solution = self.switcher.solve(
+                    problem_text, deadline=deadline, accuracy_target=accuracy_target, check_answer=check_answer
+                )
+                if self.problem_cache:
+                    self.problem_cache.store(problem_text, solution)
         
         # Calculate solution time
         solution_time = time.time() - start_time
@@ -99,94 +183,319 @@ class FastSlowThinkingMath:
         monitoring_feedback = self.monitor.monitor_solution(solution)
         solution['monitoring_feedback'] = monitoring_feedback
         
+        # Adapt the routing of similar problems to the feedback
+        self.switcher.record_feedback(solution, monitoring_feedback)
+        
         logger.info(f"Problem solved in {solution_time:.2f} seconds with strategy {solution['strategy']}")
         logger.info(f"Solution confidence: {solution['confidence']:.2f}")
         
         return solution
     
-    def evaluate_problems(self, problems):
+    def evaluate_problems(self, problems, max_concurrency=None, checkpoint=None, resume=False):
         """
         Evaluate a list of mathematical problems.
         
         Args:
             problems (list): List of problem dictionaries.
+            max_concurrency (int, optional): Number of problems solved in parallel
+                (default: config.EVALUATION['MAX_CONCURRENCY']).
+            checkpoint (EvaluationCheckpoint, optional): Checkpoint each result is saved to.
+            resume (bool): Reuse the results in the checkpoint and only solve the
+                problems (identified by 'id') that it does not contain; problems
+                without an id are always solved again.
             
         Returns:
             dict: Evaluation results.
         """
-        logger.info(f"Evaluating {len(problems)} problems")
+        if max_concurrency is None:
+            max_concurrency = config.EVALUATION['MAX_CONCURRENCY']
         
-        results = []
-        metrics = {
-            'total_problems': len(problems),
-            'total_time': 0,
-            'avg_time': 0,
-            'strategy_counts': {'FAST': 0, 'SLOW': 0, 'FAST_THEN_SLOW': 0},
-            'complexity_counts': {'Simple': 0, 'Medium': 0, 'Complex': 0},
-            'avg_confidence': 0,
-            'correct_answers': 0
+        completed = {}
+        if checkpoint is not None:
+            if resume:
+                completed = {
+                    result['problem_id']: result for result in checkpoint.load()
+                    if result['problem_id'] != UNKNOWN_PROBLEM_ID
+                }
+            else:
+                checkpoint.reset()
+        pending = [problem for problem in problems if problem.get('id', UNKNOWN_PROBLEM_ID) not in completed]
+        
+        logger.info(
+            f"Evaluating {len(problems)} problems with {max_concurrency} worker(s)"
+            f" ({len(problems) - len(pending)} already completed)"
+        )
+        
+        solved = []
+        metrics = self._new_metrics()
+        
+        start_time = time.time()
+        
+        for result in self._solve_in_order(pending, max_concurrency):
+            if checkpoint is not None:
+                checkpoint.append(result)
+            solved.append(result)
+        
+        if checkpoint is not None:
+            checkpoint.sync()
+        
+        # Restore the input order and count every result once
+        solved = iter(solved)
+        results = [
+            completed[problem['id']] if problem.get('id') in completed else next(solved)
+            for problem in problems
+        ]
+        for result in results:
+            self._update_metrics(metrics, result)
+        
+        self._finalize_metrics(metrics, time.time() - start_time)
+        
+        return {
+            'results': results,
+            'metrics': metrics
         }
+    
+    def evaluate_stream(self, problems, output_file, max_concurrency=None, completed=()):
+        """
+        Evaluate problems from an iterable, writing each result as soon as it is ready.
         
-        for problem in problems:
-            problem_id = problem.get('id', 'unknown')
-            problem_text = problem.get('problem', '')
-            expected_answer = problem.get('answer', '')
-            complexity_level = problem.get('complexity_level', 'unknown')
-            
-            logger.info(f"Evaluating problem {problem_id}: {problem_text}")
-            
-            # Solve the problem
-            solution = self.solve_problem(problem_text)
-            
-            # Update metrics
-            metrics['total_time'] += solution['solution_time']
-            metrics['strategy_counts'][solution['strategy']] += 1
+        Problems are read lazily and results are not kept, so memory use does
+        not grow with the number of problems. Results are written to
+        output_file as JSON lines in input order and flushed one by one, so
+        a crash only loses the problems still being solved.
+        
+        Args:
+            problems (iterable): Problem dictionaries, e.g. from stream_problems().
+            output_file (file): Text file the results are written to.
+            max_concurrency (int, optional): Number of problems solved in parallel
+                (default: config.EVALUATION['MAX_CONCURRENCY']).
+            completed (iterable, optional): Results of an earlier, interrupted run
+                (e.g. the lines already in output_file); they count towards the
+                metrics and their problems are skipped. Results are written in
+                input order, so they are matched to the first problems by
+                position, which also covers problems without an id.
             
-            if complexity_level in metrics['complexity_counts']:
-                metrics['complexity_counts'][complexity_level] += 1
+        Returns:
+            dict: Evaluation metrics.
             
-            metrics['avg_confidence'] += solution['confidence']
+        Raises:
+            ValueError: If a completed result's problem id does not match the
+                problem at its position (the results belong to another input).
+        """
+        if max_concurrency is None:
+            max_concurrency = config.EVALUATION['MAX_CONCURRENCY']
+        progress_interval = config.EVALUATION['PROGRESS_INTERVAL']
+        
+        metrics = self._new_metrics()
+        
+        # Only the ids of completed problems are kept
+        completed_ids = []
+        for result in completed:
+            self._update_metrics(metrics, result)
+            completed_ids.append(result['problem_id'])
+        
+        # Skip the completed problems, checking that they are the ones in the results
+        pending = iter(problems)
+        for position, (problem_id, problem) in enumerate(zip(completed_ids, pending), 1):
+            if problem.get('id', UNKNOWN_PROBLEM_ID) != problem_id:
+                raise ValueError(
+                    f"Completed result {position} is for problem {problem_id}, not "
+                    f"{problem.get('id', UNKNOWN_PROBLEM_ID)}: the results belong to another input"
+                )
+        
+        logger.info(
+            f"Evaluating problem stream with {max_concurrency} worker(s)"
+            f" ({len(completed_ids)} already completed)"
+        )
+        
+        start_time = time.time()
+        
+        for result in self._solve_in_order(pending, max_concurrency):
+            self._update_metrics(metrics, result)
+            output_file.write(json.dumps(result, default=str) + '\n')
+            output_file.flush()
             
-            # Check if answer is correct (simplified check)
-            is_correct = self._check_answer(solution['answer'], expected_answer)
-            if is_correct:
-                metrics['correct_answers'] += 1
+            if metrics['total_problems'] % progress_interval == 0:
+                logger.info(
+                    f"Evaluated {metrics['total_problems']} problems. "
+                    f"Accuracy so far: {metrics['correct_answers'] / metrics['total_problems']:.2f}"
+                )
+        
+        self._finalize_metrics(metrics, time.time() - start_time)
+        
+        return metrics
+    
+    def _solve_in_order(self, problems, max_concurrency):
+        """
+        Evaluate problems, yielding results in input order.
+        
+        With max_concurrency > 1, problems are solved in a worker pool, and
+        only a bounded window of them is read ahead of the result being
+        waited for, so problems can come from an unbounded iterator.
+        
+        Args:
+            problems (iterable): Problem dictionaries.
+            max_concurrency (int): Number of problems solved in parallel.
             
-            # Store result
-            result = {
-                'problem_id': problem_id,
-                'problem_text': problem_text,
-                'complexity_level': complexity_level,
-                'expected_answer': expected_answer,
-                'actual_answer': solution['answer'],
-                'is_correct': is_correct,
-                'strategy_used': solution['strategy'],
-                'confidence': solution['confidence'],
-                'solution_time': solution['solution_time']
-            }
-            results.append(result)
+        Yields:
+            dict: Evaluation result for each problem.
+        """
+        if max_concurrency <= 1:
+            for problem in problems:
+                yield self._evaluate_problem(problem)
+            return
+        
+        # Metrics are only updated by the caller, from a single thread
+        window = 2 * max_concurrency
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = deque()
+            for problem in problems:
+                pending.append(executor.submit(self._evaluate_problem, problem))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def _evaluate_problem(self, problem):
+        """
+        Solve a single problem and check its answer.
+        
+        Args:
+            problem (dict): Problem dictionary.
             
-            logger.info(f"Problem {problem_id} evaluation complete. Correct: {is_correct}")
+        Returns:
+            dict: Evaluation result for the problem.
+        """
+        problem_id = problem.get('id', UNKNOWN_PROBLEM_ID)
+        problem_text = problem.get('problem', '')
+        expected_answer = problem.get('answer', '')
+        complexity_level = problem.get('complexity_level', 'unknown')
+        
+        logger.info(f"Evaluating problem {problem_id}: {problem_text}")
+        
+        # Solve the problem, within the time limit if there is one
+        time_limit = config.EVALUATION['TIME_LIMIT']
+        deadline = time.monotonic() + time_limit if time_limit else None
+        solution = self.solve_problem(problem_text, deadline=deadline, expected_answer=expected_answer)
+        
+        # Check if answer is correct (simplified check)
+        is_correct = self._check_answer(solution['answer'], expected_answer)
+        
+        # Record whether Fast Thinking alone would have sufficed (training data
+        # for the learned complexity model); None if it did not run
+        fast_correct = None
+        if solution['strategy'] == 'FAST':
+            fast_correct = is_correct
+        elif solution.get('fast_answer') is not None:
+            fast_correct = self._check_answer(solution['fast_answer'], expected_answer)
+        
+        logger.info(f"Problem {problem_id} evaluation complete. Correct: {is_correct}")
+        
+        return {
+            'problem_id': problem_id,
+            'problem_text': problem_text,
+            'complexity_level': complexity_level,
+            'expected_answer': expected_answer,
+            'actual_answer': solution['answer'],
+            'is_correct': is_correct,
+            'fast_correct': fast_correct,
+            'strategy_used': solution['strategy'],
+            'confidence': solution['confidence'],
+            'tokens_used': solution['tokens_used'],
+            'solution_time': solution['solution_time']
+        }
+    
+    def _new_metrics(self):
+        """
+        Create the running metrics of an evaluation.
+        
+        Returns:
+            dict: Metrics with all counters at zero.
+        """
+        return {
+            'total_problems': 0,
+            'total_time': 0,
+            'avg_time': 0,
+            'strategy_counts': {'FAST': 0, 'SLOW': 0, 'FAST_THEN_SLOW': 0},
+            'complexity_counts': {'Simple': 0, 'Medium': 0, 'Complex': 0},
+            'avg_confidence': 0,
+            'correct_answers': 0,
+            'total_tokens': 0
+        }
+    
+    def _update_metrics(self, metrics, result):
+        """
+        Add a single evaluation result to the running metrics.
+        
+        Args:
+            metrics (dict): Metrics being accumulated.
+            result (dict): Evaluation result for one problem.
+        """
+        metrics['total_problems'] += 1
+        metrics['total_time'] += result['solution_time']
+        metrics['strategy_counts'][result['strategy_used']] += 1
+        
+        if result['complexity_level'] in metrics['complexity_counts']:
+            metrics['complexity_counts'][result['complexity_level']] += 1
+        
+        metrics['avg_confidence'] += result['confidence']
+        # Results of checkpoints written before tokens were recorded count none
+        metrics['total_tokens'] += result.get('tokens_used', 0)
+        
+        if result['is_correct']:
+            metrics['correct_answers'] += 1
+    
+    def _finalize_metrics(self, metrics, wall_time):
+        """
+        Turn the running sums into averages once all results are in.
+        
+        Args:
+            metrics (dict): Metrics accumulated by _update_metrics.
+            wall_time (float): Elapsed time of the evaluation in seconds.
+        """
+        total_problems = metrics['total_problems']
+        metrics['wall_time'] = wall_time
         
         # Calculate averages
-        if len(problems) > 0:
-            metrics['avg_time'] = metrics['total_time'] / len(problems)
-            metrics['avg_confidence'] = metrics['avg_confidence'] / len(problems)
+        if total_problems > 0:
+            metrics['avg_time'] = metrics['total_time'] / total_problems
+            metrics['avg_confidence'] = metrics['avg_confidence'] / total_problems
         
         # Calculate accuracy
-        metrics['accuracy'] = metrics['correct_answers'] / len(problems) if len(problems) > 0 else 0
+        metrics['accuracy'] = metrics['correct_answers'] / total_problems if total_problems > 0 else 0
+        
+        # Cost of the answers, the figure adaptive routing brings down
+        correct_answers = metrics['correct_answers']
+        metrics['tokens_per_correct_answer'] = metrics['total_tokens'] / correct_answers if correct_answers else None
+        
+        # Keep the routing thresholds learned during the run
+        if self.routing_policy is not None:
+            self.routing_policy.save()
+            metrics['routing_thresholds'] = self.routing_policy.state()
+        
+        # Report the shared token budget, if there is one
+        utilization = self.budget_utilization()
+        if utilization is not None:
+            metrics['token_budget'] = utilization
         
         logger.info(f"Evaluation complete. Accuracy: {metrics['accuracy']:.2f}, Avg time: {metrics['avg_time']:.2f}s")
+    
+    def budget_utilization(self):
+        """
+        Get the state of the token budget shared by all in-flight problems.
         
-        return {
-            'results': results,
-            'metrics': metrics
-        }
+        Returns:
+            dict: Budget pool utilization, or None if the budget pool is disabled.
+        """
+        return self.resource_allocator.utilization()
     
     def _check_answer(self, actual_answer, expected_answer):
         """
-        Check if the actual answer matches the expected answer.
-        This is a simplified check that could be improved for a real system.
+        Check if the actual answer is mathematically equivalent to the expected answer.
+        
+        Answers are compared in canonical form (expressions, roots, systems,
+        equations and intervals), so '1+2x' matches '2*x + 1' and '0.5'
+        matches '1/2'.
         
         Args:
             actual_answer (str): Actual answer from the system.
@@ -195,71 +504,155 @@ class FastSlowThinkingMath:
         Returns:
             bool: True if answers match, False otherwise.
         """
-        if actual_answer is None:
-            return False
-        
-        # Convert to strings and normalize
-        actual_str = str(actual_answer).lower().replace(' ', '').replace('*', '')
-        expected_str = str(expected_answer).lower().replace(' ', '').replace('*', '')
-        
-        # Direct match
-        if actual_str == expected_str:
-            return True
-        
-        # Check for multiple solutions in different order
-        if ',' in actual_str and ',' in expected_str:
-            actual_parts = sorted([p.strip() for p in actual_str.split(',')])
-            expected_parts = sorted([p.strip() for p in expected_str.split(',')])
-            return actual_parts == expected_parts
-        
-        # Check for equations with variable names
-        if '=' in actual_str and '=' in expected_str:
-            # Extract the value part after the equals sign
-            actual_value = actual_str.split('=')[1].strip()
-            expected_value = expected_str.split('=')[1].strip()
-            return actual_value == expected_value
-        
-        # Check for numerical equivalence
-        try:
-            # Try to convert to float for numerical comparison
-            actual_float = float(actual_str)
-            expected_float = float(expected_str)
-            return abs(actual_float - expected_float) < 1e-6
-        except (ValueError, TypeError):
-            pass
-        
-        # More sophisticated checks could be added here
+        return self.answer_checker.equivalent(actual_answer, expected_answer)
+
+def parse_args(argv=None):
+    """
+    Parse command-line arguments.
+    
+    Args:
+        argv (list, optional): Arguments to parse (default: sys.argv).
         
-        return False
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Evaluate the Fast-Slow Thinking Math system.")
+    parser.add_argument(
+        '--workers', type=int, default=config.EVALUATION['MAX_CONCURRENCY'],
+        help="Number of problems solved in parallel"
+    )
+    parser.add_argument(
+        '--input', default=config.DATA['MATH_PROBLEMS_FILE'],
+        help="Problems to evaluate: a JSON list, or a .jsonl file that is streamed line by line"
+    )
+    parser.add_argument(
+        '--output', default=None,
+        help="Results file (default: evaluation_results.json, or evaluation_results.jsonl for .jsonl input)"
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="Continue an interrupted run, skipping the problems it completed"
+    )
+    parser.add_argument(
+        '--llm-backend', choices=['openai', 'local'], default=config.LLM_CLIENT['BACKEND'],
+        help="LLM backend ('local' runs offline and leaves solving to the local solvers)"
+    )
+    parser.add_argument(
+        '--token-budget', type=int, default=None,
+        help="Provider tokens all in-flight problems may spend per window (enables the shared budget pool)"
+    )
+    parser.add_argument(
+        '--complexity-model', default=config.COMPLEXITY_ANALYZER['MODEL_PATH'],
+        help="Learned complexity model (.npz) used to route problems"
+    )
+    parser.add_argument(
+        '--adaptive-routing', action='store_true', default=config.ADAPTIVE_ROUTING['ENABLED'],
+        help="Learn per-domain routing thresholds from monitoring feedback (kept across runs)"
+    )
+    parser.add_argument(
+        '--cost-aware-routing', action='store_true', default=config.STRATEGY_SELECTOR['ENABLED'],
+        help="Select strategies by expected cost, learned from recent solves"
+    )
+    parser.add_argument(
+        '--accuracy-target', type=float, default=config.STRATEGY_SELECTOR['ACCURACY_TARGET'],
+        help="Success probability cost-aware routing must reach"
+    )
+    parser.add_argument(
+        '--time-limit', type=float, default=config.EVALUATION['TIME_LIMIT'],
+        help="Seconds each problem may take; stages that would overrun are skipped"
+    )
+    parser.add_argument('--serve', action='store_true', help="Run the HTTP/JSON server")
+    parser.add_argument('--host', default=config.SERVER['HOST'], help="Address the server listens on")
+    parser.add_argument('--port', type=int, default=config.SERVER['PORT'], help="Port the server listens on")
+    parser.add_argument(
+        '--server-workers', type=int, default=config.SERVER['WORKERS'],
+        help="Number of pre-forked server worker processes"
+    )
+    return parser.parse_args(argv)
 
-def main():
+def print_summary(metrics):
+    """
+    Print the evaluation summary.
+    
+    Args:
+        metrics (dict): Evaluation metrics.
+    """
+    print("\nEvaluation Summary:")
+    print(f"Total problems: {metrics['total_problems']}")
+    print(f"Accuracy: {metrics['accuracy']:.2f}")
+    print(f"Average solution time: {metrics['avg_time']:.2f} seconds")
+    print(f"Wall time: {metrics['wall_time']:.2f} seconds")
+    print(f"Average confidence: {metrics['avg_confidence']:.2f}")
+    if metrics.get('tokens_per_correct_answer') is not None:
+        print(f"Tokens per correct answer: {metrics['tokens_per_correct_answer']:.1f}")
+    print("\nStrategy usage:")
+    for strategy, count in metrics['strategy_counts'].items():
+        print(f"  {strategy}: {count} problems")
+    
+    print("\nComplexity distribution:")
+    for level, count in metrics['complexity_counts'].items():
+        print(f"  {level}: {count} problems")
+    
+    if 'token_budget' in metrics:
+        budget = metrics['token_budget']
+        print("\nToken budget:")
+        print(f"  Spent: {budget['spent']} of {budget['capacity']} tokens ({budget['utilization']:.0%} utilized)")
+        print(f"  Degraded allocations: {budget['degraded']} of {budget['granted']}")
+
+def main(argv=None):
     """Main function to run the Fast-Slow Thinking Math system."""
+    args = parse_args(argv)
+    config.LLM_CLIENT['BACKEND'] = args.llm_backend
+    config.COMPLEXITY_ANALYZER['MODEL_PATH'] = args.complexity_model
+    config.ADAPTIVE_ROUTING['ENABLED'] = args.adaptive_routing
+    config.STRATEGY_SELECTOR['ENABLED'] = args.cost_aware_routing
+    config.STRATEGY_SELECTOR['ACCURACY_TARGET'] = args.accuracy_target
+    config.EVALUATION['TIME_LIMIT'] = args.time_limit
+    if args.token_budget is not None:
+        config.BUDGET_POOL['ENABLED'] = True
+        config.BUDGET_POOL['TOKENS_PER_WINDOW'] = args.token_budget
+    
     # Initialize the system
     system = FastSlowThinkingMath()
     
-    # Load problems
-    problems = system.load_problems(config.DATA['MATH_PROBLEMS_FILE'])
+    if args.serve:
+        serve(system, host=args.host, port=args.port, workers=args.server_workers)
+        return
     
-    # Evaluate problems
-    evaluation = system.evaluate_problems(problems)
+    if args.input.endswith('.jsonl'):
+        # Stream problems and results; only the metrics are kept in memory.
+        # The results file doubles as the checkpoint of the run.
+        output_path = args.output or config.EVALUATION['STREAM_RESULTS_FILE']
+        completed = EvaluationCheckpoint(output_path).iter_results() if args.resume else ()
+        with open(output_path, 'a' if args.resume else 'w') as f:
+            metrics = system.evaluate_stream(
+                system.stream_problems(args.input), f, max_concurrency=args.workers, completed=completed
+            )
+        
+        with open(os.path.splitext(output_path)[0] + '_metrics.json', 'w') as f:
+            json.dump(metrics, f, indent=2)
+        
+        print_summary(metrics)
+        print(f"\nResults written to {output_path}")
+        return
     
-    # Save evaluation results
-    with open('evaluation_results.json', 'w') as f:
-        json.dump(evaluation, f, indent=2)
+    # Load problems
+    problems = system.load_problems(args.input)
     
-    # Print summary
-    print("\nEvaluation Summary:")
-    print(f"Total problems: {evaluation['metrics']['total_problems']}")
-    print(f"Accuracy: {evaluation['metrics']['accuracy']:.2f}")
-    print(f"Average solution time: {evaluation['metrics']['avg_time']:.2f} seconds")
-    print(f"Average confidence: {evaluation['metrics']['avg_confidence']:.2f}")
-    print("\nStrategy usage:")
-    for strategy, count in evaluation['metrics']['strategy_counts'].items():
-        print(f"  {strategy}: {count} problems")
+    # Evaluate problems, saving each result to the checkpoint
+    with EvaluationCheckpoint.for_input(args.input) as checkpoint:
+        evaluation = system.evaluate_problems(
+            problems, max_concurrency=args.workers, checkpoint=checkpoint, resume=args.resume
+        )
+        
+        # Save evaluation results
+        with open(args.output or config.EVALUATION['RESULTS_FILE'], 'w') as f:
+            json.dump(evaluation, f, indent=2)
+        
+        # The run is complete, so the checkpoint is no longer needed
+        checkpoint.remove()
     
-    print("\nComplexity distribution:")
-    for level, count in evaluation['metrics']['complexity_counts'].items():
-        print(f"  {level}: {count} problems")
+    print_summary(evaluation['metrics'])
     
     # Print detailed results for each problem
     print("\nDetailed Results:")
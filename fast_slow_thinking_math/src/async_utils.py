@@ -0,0 +1,30 @@
+"""
+Helpers for calling asyncio code from the synchronous parts of the system.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_sync(awaitable):
+    """
+    Run an awaitable to completion from synchronous code.
+
+    If the calling thread already runs an event loop, the awaitable is run on a
+    fresh loop in a helper thread so the caller's loop is not re-entered; the
+    helper thread runs in a copy of the caller's context.
+
+    Args:
+        awaitable: The coroutine to run.
+
+    Returns:
+        The result of the coroutine.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(awaitable)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, awaitable).result()
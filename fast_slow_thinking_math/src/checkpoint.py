@@ -0,0 +1,150 @@
+"""
+Checkpoints of evaluation runs.
+
+Completed evaluation results are appended to a JSONL file as they come in,
+so a run that dies part way through can be resumed: the problems already in
+the checkpoint are skipped and the metrics are rebuilt from their results.
+Each input file has its own checkpoint, so a resumed run never picks up the
+results of another input whose problem ids happen to collide.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationCheckpoint:
+    """
+    Append-only JSONL log of completed evaluation results.
+    """
+
+    def __init__(self, path, sync_interval=None):
+        """
+        Initialize the checkpoint.
+
+        Args:
+            path (str): Path of the checkpoint file.
+            sync_interval (int, optional): Results between fsyncs to disk (default: from config).
+        """
+        self.path = path
+        self.sync_interval = (
+            sync_interval if sync_interval is not None else config.EVALUATION['CHECKPOINT_INTERVAL']
+        )
+        self._file = None
+        self._unsynced = 0
+
+    @classmethod
+    def for_input(cls, input_path, sync_interval=None):
+        """
+        Get the checkpoint of an evaluation run on an input file.
+
+        The checkpoint file is named after config.EVALUATION['CHECKPOINT_FILE'],
+        the input's name and a hash of its absolute path.
+
+        Args:
+            input_path (str): Path of the problems file being evaluated.
+            sync_interval (int, optional): Results between fsyncs to disk (default: from config).
+
+        Returns:
+            EvaluationCheckpoint: The input's checkpoint.
+        """
+        stem, extension = os.path.splitext(config.EVALUATION['CHECKPOINT_FILE'])
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        digest = hashlib.sha1(os.path.abspath(input_path).encode()).hexdigest()[:8]
+        return cls(f"{stem}_{name}_{digest}{extension}", sync_interval)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def load(self):
+        """
+        Read the results saved by an earlier run.
+
+        Returns:
+            list: Completed evaluation results, in the order they were saved.
+        """
+        results = list(self.iter_results())
+        logger.info(f"Loaded {len(results)} completed results from {self.path}")
+        return results
+
+    def iter_results(self):
+        """
+        Read the results saved by an earlier run one at a time.
+
+        A partially written last line (from a crash mid-write) is dropped
+        and cut off the file once the iteration completes, so that new
+        results are appended cleanly.
+
+        Yields:
+            dict: Completed evaluation results, in the order they were saved.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                yield result
+
+        if valid_size < os.path.getsize(self.path):
+            logger.warning(f"Dropping incomplete data at the end of checkpoint {self.path}")
+            os.truncate(self.path, valid_size)
+
+    def reset(self):
+        """Discard the saved results."""
+        self.close()
+        open(self.path, 'w').close()
+
+    def append(self, result):
+        """
+        Save a completed result.
+
+        Args:
+            result (dict): Evaluation result for one problem.
+        """
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a')
+
+        self._file.write(json.dumps(result, default=str) + '\n')
+        self._file.flush()
+
+        self._unsynced += 1
+        if self._unsynced >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """Force the saved results to disk."""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        """Sync and close the checkpoint file."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the checkpoint once the run it belongs to has completed."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
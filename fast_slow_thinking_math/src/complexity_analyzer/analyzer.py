@@ -3,22 +3,38 @@ Main implementation of the Complexity Analyzer for mathematical problems.
 """
 
 import re
-import numpy as np
-from .features import FeatureExtractor
+from .features import FEATURE_NAMES, FeatureExtractor
+from .learned_model import ComplexityModel
+from ..lazy_imports import lazy_import
 import config
 
+# Only needed by analyze_batch
+np = lazy_import('numpy')
+
 class ComplexityAnalyzer:
     """
     Analyzes the complexity of mathematical problems and classifies them
     into different complexity levels.
     """
     
-    def __init__(self):
-        """Initialize the complexity analyzer with configuration settings."""
+    def __init__(self, model=None):
+        """
+        Initialize the complexity analyzer with configuration settings.
+        
+        Args:
+            model (ComplexityModel, optional): Learned model scoring the problems
+                (default: loaded from config.COMPLEXITY_ANALYZER['MODEL_PATH'];
+                without one, scores are the weighted sum of FEATURE_WEIGHTS).
+        """
         self.feature_extractor = FeatureExtractor()
         self.feature_weights = config.COMPLEXITY_ANALYZER['FEATURE_WEIGHTS']
         self.simple_threshold = config.COMPLEXITY_ANALYZER['SIMPLE_THRESHOLD']
         self.medium_threshold = config.COMPLEXITY_ANALYZER['MEDIUM_THRESHOLD']
+        
+        model_path = config.COMPLEXITY_ANALYZER['MODEL_PATH']
+        if model is None and model_path:
+            model = ComplexityModel.load(model_path)
+        self.model = model
     
     def analyze(self, problem_text):
         """
@@ -31,7 +47,7 @@ class ComplexityAnalyzer:
             dict: A dictionary containing the complexity analysis results.
         """
         # Extract features
-        features = self.feature_extractor.extract_features(problem_text)
+        features, domain = self.feature_extractor.extract_features_and_domain(problem_text)
         
         # Calculate complexity score
         complexity_score = self._calculate_complexity_score(features)
@@ -44,12 +60,46 @@ class ComplexityAnalyzer:
             'problem': problem_text,
             'complexity_score': complexity_score,
             'complexity_level': complexity_level,
+            'domain': domain,
             'features': features,
             'feature_contributions': self._calculate_feature_contributions(features),
         }
         
         return analysis
     
+    def analyze_batch(self, problem_texts):
+        """
+        Analyze the complexity of many mathematical problems at once.
+        
+        Each problem is scanned once for features and the scores are
+        computed with NumPy; the results are identical to calling analyze()
+        on each problem.
+        
+        Args:
+            problem_texts (list): The texts of the mathematical problems.
+            
+        Returns:
+            list: Complexity analysis dictionaries, in input order.
+        """
+        problem_texts = list(problem_texts)
+        feature_columns, domains = self.feature_extractor.extract_features_and_domains_batch(problem_texts)
+        complexity_scores = self._calculate_complexity_scores(feature_columns)
+        
+        analyses = []
+        for index, problem_text in enumerate(problem_texts):
+            features = {name: float(feature_columns[name][index]) for name in FEATURE_NAMES}
+            complexity_score = complexity_scores[index]
+            analyses.append({
+                'problem': problem_text,
+                'complexity_score': complexity_score,
+                'complexity_level': self._classify_complexity(complexity_score),
+                'domain': domains[index],
+                'features': features,
+                'feature_contributions': self._calculate_feature_contributions(features),
+            })
+        
+        return analyses
+    
     def _calculate_complexity_score(self, features):
         """
         Calculate the overall complexity score based on extracted features.
@@ -60,6 +110,11 @@ class ComplexityAnalyzer:
         Returns:
             float: Complexity score between 0.0 and 1.0.
         """
+        if self.model is not None:
+            # The learned model scores a batch of one
+            feature_row = np.array([[features[feature] for feature in FEATURE_NAMES]])
+            return round(float(self.model.predict(feature_row)[0]), 2)
+        
         # Calculate weighted sum of features
         weighted_sum = sum(
             features[feature] * weight
@@ -72,6 +127,37 @@ class ComplexityAnalyzer:
         # Round to 2 decimal places for readability
         return round(normalized_score, 2)
     
+    def _calculate_complexity_scores(self, feature_columns):
+        """
+        Calculate complexity scores for a batch of problems.
+        
+        Args:
+            feature_columns (dict): Feature name -> NumPy array of feature values.
+            
+        Returns:
+            list: Complexity scores between 0.0 and 1.0, one per problem.
+        """
+        if self.model is not None:
+            # Probability that Fast Thinking fails on the problem
+            feature_matrix = np.column_stack([feature_columns[feature] for feature in FEATURE_NAMES])
+            return [round(float(score), 2) for score in self.model.predict(feature_matrix)]
+        
+        feature_matrix = np.column_stack(
+            [feature_columns[feature] for feature in self.feature_weights]
+        )
+        weights = np.array(list(self.feature_weights.values()), dtype=float)
+        
+        # Add the weighted columns one at a time, in the same order as the scalar
+        # sum, instead of a matrix product whose summation order may differ
+        weighted_sum = np.zeros(len(feature_matrix))
+        for column, weight in zip(feature_matrix.T, weights):
+            weighted_sum = weighted_sum + column * weight
+        
+        normalized_scores = np.clip(weighted_sum, 0.0, 1.0)
+        
+        # Python's round() (not np.round) so ties round exactly like the scalar path
+        return [round(float(score), 2) for score in normalized_scores]
+    
     def _classify_complexity(self, complexity_score):
         """
         Classify the complexity level based on the complexity score.
@@ -97,8 +183,15 @@ class ComplexityAnalyzer:
             features (dict): Dictionary of extracted features.
             
         Returns:
-            dict: Dictionary of feature contributions.
+            dict: Dictionary of feature contributions (with a learned model, to
+                the log-odds relative to an average problem).
         """
+        if self.model is not None:
+            return {
+                feature: round(contribution, 2)
+                for feature, contribution in self.model.contributions(features).items()
+            }
+        
         feature_contributions = {}
         for feature, value in features.items():
             contribution = value * self.feature_weights[feature]
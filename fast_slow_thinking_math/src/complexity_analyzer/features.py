@@ -3,16 +3,34 @@ Feature extraction utilities for the Complexity Analyzer.
 """
 
 import re
-import nltk
-from nltk.tokenize import word_tokenize
-import sympy
+import string
+from collections import namedtuple
 import config
+from ..lazy_imports import lazy_import
 
-# Download necessary NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# Only needed by extract_features_batch
+np = lazy_import('numpy')
+
+# Feature names in the order produced by FeatureExtractor.extract_features
+FEATURE_NAMES = ('length', 'sentence_structure', 'variables', 'keywords', 'domain', 'operations')
+
+# Splits text into words, whitespace runs and single symbols. This is the only
+# pass over the text; every feature is derived from the resulting tokens.
+_TOKEN_PATTERN = re.compile(r'\w+|\s+|[^\w\s]')
+
+# Upper bound on memoized word lookups (numbers make the vocabulary open-ended)
+_WORD_CACHE_SIZE = 65536
+
+# What a single word contributes to the features, computed once per distinct word
+_WordInfo = namedtuple('_WordInfo', [
+    'operations',         # Operations the whole word counts towards
+    'operation_phrases',  # (tokens, operation) phrases starting with this word
+    'domain_keywords',    # Single-word domain keywords contained in the word
+    'domain_phrases',     # (tail tokens, last part, keyword) phrases the word may start
+    'variable',           # Trailing ASCII letter, or None
+    'is_keyword',         # Whether the word is a math keyword
+    'is_clause_word',     # Whether the word is a clause marker
+])
 
 class FeatureExtractor:
     """
@@ -24,22 +42,38 @@ class FeatureExtractor:
         self.domain_complexity = config.COMPLEXITY_ANALYZER['DOMAIN_COMPLEXITY']
         self.operation_complexity = config.COMPLEXITY_ANALYZER['OPERATION_COMPLEXITY']
         
-        # Compile regex patterns for feature extraction
-        self.variable_pattern = re.compile(r'[a-zA-Z](?!\w)')
-        self.operation_patterns = {
-            'addition': re.compile(r'[+]|\bplus\b|\badd\b|\bsum\b|\btotal\b'),
-            'subtraction': re.compile(r'[-]|\bminus\b|\bsubtract\b|\bdifference\b'),
-            'multiplication': re.compile(r'[*×]|\btimes\b|\bmultiply\b|\bproduct\b'),
-            'division': re.compile(r'[/÷]|\bdivide\b|\bquotient\b|\bratio\b'),
-            'exponentiation': re.compile(r'[\^]|\bpower\b|\bsquared\b|\bcubed\b|\bexponent\b'),
-            'root': re.compile(r'\broot\b|\bsquare root\b|\bcube root\b|\b\sqrt\b'),
-            'logarithm': re.compile(r'\blog\b|\bln\b|\blogarithm\b'),
-            'trigonometric': re.compile(r'\bsin\b|\bcos\b|\btan\b|\bsine\b|\bcosine\b|\btangent\b'),
-            'derivative': re.compile(r'\bderivative\b|\bdifferentiate\b|\bd/dx\b'),
-            'integral': re.compile(r'\bintegral\b|\bintegrate\b|\b∫\b'),
-            'limit': re.compile(r'\blimit\b|\blim\b'),
-            'summation': re.compile(r'\bsummation\b|\bsum of\b|\b∑\b'),
-            'product': re.compile(r'\bproduct of\b|\b∏\b'),
+        # Operation vocabulary: words count as whole words, symbols wherever they appear
+        self.operation_words = {
+            'addition': ['plus', 'add', 'sum', 'total'],
+            'subtraction': ['minus', 'subtract', 'difference'],
+            'multiplication': ['times', 'multiply', 'product'],
+            'division': ['divide', 'quotient', 'ratio'],
+            'exponentiation': ['power', 'squared', 'cubed', 'exponent'],
+            'root': ['root'],  # "square root" and "cube root" count once, as "root"
+            'logarithm': ['log', 'ln', 'logarithm'],
+            'trigonometric': ['sin', 'cos', 'tan', 'sine', 'cosine', 'tangent'],
+            'derivative': ['derivative', 'differentiate'],
+            'integral': ['integral', 'integrate'],
+            'limit': ['limit', 'lim'],
+            'summation': ['summation'],
+            'product': [],
+        }
+        self.operation_symbols = {
+            '+': 'addition',
+            '-': 'subtraction',
+            '*': 'multiplication',
+            '×': 'multiplication',
+            '/': 'division',
+            '÷': 'division',
+            '^': 'exponentiation',
+        }
+        # Symbols that count only between two word characters (e.g. "x∫y")
+        self.enclosed_symbols = {'∫': 'integral', '∑': 'summation', '∏': 'product'}
+        # Exact token sequences
+        self.operation_phrases = {
+            ('sum', ' ', 'of'): 'summation',
+            ('product', ' ', 'of'): 'product',
+            ('d', '/', 'dx'): 'derivative',
         }
         
         self.domain_keywords = {
@@ -51,6 +85,15 @@ class FeatureExtractor:
             'number_theory': ['prime', 'divisor', 'factor', 'remainder', 'modulo', 'congruence'],
             'combinatorics': ['combination', 'permutation', 'factorial', 'choose', 'arrangement'],
         }
+        
+        # Clause markers: commas, and these words between single spaces
+        self.clause_words = {'and', 'or', 'but', 'because', 'if', 'then', 'when', 'while'}
+        self.math_keywords = {'solve', 'find', 'calculate', 'determine', 'evaluate', 'simplify', 'factor', 'expand'}
+        
+        all_domain_keywords = {keyword for keywords in self.domain_keywords.values() for keyword in keywords}
+        self._single_word_keywords = sorted(keyword for keyword in all_domain_keywords if ' ' not in keyword)
+        self._multi_word_keywords = sorted(keyword for keyword in all_domain_keywords if ' ' in keyword)
+        self._word_cache = {}
     
     def extract_features(self, problem_text):
         """
@@ -62,90 +105,301 @@ class FeatureExtractor:
         Returns:
             dict: A dictionary of extracted features.
         """
+        features, _ = self.extract_features_and_domain(problem_text)
+        return features
+    
+    def extract_features_and_domain(self, problem_text):
+        """
+        Extract features and the primary mathematical domain from a problem text.
+        
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            
+        Returns:
+            tuple: (features, domain), the features as returned by extract_features
+                and the name of the primary domain ('arithmetic' if none is detected).
+        """
         # Normalize text
         normalized_text = problem_text.lower()
         
-        # Tokenize text - using simple split instead of NLTK tokenizer to avoid dependency issues
-        tokens = normalized_text.split()
+        # Collect all pattern hits in a single pass
+        scan = self._scan(normalized_text)
         
         # Extract features
         features = {
-            'length': self._extract_length_feature(normalized_text),
-            'sentence_structure': self._extract_sentence_structure_feature(normalized_text),
-            'variables': self._extract_variables_feature(normalized_text),
-            'keywords': self._extract_keywords_feature(normalized_text, tokens),
-            'domain': self._extract_domain_feature(normalized_text, tokens),
-            'operations': self._extract_operations_feature(normalized_text),
+            'length': self._extract_length_feature(scan),
+            'sentence_structure': self._extract_sentence_structure_feature(scan),
+            'variables': self._extract_variables_feature(scan),
+            'keywords': self._extract_keywords_feature(scan),
+            'domain': self._extract_domain_feature(scan),
+            'operations': self._extract_operations_feature(scan),
         }
         
-        return features
+        return features, self._primary_domain(scan)
     
-    def _extract_length_feature(self, text):
+    def extract_features_batch(self, problem_texts):
+        """
+        Extract features from many problems at once.
+        
+        Each problem is scanned once and the features are computed on NumPy
+        arrays. The values are identical to calling extract_features on each
+        problem.
+        
+        Args:
+            problem_texts (list): The texts of the mathematical problems.
+            
+        Returns:
+            dict: Feature name -> NumPy array with one value per problem.
+        """
+        feature_columns, _ = self.extract_features_and_domains_batch(problem_texts)
+        return feature_columns
+    
+    def extract_features_and_domains_batch(self, problem_texts):
+        """
+        Extract features and primary domains from many problems at once.
+        
+        Args:
+            problem_texts (list): The texts of the mathematical problems.
+            
+        Returns:
+            tuple: (feature_columns, domains), the features as returned by
+                extract_features_batch and the list of primary domain names.
+        """
+        scans = [self._scan(problem_text.lower()) for problem_text in problem_texts]
+        count = len(scans)
+        domains = [self._primary_domain(scan) for scan in scans]
+        
+        lengths = np.array([scan['length'] for scan in scans], dtype=np.int64)
+        clause_counts = np.array([scan['clause_count'] for scan in scans], dtype=np.int64) + 1
+        variable_counts = np.array([len(scan['variables']) for scan in scans], dtype=np.int64)
+        keyword_counts = np.array([scan['keyword_count'] for scan in scans], dtype=np.int64)
+        domain = np.array([self.domain_complexity[name] for name in domains], dtype=float)
+        
+        # Operations: accumulate in operation order so sums match the scalar path exactly
+        operation_counts = np.array(
+            [list(scan['operation_counts'].values()) for scan in scans], dtype=np.int64
+        ).reshape(count, len(self.operation_words))
+        total_complexity = np.zeros(count)
+        for column, operation in zip(operation_counts.T, self.operation_words):
+            total_complexity = total_complexity + column * self.operation_complexity[operation]
+        total_operations = operation_counts.sum(axis=1)
+        operations = np.where(
+            total_operations > 0,
+            np.minimum(1.0, total_complexity / np.maximum(total_operations, 1)),
+            self.operation_complexity['addition'],
+        )
+        
+        return {
+            'length': np.minimum(1.0, lengths / 200.0),
+            'sentence_structure': np.minimum(1.0, clause_counts / 5.0),
+            'variables': np.minimum(1.0, variable_counts / 4.0),
+            'keywords': np.minimum(1.0, keyword_counts / 3.0),
+            'domain': domain,
+            'operations': operations,
+        }, domains
+    
+    def _scan(self, text):
+        """
+        Collect every operation, domain, keyword and clause-marker hit in one pass.
+        
+        Args:
+            text (str): The normalized problem text.
+            
+        Returns:
+            dict: Text length, operation counts, domain keywords found, variables,
+                keyword count and clause count.
+        """
+        tokens = _TOKEN_PATTERN.findall(text)
+        last = len(tokens) - 1
+        
+        operation_counts = dict.fromkeys(self.operation_words, 0)
+        domain_keywords = set()
+        variables = set()
+        keyword_count = 0
+        clause_count = 0
+        clause_ends = {}  # Clause word -> end of its last counted occurrence
+        position = 0
+        
+        for index, token in enumerate(tokens):
+            first = token[0]
+            
+            if first.isalnum() or first == '_':
+                info = self._word_info(token)
+                for operation in info.operations:
+                    operation_counts[operation] += 1
+                for phrase, operation in info.operation_phrases:
+                    if tuple(tokens[index:index + len(phrase)]) == phrase:
+                        operation_counts[operation] += 1
+                if info.domain_keywords:
+                    domain_keywords.update(info.domain_keywords)
+                for tail, last_part, keyword in info.domain_phrases:
+                    end = index + len(tail) + 1
+                    if (end <= last and tuple(tokens[index + 1:end]) == tail
+                            and tokens[end].startswith(last_part)):
+                        domain_keywords.add(keyword)
+                if info.variable:
+                    variables.add(info.variable)
+                
+                if info.is_keyword or info.is_clause_word or token == 'qrt':
+                    previous = tokens[index - 1] if index > 0 else ''
+                    following = tokens[index + 1] if index < last else ''
+                    
+                    # Keywords are whole whitespace-separated tokens
+                    if (info.is_keyword and (not previous or previous.isspace())
+                            and (not following or following.isspace())):
+                        keyword_count += 1
+                    
+                    # " and " etc.; like str.count, occurrences of the same marker
+                    # that share a space are counted once
+                    if info.is_clause_word and previous[-1:] == ' ' and following[:1] == ' ':
+                        if position - 1 >= clause_ends.get(token, 0):
+                            clause_count += 1
+                            clause_ends[token] = position + len(token) + 1
+                    
+                    # The original root pattern r'\b\sqrt\b' matches a single
+                    # whitespace character after a word, followed by "qrt"
+                    if (token == 'qrt' and index > 1 and len(previous) == 1
+                            and previous.isspace() and self._is_word(tokens[index - 2])):
+                        operation_counts['root'] += 1
+            
+            elif not first.isspace():
+                operation = self.operation_symbols.get(token)
+                if operation:
+                    operation_counts[operation] += 1
+                elif token == ',':
+                    clause_count += 1
+                elif (token in self.enclosed_symbols and 0 < index < last
+                        and self._is_word(tokens[index - 1]) and self._is_word(tokens[index + 1])):
+                    operation_counts[self.enclosed_symbols[token]] += 1
+            
+            position += len(token)
+        
+        return {
+            'length': len(text),
+            'operation_counts': operation_counts,
+            'domain_keywords': domain_keywords,
+            'variables': variables,
+            'keyword_count': keyword_count,
+            'clause_count': clause_count,
+        }
+    
+    def _word_info(self, word):
+        """Look up what a word contributes to the features."""
+        info = self._word_cache.get(word)
+        if info is not None:
+            return info
+        
+        last_char = word[-1]
+        info = _WordInfo(
+            operations=tuple(
+                operation for operation, words in self.operation_words.items() if word in words
+            ),
+            operation_phrases=tuple(
+                (phrase, operation) for phrase, operation in self.operation_phrases.items()
+                if phrase[0] == word
+            ),
+            domain_keywords=tuple(
+                keyword for keyword in self._single_word_keywords if keyword in word
+            ),
+            domain_phrases=tuple(
+                self._split_domain_phrase(keyword) for keyword in self._multi_word_keywords
+                if word.endswith(keyword.split(' ')[0])
+            ),
+            variable=last_char if last_char in string.ascii_letters else None,
+            is_keyword=word in self.math_keywords,
+            is_clause_word=word in self.clause_words,
+        )
+        
+        if len(self._word_cache) >= _WORD_CACHE_SIZE:
+            self._word_cache.clear()
+        self._word_cache[word] = info
+        return info
+    
+    @staticmethod
+    def _split_domain_phrase(keyword):
+        """
+        Split a multi-word keyword into the tokens that must follow its first
+        word exactly and the prefix of its last word (e.g. "rate of change" ->
+        (' ', 'of', ' '), 'change').
+        """
+        parts = keyword.split(' ')
+        tail = []
+        for part in parts[1:-1]:
+            tail.extend([' ', part])
+        tail.append(' ')
+        return tuple(tail), parts[-1], keyword
+    
+    @staticmethod
+    def _is_word(token):
+        """Check whether a token is a word (a run of word characters)."""
+        return token[0].isalnum() or token[0] == '_'
+    
+    def _extract_length_feature(self, scan):
         """Extract feature based on the length of the problem."""
         # Normalize length to a 0-1 scale
         # Assuming problems longer than 200 characters are very complex
-        length = len(text)
+        length = scan['length']
         normalized_length = min(1.0, length / 200.0)
         return normalized_length
     
-    def _extract_sentence_structure_feature(self, text):
+    def _extract_sentence_structure_feature(self, scan):
         """Extract feature based on the sentence structure complexity."""
         # Count the number of clauses (approximated by counting commas and conjunctions)
-        clause_markers = [',', ' and ', ' or ', ' but ', ' because ', ' if ', ' then ', ' when ', ' while ']
-        clause_count = sum(text.count(marker) for marker in clause_markers) + 1  # +1 for the base clause
+        clause_count = scan['clause_count'] + 1  # +1 for the base clause
         
         # Normalize to a 0-1 scale
         # Assuming more than 5 clauses indicates a very complex structure
         normalized_structure = min(1.0, clause_count / 5.0)
         return normalized_structure
     
-    def _extract_variables_feature(self, text):
+    def _extract_variables_feature(self, scan):
         """Extract feature based on the number and complexity of variables."""
-        # Count unique variables
-        variables = set(re.findall(self.variable_pattern, text))
-        variable_count = len(variables)
+        # Count unique variables (letters at the end of a word)
+        variable_count = len(scan['variables'])
         
         # Normalize to a 0-1 scale
         # Assuming more than 4 variables indicates a very complex problem
         normalized_variables = min(1.0, variable_count / 4.0)
         return normalized_variables
     
-    def _extract_keywords_feature(self, text, tokens):
+    def _extract_keywords_feature(self, scan):
         """Extract feature based on mathematical keywords."""
         # Count mathematical keywords
-        math_keywords = ['solve', 'find', 'calculate', 'determine', 'evaluate', 'simplify', 'factor', 'expand']
-        keyword_count = sum(token in math_keywords for token in tokens)
+        keyword_count = scan['keyword_count']
         
         # Normalize to a 0-1 scale
         # Assuming more than 3 keywords indicates a very complex problem
         normalized_keywords = min(1.0, keyword_count / 3.0)
         return normalized_keywords
     
-    def _extract_domain_feature(self, text, tokens):
+    def _extract_domain_feature(self, scan):
         """Extract feature based on the mathematical domain."""
+        return self.domain_complexity[self._primary_domain(scan)]
+    
+    def _primary_domain(self, scan):
+        """Get the name of the mathematical domain with the most keyword hits."""
         # Determine the domain based on keywords
+        found = scan['domain_keywords']
         domain_scores = {}
         for domain, keywords in self.domain_keywords.items():
-            score = sum(keyword in text for keyword in keywords)
+            score = sum(keyword in found for keyword in keywords)
             if score > 0:
                 domain_scores[domain] = score
         
         # If no domain is detected, default to arithmetic (simplest)
         if not domain_scores:
-            return self.domain_complexity['arithmetic']
+            return 'arithmetic'
         
         # Get the domain with the highest score
-        primary_domain = max(domain_scores, key=domain_scores.get)
-        return self.domain_complexity[primary_domain]
+        return max(domain_scores, key=domain_scores.get)
     
-    def _extract_operations_feature(self, text):
+    def _extract_operations_feature(self, scan):
         """Extract feature based on mathematical operations."""
         # Detect operations
         operation_scores = {}
-        for operation, pattern in self.operation_patterns.items():
-            matches = pattern.findall(text)
-            if matches:
-                operation_scores[operation] = len(matches) * self.operation_complexity[operation]
+        for operation, count in scan['operation_counts'].items():
+            if count:
+                operation_scores[operation] = count * self.operation_complexity[operation]
         
         # If no operations are detected, default to addition (simplest)
         if not operation_scores:
@@ -153,11 +407,8 @@ class FeatureExtractor:
         
         # Calculate the average complexity of detected operations
         total_complexity = sum(operation_scores.values())
-        total_operations = sum(len(pattern.findall(text)) for pattern in self.operation_patterns.values())
+        total_operations = sum(scan['operation_counts'].values())
         
         # Normalize to ensure it's between 0 and 1
-        if total_operations == 0:
-            return 0.1  # Default to a low complexity if no operations detected
-        
         normalized_operations = min(1.0, total_complexity / total_operations)
         return normalized_operations
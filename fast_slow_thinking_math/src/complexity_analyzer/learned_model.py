@@ -0,0 +1,217 @@
+"""
+Learned complexity model: logistic regression over the extracted features.
+
+The model predicts the probability that Fast Thinking fails on a problem,
+which serves as its complexity score. It is fitted offline from evaluation
+results and stored as a compact .npz file:
+
+    python -m src.complexity_analyzer.learned_model evaluation_results.json models/complexity_model.npz
+
+Inference is a single matrix-vector product, so scoring stays in the
+microseconds per problem, also for batches.
+"""
+
+import argparse
+import json
+import logging
+
+import config
+from .features import FEATURE_NAMES, FeatureExtractor
+from ..lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Training target of results without a Fast Thinking outcome, by labeled complexity level
+LEVEL_TARGETS = {'Simple': 0.0, 'Medium': 0.5, 'Complex': 1.0}
+
+
+class ComplexityModel:
+    """
+    Logistic regression predicting whether Fast Thinking fails on a problem.
+    """
+
+    def __init__(self, weights, bias, mean, scale, feature_names=FEATURE_NAMES):
+        """
+        Initialize the model.
+
+        Args:
+            weights (array): Weight of each standardized feature.
+            bias (float): Intercept.
+            mean (array): Feature means used for standardization.
+            scale (array): Feature standard deviations used for standardization.
+            feature_names (tuple): Names of the features, in column order.
+        """
+        self.feature_names = tuple(feature_names)
+        mean = np.asarray(mean, dtype=float)
+        scale = np.asarray(scale, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.bias = float(bias)
+        self.mean = mean
+        self.scale = scale
+
+        # Fold the standardization into the weights: x @ w + b on raw features
+        self._raw_weights = self.weights / scale
+        self._raw_bias = self.bias - float(mean @ self._raw_weights)
+
+    @classmethod
+    def fit(cls, feature_matrix, targets, l2=None, iterations=None, learning_rate=None):
+        """
+        Fit the model by gradient descent on the (L2-regularized) cross-entropy.
+
+        Args:
+            feature_matrix (array): One row of features per problem, in FEATURE_NAMES order.
+            targets (array): Probability that Fast Thinking fails (0.0 to 1.0) per problem.
+            l2 (float, optional): L2 penalty on the weights (default: from config).
+            iterations (int, optional): Gradient descent iterations (default: from config).
+            learning_rate (float, optional): Step size (default: from config).
+
+        Returns:
+            ComplexityModel: The fitted model.
+        """
+        settings = config.COMPLEXITY_ANALYZER
+        l2 = l2 if l2 is not None else settings['MODEL_L2']
+        iterations = iterations if iterations is not None else settings['MODEL_ITERATIONS']
+        learning_rate = learning_rate if learning_rate is not None else settings['MODEL_LEARNING_RATE']
+
+        features = np.asarray(feature_matrix, dtype=float)
+        targets = np.asarray(targets, dtype=float)
+        if len(features) == 0:
+            raise ValueError("Cannot fit a complexity model without training data")
+
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        # Constant features (e.g. unseen domains) keep a unit scale
+        scale[scale == 0] = 1.0
+        standardized = (features - mean) / scale
+
+        weights = np.zeros(features.shape[1])
+        bias = 0.0
+        for _ in range(iterations):
+            residuals = _sigmoid(standardized @ weights + bias) - targets
+            weights -= learning_rate * (standardized.T @ residuals / len(targets) + l2 * weights)
+            bias -= learning_rate * residuals.mean()
+
+        return cls(weights, bias, mean, scale)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a model saved with save().
+
+        Args:
+            path (str): Path to the .npz file.
+
+        Returns:
+            ComplexityModel: The loaded model.
+        """
+        with np.load(path) as data:
+            feature_names = tuple(str(name) for name in data['feature_names'])
+            if feature_names != FEATURE_NAMES:
+                raise ValueError(f"Complexity model {path} was fitted on features {feature_names}")
+            return cls(data['weights'], data['bias'], data['mean'], data['scale'], feature_names)
+
+    def save(self, path):
+        """
+        Save the model as a compressed .npz file.
+
+        Args:
+            path (str): Path to the .npz file.
+        """
+        np.savez_compressed(
+            path, weights=self.weights, bias=self.bias, mean=self.mean, scale=self.scale,
+            feature_names=np.array(self.feature_names),
+        )
+
+    def predict(self, feature_matrix):
+        """
+        Predict the probability that Fast Thinking fails, for a batch of problems.
+
+        Args:
+            feature_matrix (array): One row of features per problem, in FEATURE_NAMES order.
+
+        Returns:
+            numpy.ndarray: Probabilities between 0.0 and 1.0, one per problem.
+        """
+        return _sigmoid(np.asarray(feature_matrix, dtype=float) @ self._raw_weights + self._raw_bias)
+
+    def contributions(self, features):
+        """
+        Get each feature's contribution to the model's log-odds for a problem.
+
+        Args:
+            features (dict): Feature name -> value.
+
+        Returns:
+            dict: Feature name -> contribution relative to an average problem.
+        """
+        return {
+            name: float(weight * (features[name] - mean) / scale)
+            for name, weight, mean, scale in zip(self.feature_names, self.weights, self.mean, self.scale)
+        }
+
+
+def _sigmoid(logits):
+    """Logistic function, without overflow warnings for large negative logits."""
+    return 0.5 * (1.0 + np.tanh(0.5 * logits))
+
+
+def training_data(results, feature_extractor=None):
+    """
+    Build training data from evaluation results.
+
+    A result's target is 0.0 if Fast Thinking answered correctly and 1.0 if it
+    answered wrongly ('fast_correct'). Results without a Fast Thinking answer
+    are labeled by their complexity level (LEVEL_TARGETS); others are skipped.
+
+    Args:
+        results (list): Evaluation results (as saved in evaluation_results.json).
+        feature_extractor (FeatureExtractor, optional): Feature extractor to use.
+
+    Returns:
+        tuple: (feature_matrix, targets) as NumPy arrays.
+    """
+    feature_extractor = feature_extractor or FeatureExtractor()
+
+    texts, targets = [], []
+    for result in results:
+        fast_correct = result.get('fast_correct')
+        if fast_correct is not None:
+            target = 0.0 if fast_correct else 1.0
+        elif result.get('strategy_used') == 'FAST' and 'is_correct' in result:
+            target = 0.0 if result['is_correct'] else 1.0
+        elif result.get('complexity_level') in LEVEL_TARGETS:
+            target = LEVEL_TARGETS[result['complexity_level']]
+        else:
+            continue
+        texts.append(result['problem_text'])
+        targets.append(target)
+
+    if not texts:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0)
+    columns = feature_extractor.extract_features_batch(texts)
+    feature_matrix = np.column_stack([columns[name] for name in FEATURE_NAMES])
+    return feature_matrix, np.array(targets, dtype=float)
+
+
+def main(argv=None):
+    """Fit a complexity model from evaluation results and save it."""
+    parser = argparse.ArgumentParser(description="Fit the learned complexity model from evaluation results.")
+    parser.add_argument('results', help="Evaluation results file (evaluation_results.json)")
+    parser.add_argument('output', help="Model file to write (.npz)")
+    args = parser.parse_args(argv)
+
+    with open(args.results) as f:
+        evaluation = json.load(f)
+    feature_matrix, targets = training_data(evaluation['results'])
+
+    model = ComplexityModel.fit(feature_matrix, targets)
+    model.save(args.output)
+
+    accuracy = float(np.mean((model.predict(feature_matrix) > 0.5) == (targets > 0.5)))
+    print(f"Fitted on {len(targets)} problems (training accuracy {accuracy:.2f}); saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
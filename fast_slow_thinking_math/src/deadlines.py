@@ -0,0 +1,99 @@
+"""
+Deadlines shared by every stage of a solve.
+
+A deadline is the time.monotonic() timestamp by which a solution is due. It
+is passed explicitly from the switcher down to the thinking strategies and
+their LLM calls. The strategies also make it the current deadline while
+they run their solvers, so the sympy computations deep inside them are cut
+short without threading the deadline through every helper.
+"""
+
+import contextlib
+import contextvars
+import time
+
+# Deadline of the solve running in this thread or task (None: no deadline)
+_current_deadline = contextvars.ContextVar('deadline', default=None)
+
+
+def time_left(deadline):
+    """
+    Get the seconds left before a deadline.
+
+    Args:
+        deadline (float): time.monotonic() by which the solution is due, or None.
+
+    Returns:
+        float: Seconds left (negative once the deadline has passed), or None without a deadline.
+    """
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def has_time_for(deadline, seconds):
+    """
+    Check whether a stage needing some time can still run before a deadline.
+
+    Args:
+        deadline (float): time.monotonic() by which the solution is due, or None.
+        seconds (float): Time the stage needs.
+
+    Returns:
+        bool: True without a deadline or if enough time is left.
+    """
+    left = time_left(deadline)
+    return left is None or left >= seconds
+
+
+def current_deadline():
+    """
+    Get the deadline of the solve running in this thread or task.
+
+    Returns:
+        float: time.monotonic() by which the solution is due, or None.
+    """
+    return _current_deadline.get()
+
+
+def clamp_timeout(timeout, deadline=None):
+    """
+    Shorten a timeout so it ends no later than a deadline.
+
+    Args:
+        timeout (float): Timeout in seconds, or None for no timeout.
+        deadline (float, optional): time.monotonic() by which the solution is due
+            (default: the current deadline).
+
+    Returns:
+        float: The shorter of the timeout and the time left (may be negative),
+            or the timeout unchanged without a deadline.
+    """
+    left = time_left(deadline if deadline is not None else current_deadline())
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline):
+    """
+    Make a deadline the current deadline within a block.
+
+    An earlier deadline that is already current stays in force.
+
+    Args:
+        deadline (float): time.monotonic() by which the solution is due, or None.
+
+    Yields:
+        float: The deadline in force within the block, or None.
+    """
+    current = _current_deadline.get()
+    if deadline is None or (current is not None and current <= deadline):
+        yield current
+        return
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
@@ -0,0 +1,86 @@
+"""
+Deferred imports of heavy dependencies.
+
+sympy, openai, aiohttp and numpy together take about a second to import.
+Modules bind them with lazy_import() instead, so the cost is paid on first
+use rather than by every process that merely imports the package (CLI runs,
+server workers, tests that never touch them).
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Its own attributes are private, so every public attribute (np.load,
+    json.load, ...) is forwarded to the real module.
+    """
+
+    def __init__(self, name, on_load=None):
+        """
+        Initialize the lazy module.
+
+        Args:
+            name (str): Fully qualified module name, e.g. 'sympy.parsing.sympy_parser'.
+            on_load (callable, optional): Called once with the module after it is imported.
+        """
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute):
+        """Import the module if needed and return one of its attributes."""
+        return getattr(self._load_module(), attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+    def _load_module(self):
+        """
+        Import the module now.
+
+        Returns:
+            module: The real module.
+        """
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load is not None:
+                        self._on_load(module)
+                    self._module = module
+                module = self._module
+        return module
+
+
+def lazy_import(name, on_load=None):
+    """
+    Bind a module without importing it yet.
+
+    Args:
+        name (str): Fully qualified module name.
+        on_load (callable, optional): Called once with the module after it is imported.
+
+    Returns:
+        LazyModule: Proxy that imports the module on first attribute access.
+    """
+    return LazyModule(name, on_load=on_load)
+
+
+def load_now(module):
+    """
+    Import a lazily bound module now, e.g. before forking worker processes.
+
+    Args:
+        module (LazyModule): Proxy returned by lazy_import().
+
+    Returns:
+        module: The real module.
+    """
+    return module._load_module()
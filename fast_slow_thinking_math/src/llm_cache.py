@@ -0,0 +1,297 @@
+"""
+Persistent response cache for the LLM integration.
+
+Responses are stored under a content hash of the full request (model, messages,
+temperature, max_tokens, ...). A small in-process LRU tier sits in front of an
+SQLite file so repeated evaluation runs over the same dataset do not pay for
+API round-trips.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+
+class ResponseCache:
+    """
+    Two-tier (memory + disk) LRU cache for raw LLM responses with TTL and size cap.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        max_size_bytes=None,
+        ttl_seconds=None,
+        memory_entries=None,
+        touch_interval=None,
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            path (str, optional): Path of the SQLite cache file.
+            max_size_bytes (int, optional): Maximum total size of cached responses on disk.
+            ttl_seconds (float, optional): Time-to-live of a cached response (None disables expiry).
+            memory_entries (int, optional): Number of responses kept in the in-process tier.
+            touch_interval (float, optional): Seconds between writes of in-process hits to
+                the on-disk tier's access times.
+        """
+        settings = config.LLM_CACHE
+        if path is None:
+            # A relative configured path lives next to config.py, not in the working directory
+            path = os.path.join(os.path.dirname(os.path.abspath(config.__file__)), settings["PATH"])
+        self.path = path
+        self.max_size_bytes = (
+            max_size_bytes if max_size_bytes is not None else settings["MAX_SIZE_BYTES"]
+        )
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else settings["TTL_SECONDS"]
+        )
+        self.memory_entries = (
+            memory_entries if memory_entries is not None else settings["MEMORY_ENTRIES"]
+        )
+        self.touch_interval = (
+            touch_interval if touch_interval is not None else settings["TOUCH_INTERVAL"]
+        )
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._connection = None
+        self._pid = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        # Access times of in-process hits not written to disk yet
+        self._touched = {}
+        self._touched_at = time.time()
+
+    @staticmethod
+    def make_key(request):
+        """
+        Build a content-addressed cache key for a request.
+
+        Args:
+            request (dict): The full set of request parameters.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key from make_key().
+
+        Returns:
+            str: The cached response, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    self._touch(key, now)
+                    return value
+                del self._memory[key]
+
+            connection = self._get_connection(create=False)
+            if connection is None:
+                self._stats["misses"] += 1
+                return None
+            row = connection.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            value, created_at = row
+            if self._is_expired(created_at, now):
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                connection.commit()
+                self._stats["misses"] += 1
+                return None
+
+            connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            connection.commit()
+            self._remember(key, value, created_at)
+            self._stats["disk_hits"] += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store a response in both tiers, evicting least recently used entries as needed.
+
+        Args:
+            key (str): Cache key from make_key().
+            value (str): Response text to store.
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, now)
+            if size > self.max_size_bytes:
+                return
+
+            connection = self._get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._write_touched(connection)
+            self._evict(connection)
+            connection.commit()
+
+    def clear(self):
+        """Remove every cached response from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            connection = self._get_connection(create=False)
+            if connection is None:
+                return
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def stats(self):
+        """
+        Get cache hit/miss statistics.
+
+        Returns:
+            dict: Hit, miss and eviction counters.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _is_expired(self, created_at, now):
+        """Check whether an entry created at created_at has outlived the TTL."""
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, value, created_at):
+        """Insert an entry into the in-process LRU tier."""
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key, now):
+        """
+        Note an in-process hit, so the on-disk tier does not evict the entry as unused.
+
+        Access times are written in batches, at most every touch_interval
+        seconds and before every eviction (call with the lock held).
+        """
+        self._touched[key] = now
+        if now - self._touched_at < self.touch_interval:
+            return
+        connection = self._get_connection(create=False)
+        if connection is not None:
+            self._write_touched(connection)
+            connection.commit()
+
+    def _write_touched(self, connection):
+        """Write the access times of in-process hits to the on-disk tier (call with the lock held)."""
+        if self._touched:
+            connection.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+        self._touched_at = time.time()
+
+    def _evict(self, connection):
+        """Drop expired entries, then least recently used ones until under the size cap."""
+        if self.ttl_seconds is not None:
+            connection.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+
+        total_size = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        rows = connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total_size <= self.max_size_bytes:
+                break
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total_size -= size
+            self._stats["evictions"] += 1
+
+    def _get_connection(self, create=True):
+        """
+        Get the SQLite connection, reopening it after a fork.
+
+        The cache file and its directory are only created on the first write.
+
+        Args:
+            create (bool): Create the cache file if it does not exist yet.
+
+        Returns:
+            sqlite3.Connection: The connection, or None if create is False and there is no cache file.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            if not os.path.exists(self.path):
+                if not create:
+                    return None
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Get the process-wide response cache configured in config.LLM_CACHE.
+
+    Returns:
+        ResponseCache: The shared cache, or None if caching is disabled.
+    """
+    global _default_cache
+    if not config.LLM_CACHE["ENABLED"]:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
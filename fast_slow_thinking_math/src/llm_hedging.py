@@ -0,0 +1,258 @@
+"""
+Hedged requests for the LLM integration.
+
+If a request has not returned by a percentile of recent latencies, a duplicate
+is sent and whichever answer arrives first is used. Hedges are paid for from a
+budget that grows with the number of requests, so they cannot multiply API spend.
+
+When a hedge wins, the primary request's elapsed time is recorded as a lower
+bound of its latency, so the slow requests that trigger hedges stay in the
+latency window and the hedge delay does not drift down.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Get the thread pool used to run hedged synchronous calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.LLM_HEDGING["MAX_WORKERS"],
+                thread_name_prefix="llm-hedge",
+            )
+        return _executor
+
+
+class HedgingPolicy:
+    """
+    Decides when to hedge a request and runs the primary and hedged attempts.
+    """
+
+    def __init__(
+        self,
+        percentile=None,
+        window=None,
+        min_samples=None,
+        budget_ratio=None,
+        max_burst=None,
+    ):
+        """
+        Initialize the hedging policy.
+
+        Args:
+            percentile (float, optional): Latency percentile after which a hedge is sent.
+            window (int, optional): Number of recent latencies kept.
+            min_samples (int, optional): Latencies needed before hedging starts.
+            budget_ratio (float, optional): Hedges earned per request (e.g. 0.05 = 5%).
+            max_burst (float, optional): Maximum number of unspent hedges.
+        """
+        settings = config.LLM_HEDGING
+        self.percentile = percentile if percentile is not None else settings["PERCENTILE"]
+        self.min_samples = (
+            min_samples if min_samples is not None else settings["MIN_SAMPLES"]
+        )
+        self.budget_ratio = (
+            budget_ratio if budget_ratio is not None else settings["BUDGET_RATIO"]
+        )
+        self.max_burst = max_burst if max_burst is not None else settings["MAX_BURST"]
+        self.logger = logging.getLogger(__name__)
+
+        self._latencies = deque(maxlen=window if window is not None else settings["WINDOW"])
+        self._credit = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hedges": 0, "hedge_wins": 0}
+
+    def record_latency(self, latency):
+        """
+        Record the latency of a completed request.
+
+        Args:
+            latency (float): Request latency in seconds.
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self):
+        """
+        Get the time after which a request should be hedged.
+
+        Returns:
+            float: Delay in seconds, or None if there are too few latency samples.
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+        return ordered[index]
+
+    def stats(self):
+        """
+        Get hedging statistics.
+
+        Returns:
+            dict: Request, hedge and hedge-win counters and the current hedge delay.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hedge_delay"] = self.hedge_delay()
+        return stats
+
+    def call(self, fn):
+        """
+        Call fn, hedging it with a second call if it is slow.
+
+        Args:
+            fn (callable): Function performing the request; may be called twice.
+
+        Returns:
+            The result of the first call to succeed.
+        """
+        delay = self._begin_request()
+        if delay is None:
+            latency, result = self._timed(fn)
+            self.record_latency(latency)
+            return result
+
+        executor = _get_executor()
+        started_at = time.monotonic()
+        primary = executor.submit(self._timed, fn)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._acquire_hedge():
+            latency, result = primary.result()
+            self.record_latency(latency)
+            return result
+
+        self.logger.debug(f"Hedging LLM request after {delay:.2f}s")
+        hedge = executor.submit(self._timed, fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                # The loser cannot be interrupted mid-request; its result is dropped
+                for other in pending:
+                    other.cancel()
+                latency, result = future.result()
+                self._finish_hedged(latency, future is hedge, started_at)
+                return result
+        raise error
+
+    async def acall(self, factory):
+        """
+        Await a request, hedging it with a second request if it is slow.
+
+        Args:
+            factory (callable): Returns a new coroutine performing the request.
+
+        Returns:
+            The result of the first request to succeed.
+        """
+        delay = self._begin_request()
+        if delay is None:
+            latency, result = await self._atimed(factory)
+            self.record_latency(latency)
+            return result
+
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(self._atimed(factory))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self._acquire_hedge():
+                latency, result = await primary
+                self.record_latency(latency)
+                return result
+
+            self.logger.debug(f"Hedging LLM request after {delay:.2f}s")
+            hedge = asyncio.ensure_future(self._atimed(factory))
+            pending.add(hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    latency, result = task.result()
+                    self._finish_hedged(latency, task is hedge, started_at)
+                    return result
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _begin_request(self):
+        """Count a request, earn hedge budget and return the hedge delay."""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._credit = min(self.max_burst, self._credit + self.budget_ratio)
+        return self.hedge_delay()
+
+    def _acquire_hedge(self):
+        """Spend one hedge from the budget if available."""
+        with self._lock:
+            if self._credit < 1.0:
+                return False
+            self._credit -= 1.0
+            self._stats["hedges"] += 1
+            return True
+
+    def _finish_hedged(self, latency, hedge_won, started_at):
+        """
+        Record the outcome of a hedged request.
+
+        Args:
+            latency (float): Latency of the attempt that answered.
+            hedge_won (bool): True if the hedge answered before the primary request.
+            started_at (float): time.monotonic() at which the primary request was sent.
+        """
+        self.record_latency(latency)
+        if hedge_won:
+            # The dropped primary took at least this long
+            self.record_latency(time.monotonic() - started_at)
+            with self._lock:
+                self._stats["hedge_wins"] += 1
+
+    @staticmethod
+    def _timed(fn):
+        """Call fn and return (latency, result)."""
+        start_time = time.monotonic()
+        result = fn()
+        return time.monotonic() - start_time, result
+
+    @staticmethod
+    async def _atimed(factory):
+        """Await a new request from factory and return (latency, result)."""
+        start_time = time.monotonic()
+        result = await factory()
+        return time.monotonic() - start_time, result
+
+
+def get_default_hedging():
+    """
+    Build the hedging policy configured in config.LLM_HEDGING.
+
+    Returns:
+        HedgingPolicy: A new policy, or None if hedging is disabled.
+    """
+    if not config.LLM_HEDGING["ENABLED"]:
+        return None
+    return HedgingPolicy()
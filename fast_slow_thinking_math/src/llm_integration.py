@@ -3,16 +3,80 @@ LLM Integration module for the Fast-Slow Thinking Math system.
 """
 
 import os
-from dotenv import load_dotenv
-import openai
+import asyncio
+import threading
+import time
+import weakref
 import json
 import logging
+import config
+from .async_utils import run_sync
+from .deadlines import has_time_for, time_left
+from .lazy_imports import lazy_import
+from .llm_cache import get_default_cache
+from .llm_hedging import get_default_hedging
+from .local_llm import get_default_backend
+from .resource_allocator.budget_pool import current_reservation
 
-# Load environment variables
-load_dotenv()
 
-# Configure OpenAI
-openai.api_key = os.getenv("OPENAI_API_KEY")
+def _configure_openai(module):
+    """Configure the OpenAI client from the environment when it is first used."""
+    from dotenv import load_dotenv
+
+    # Load environment variables
+    load_dotenv()
+
+    # Configure OpenAI
+    module.api_key = os.getenv("OPENAI_API_KEY")
+
+
+openai = lazy_import("openai", on_load=_configure_openai)
+aiohttp = lazy_import("aiohttp")
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every coroutine (and thread) using a client.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Initialize the token bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens (burst size).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens):
+        """Take tokens if available, otherwise return the seconds to wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    async def acquire(self, tokens=1):
+        """
+        Wait until the requested number of tokens is available and take them.
+
+        Args:
+            tokens (float): Number of tokens to take.
+        """
+        wait = self._try_acquire(tokens)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._try_acquire(tokens)
 
 
 class LLMIntegration:
@@ -20,60 +84,340 @@ class LLMIntegration:
     Integration with OpenAI's GPT models for mathematical problem solving.
     """
 
-    def __init__(self, model="gpt-4"):
+    def __init__(
+        self,
+        model="gpt-4",
+        cache=None,
+        max_in_flight=None,
+        rate_limiter=None,
+        hedging=None,
+        backend=None,
+    ):
         """
         Initialize the LLM integration.
 
         Args:
             model (str): The OpenAI model to use (default: gpt-4)
+            cache (ResponseCache, optional): Response cache (default: shared cache from config, False disables caching)
+            max_in_flight (int, optional): Maximum concurrent async requests per event loop (default: from config)
+            rate_limiter (TokenBucket, optional): Rate limiter for async requests (default: from config)
+            hedging (HedgingPolicy, optional): Hedging policy for slow requests (default: from config, False disables hedging)
+            backend (LocalLLMBackend, optional): Stand-in used instead of the OpenAI API (default: from config)
         """
         self.model = model
+        self.backend = backend if backend is not None else get_default_backend()
+        if cache is None and self.backend is not None:
+            # Stand-in responses must not end up in the shared cache
+            cache = False
+        self.cache = cache if cache is not None else get_default_cache()
+        self.max_in_flight = (
+            max_in_flight
+            if max_in_flight is not None
+            else config.LLM_CLIENT["MAX_IN_FLIGHT"]
+        )
+        self.rate_limiter = (
+            rate_limiter
+            if rate_limiter is not None
+            else TokenBucket(
+                config.LLM_CLIENT["REQUESTS_PER_SECOND"], config.LLM_CLIENT["BURST"]
+            )
+        )
+        self.hedging = hedging if hedging is not None else get_default_hedging()
         self.logger = logging.getLogger(__name__)
 
-    def solve_problem(self, problem_text, thinking_mode="fast"):
+        # Connection pool and concurrency limit per event loop (loops are bound to threads)
+        self._async_resources = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    def solve_problem(self, problem_text, thinking_mode="fast", max_tokens=None, deadline=None):
         """
         Solve a mathematical problem using the LLM.
 
+        The response's usage is charged to the current token reservation, if
+        any; requests the reservation cannot cover are not sent.
+
         Args:
             problem_text (str): The text of the mathematical problem
             thinking_mode (str): Either "fast" or "slow" thinking mode
+            max_tokens (int, optional): Token budget of the solution, in budget units (words of
+                solution steps); converted to a response limit by response_token_limit()
+            deadline (float, optional): time.monotonic() by which the response is due; the request
+                times out then, and is not sent at all when too little time is left
 
         Returns:
             dict: Solution and metadata
         """
+        if max_tokens is not None and max_tokens <= 0:
+            return self._no_budget_solution()
+
         try:
-            # Prepare the prompt based on thinking mode
-            if thinking_mode == "fast":
-                prompt = self._create_fast_thinking_prompt(problem_text)
+            request = self._build_request(
+                self._create_prompt(problem_text, thinking_mode), thinking_mode, max_tokens
+            )
+
+            # Serve repeated requests from the cache
+            cache_key, cached_solution = self._lookup_cache(request, thinking_mode)
+            if cached_solution is not None:
+                return cached_solution
+
+            if not has_time_for(deadline, config.DEADLINES["MIN_LLM_SECONDS"]):
+                return self._deadline_solution()
+            request = self._fit_reservation(request)
+            if request is None:
+                return self._no_budget_solution()
+            options = self._call_options(deadline)
+
+            # Call the OpenAI API (or the local stand-in)
+            create = self.backend.create if self.backend else openai.ChatCompletion.create
+            if self.hedging:
+                response = self.hedging.call(lambda: create(**request, **options))
             else:
-                prompt = self._create_slow_thinking_prompt(problem_text)
-
-            # Call the OpenAI API
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a mathematical problem solver. Provide clear, step-by-step solutions.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.3 if thinking_mode == "fast" else 0.7,
-                max_tokens=1000 if thinking_mode == "fast" else 2000,
+                response = create(**request, **options)
+
+            return self._handle_response(response, request, thinking_mode, cache_key)
+
+        except Exception as e:
+            return self._error_solution(e)
+
+    async def asolve_problem(self, problem_text, thinking_mode="fast", max_tokens=None, deadline=None):
+        """
+        Solve a mathematical problem using the LLM without blocking the event loop.
+
+        Requests share a pooled HTTP session and are limited by the in-flight
+        semaphore and the token-bucket rate limiter.
+
+        Args:
+            problem_text (str): The text of the mathematical problem
+            thinking_mode (str): Either "fast" or "slow" thinking mode
+            max_tokens (int, optional): Token budget of the solution, in budget units (words of
+                solution steps); converted to a response limit by response_token_limit()
+            deadline (float, optional): time.monotonic() by which the response is due; waiting for
+                the limits counts towards it
+
+        Returns:
+            dict: Solution and metadata
+        """
+        if max_tokens is not None and max_tokens <= 0:
+            return self._no_budget_solution()
+
+        try:
+            request = self._build_request(
+                self._create_prompt(problem_text, thinking_mode), thinking_mode, max_tokens
             )
 
-            # Extract and parse the response
-            solution_text = response.choices[0].message.content
-            return self._parse_solution(solution_text, thinking_mode)
+            # Serve repeated requests from the cache
+            cache_key, cached_solution = self._lookup_cache(request, thinking_mode)
+            if cached_solution is not None:
+                return cached_solution
+
+            if not has_time_for(deadline, config.DEADLINES["MIN_LLM_SECONDS"]):
+                return self._deadline_solution()
+            request = self._fit_reservation(request)
+            if request is None:
+                return self._no_budget_solution()
+            options = self._call_options(deadline)
+
+            if self.hedging:
+                call = self.hedging.acall(lambda: self._acreate(request, options))
+            else:
+                call = self._acreate(request, options)
+            response = await asyncio.wait_for(call, time_left(deadline))
 
+            return self._handle_response(response, request, thinking_mode, cache_key)
+
+        except asyncio.TimeoutError:
+            return self._deadline_solution()
         except Exception as e:
-            self.logger.error(f"Error in LLM problem solving: {str(e)}")
-            return {
-                "answer": None,
-                "confidence": 0.0,
-                "error": str(e),
-                "steps": ["Error occurred during LLM processing"],
-            }
+            return self._error_solution(e)
+
+    def solve_problems(self, problem_texts, thinking_mode="fast"):
+        """
+        Solve several problems concurrently from synchronous code.
+
+        Args:
+            problem_texts (list): Texts of the mathematical problems
+            thinking_mode (str): Either "fast" or "slow" thinking mode
+
+        Returns:
+            list: Solutions in the same order as problem_texts
+        """
+
+        async def solve_all():
+            try:
+                return await asyncio.gather(
+                    *(self.asolve_problem(text, thinking_mode) for text in problem_texts)
+                )
+            finally:
+                await self.aclose()
+
+        return run_sync(solve_all())
+
+    async def aclose(self):
+        """Close the pooled HTTP session of the running event loop."""
+        with self._async_lock:
+            resources = self._async_resources.pop(asyncio.get_running_loop(), None)
+        if resources is not None and not resources[0].closed:
+            await resources[0].close()
+
+    async def _acreate(self, request, options=None):
+        """Send one ChatCompletion request through the pooled session and limits."""
+        options = options or {}
+        if self.backend:
+            return await self.backend.acreate(**request, **options)
+
+        session, semaphore = self._get_async_resources()
+        async with semaphore:
+            await self.rate_limiter.acquire()
+            openai.aiosession.set(session)
+            return await openai.ChatCompletion.acreate(**request, **options)
+
+    def _get_async_resources(self):
+        """Get the pooled session and semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            resources = self._async_resources.get(loop)
+            if resources is None or resources[0].closed:
+                resources = (
+                    aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(limit=self.max_in_flight)
+                    ),
+                    asyncio.Semaphore(self.max_in_flight),
+                )
+                self._async_resources[loop] = resources
+        return resources
+
+    def _lookup_cache(self, request, thinking_mode):
+        """Return the cache key and the cached solution (None on a miss) for a request."""
+        if not self.cache:
+            return None, None
+
+        cache_key = self.cache.make_key(request)
+        cached_text = self.cache.get(cache_key)
+        if cached_text is None:
+            return cache_key, None
+
+        self.logger.debug("LLM response served from cache")
+        return cache_key, self._parse_solution(cached_text, thinking_mode)
+
+    def _fit_reservation(self, request):
+        """
+        Cap a request's max_tokens at what is left of the current token reservation.
+
+        Returns:
+            dict: The request to send, or None if the reservation cannot cover
+                even config.LLM_CLIENT['MIN_MAX_TOKENS'].
+        """
+        reservation = current_reservation()
+        if reservation is None or reservation.remaining >= request["max_tokens"]:
+            return request
+        if reservation.remaining < config.LLM_CLIENT["MIN_MAX_TOKENS"]:
+            self.logger.debug("Token reservation cannot cover an LLM request")
+            return None
+        return dict(request, max_tokens=reservation.remaining)
+
+    def _charge(self, response, request):
+        """Charge the tokens of a response to the current token reservation."""
+        reservation = current_reservation()
+        if reservation is None:
+            return
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            reservation.charge(usage.total_tokens)
+        else:
+            # Without usage, charge the most the response can have cost
+            reservation.charge(request["max_tokens"])
+
+    def _handle_response(self, response, request, thinking_mode, cache_key):
+        """Charge an API response, parse it and cache it if it could be parsed."""
+        self._charge(response, request)
+
+        # Extract and parse the response
+        solution_text = response.choices[0].message.content
+        solution = self._parse_solution(solution_text, thinking_mode)
+
+        # Only cache responses that could be parsed
+        if cache_key is not None and solution["error"] is None:
+            self.cache.set(cache_key, solution_text)
+
+        return solution
+
+    def _error_solution(self, error):
+        """Build the solution returned when the LLM call fails."""
+        self.logger.error(f"Error in LLM problem solving: {str(error)}")
+        return {
+            "answer": None,
+            "confidence": 0.0,
+            "error": str(error),
+            "steps": ["Error occurred during LLM processing"],
+        }
+
+    def _no_budget_solution(self):
+        """Build the solution returned without calling the LLM when no tokens are left."""
+        return {
+            "answer": None,
+            "confidence": 0.0,
+            "error": "Token budget exhausted",
+            "steps": ["No token budget left for the LLM"],
+        }
+
+    def _deadline_solution(self):
+        """Build the solution returned when the deadline leaves no time for the LLM."""
+        return {
+            "answer": None,
+            "confidence": 0.0,
+            "error": "Deadline exceeded",
+            "steps": ["No time left for the LLM"],
+        }
+
+    def _call_options(self, deadline):
+        """Get the per-call ChatCompletion options (kept out of the cached request)."""
+        if deadline is None:
+            return {}
+        return {"request_timeout": time_left(deadline)}
+
+    def _create_prompt(self, problem_text, thinking_mode):
+        """Create the prompt for the given thinking mode."""
+        if thinking_mode == "fast":
+            return self._create_fast_thinking_prompt(problem_text)
+        return self._create_slow_thinking_prompt(problem_text)
+
+    def response_token_limit(self, thinking_mode, token_budget=None):
+        """
+        Get the max_tokens of a request.
+
+        Token budgets count words of solution steps, while max_tokens counts
+        provider tokens; budgets are converted with
+        config.LLM_CLIENT['TOKENS_PER_BUDGET_UNIT'].
+
+        Args:
+            thinking_mode (str): Either "fast" or "slow" thinking mode
+            token_budget (int, optional): Token budget of the solution, in budget units
+
+        Returns:
+            int: Response limit in provider tokens
+        """
+        limit = 1000 if thinking_mode == "fast" else 2000
+        if token_budget is not None:
+            tokens = int(token_budget * config.LLM_CLIENT["TOKENS_PER_BUDGET_UNIT"])
+            # Leave room for the JSON answer even on the smallest budgets
+            limit = min(limit, max(tokens, config.LLM_CLIENT["MIN_MAX_TOKENS"]))
+        return limit
+
+    def _build_request(self, prompt, thinking_mode, max_tokens=None):
+        """Build the full set of ChatCompletion parameters for a prompt."""
+        limit = self.response_token_limit(thinking_mode, max_tokens)
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a mathematical problem solver. Provide clear, step-by-step solutions.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.3 if thinking_mode == "fast" else 0.7,
+            "max_tokens": limit,
+        }
 
     def _create_fast_thinking_prompt(self, problem_text):
         """Create a prompt for fast thinking mode."""
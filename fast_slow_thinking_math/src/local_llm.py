@@ -0,0 +1,121 @@
+"""
+Offline stand-in for the OpenAI ChatCompletion API.
+
+The local backend answers every request with a well-formed response in the
+JSON format the prompts ask for, but abstains from answering (answer null,
+confidence 0), so the thinking strategies fall back to their own solvers.
+It makes the system runnable and testable without network access or an API
+key, and can simulate API latency for load testing.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import config
+
+
+class LocalLLMBackend:
+    """
+    Drop-in replacement for openai.ChatCompletion's create/acreate.
+    """
+
+    name = "local"
+
+    def __init__(self, latency=None):
+        """
+        Initialize the local backend.
+
+        Args:
+            latency (float, optional): Simulated response time in seconds (default: from config).
+        """
+        self.latency = latency if latency is not None else config.LLM_CLIENT["LOCAL_LATENCY"]
+
+    def create(self, request_timeout=None, **request):
+        """
+        Answer a ChatCompletion request.
+
+        Args:
+            request_timeout (float, optional): Seconds to wait for the response, as with openai.
+            **request: ChatCompletion parameters (model, messages, ...).
+
+        Returns:
+            An object shaped like an OpenAI ChatCompletion response.
+        """
+        if self.latency > 0:
+            time.sleep(self._wait(request_timeout))
+        self._check_timeout(request_timeout)
+        return self._build_response(request)
+
+    async def acreate(self, request_timeout=None, **request):
+        """
+        Answer a ChatCompletion request without blocking the event loop.
+
+        Args:
+            request_timeout (float, optional): Seconds to wait for the response, as with openai.
+            **request: ChatCompletion parameters (model, messages, ...).
+
+        Returns:
+            An object shaped like an OpenAI ChatCompletion response.
+        """
+        if self.latency > 0:
+            await asyncio.sleep(self._wait(request_timeout))
+        self._check_timeout(request_timeout)
+        return self._build_response(request)
+
+    def _wait(self, request_timeout):
+        """Get how long a request waits: the simulated latency, cut off at the timeout."""
+        if request_timeout is None:
+            return self.latency
+        return max(0.0, min(self.latency, request_timeout))
+
+    def _check_timeout(self, request_timeout):
+        """Fail a request whose simulated latency exceeds its timeout."""
+        if request_timeout is not None and self.latency > request_timeout:
+            raise TimeoutError(f"Request timed out after {max(0.0, request_timeout):g} seconds")
+
+    def _build_response(self, request):
+        """Build an abstaining response in the format the prompt asks for."""
+        prompt = request["messages"][-1]["content"]
+        if '"explanation"' in prompt:
+            content = {
+                "answer": None,
+                "explanation": "Local backend: no LLM answer available",
+                "confidence": 0.0,
+            }
+        else:
+            content = {
+                "analysis": "Local backend: no LLM analysis available",
+                "steps": [],
+                "verification": "",
+                "answer": None,
+                "confidence": 0.0,
+            }
+
+        text = json.dumps(content)
+        message = SimpleNamespace(role="assistant", content=text)
+        return SimpleNamespace(
+            model=request.get("model"),
+            choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+            usage=SimpleNamespace(
+                prompt_tokens=len(prompt.split()),
+                completion_tokens=len(text.split()),
+                total_tokens=len(prompt.split()) + len(text.split()),
+            ),
+        )
+
+
+def get_default_backend():
+    """
+    Build the backend configured in config.LLM_CLIENT['BACKEND'].
+
+    Returns:
+        LocalLLMBackend: The local backend, or None to use the OpenAI API.
+    """
+    backend = config.LLM_CLIENT["BACKEND"]
+    if backend == "openai":
+        return None
+    if backend == "local":
+        return LocalLLMBackend()
+    raise ValueError(f"Unknown LLM backend: {backend}")
@@ -0,0 +1,463 @@
+"""
+Equivalence checking of mathematical answers.
+
+Answers are compared in a canonical form instead of as strings, so that
+'2*x+1' matches '1+2x', '1/2' matches '0.5' and 'x = 2, x = 3' matches
+'[3, 2]'. Canonical forms are memoized per answer string. Expressions are
+compared numerically at a few points first; full symbolic simplification
+(in the sympy worker pool) only runs when the spot-checks are inconclusive.
+"""
+
+import cmath
+import functools
+import random
+import re
+from collections import namedtuple
+
+import config
+from ..lazy_imports import lazy_import
+from .parsing import parse_expression
+from .sympy_pool import run_sympy
+
+sympy = lazy_import('sympy')
+
+CanonicalAnswer = namedtuple('CanonicalAnswer', [
+    'kind',   # 'expression', 'set', 'tuple', 'system', 'equation', 'interval' or 'text'
+    'value',  # sympy object, or tuple of them ('text': None)
+    'text',   # Whitespace- and case-normalized answer text
+])
+
+_REPLACEMENTS = (
+    ('×', '*'), ('·', '*'), ('÷', '/'), ('−', '-'), ('–', '-'),
+    ('π', 'pi'), ('∞', 'oo'), ('≤', '<='), ('≥', '>='), ('==', '='), ('^', '**'),
+)
+_SUPERSCRIPT_PATTERN = re.compile('[⁰¹²³⁴⁵⁶⁷⁸⁹⁻]+')
+_SUPERSCRIPT_DIGITS = str.maketrans('⁰¹²³⁴⁵⁶⁷⁸⁹⁻', '0123456789-')
+_ROOT_PATTERN = re.compile(r'√\s*(\d+(?:\.\d+)?|[a-zA-Z]|\([^()]*\))')
+_INFINITY_PATTERN = re.compile(r'\b(?:infinity|inf)\b', re.IGNORECASE)
+_UNIT_PATTERN = re.compile(
+    r'^(.*?(?:[\d)]|pi))\s*(?:°|\s(?:cm|mm|km|m|meters|metres|miles|mph|kg|g|grams|'
+    r'liters|litres|ml|seconds|s|minutes|min|hours|h|days|degrees|units|square units|dollars)'
+    r'(?:\*\*[23])?)\.?$'
+)
+_CONNECTIVE_PATTERN = re.compile(r'\s+(?:or|and)\s+')
+_RELATION_PATTERN = re.compile(r'(<=|>=|<|>)')
+_UNION_PATTERN = re.compile(r'\s*(?:∪|\bU\b)\s*')
+_INTERVAL_PATTERN = re.compile(r'^([\[(])\s*([^,\[\]()]+?)\s*,\s*([^,\[\]()]+?)\s*([\])])$')
+_WORD_PATTERN = re.compile(r'[a-zA-Z]{3,}')
+_FUNCTION_PATTERN = re.compile(r'^([a-zA-Z]\w*)\s*\(([^()]*)\)$')
+
+# Words that can appear in a mathematical answer; any other word makes it prose
+_MATH_WORDS = frozenset([
+    'sin', 'cos', 'tan', 'sec', 'csc', 'cot', 'asin', 'acos', 'atan', 'sinh', 'cosh', 'tanh',
+    'log', 'exp', 'sqrt', 'abs', 'factorial',
+    'interval', 'open', 'lopen', 'ropen', 'union', 'finiteset',  # str() of sympy sets
+])
+
+# Symbols treated as an integration constant
+_INTEGRATION_CONSTANTS = ('C', 'c')
+
+_CLOSING_BRACKETS = {'(': ')', '[': ']', '{': '}'}
+
+
+def _normalize(text):
+    """Rewrite unicode math notation, roots, powers and units into sympy syntax."""
+    text = text.strip().rstrip('.').strip().lstrip('$')
+    text = _ROOT_PATTERN.sub(r'sqrt(\1)', text)
+    for old, new in _REPLACEMENTS:
+        text = text.replace(old, new)
+    text = _SUPERSCRIPT_PATTERN.sub(lambda match: '**' + match.group().translate(_SUPERSCRIPT_DIGITS), text)
+    text = _INFINITY_PATTERN.sub('oo', text)
+    text = text.replace('%', '/100')
+
+    match = _UNIT_PATTERN.match(text)
+    if match:
+        text = match.group(1)
+    return text.strip()
+
+
+def _looks_like_prose(text):
+    """Check whether text contains words that are not mathematical functions."""
+    return any(word.lower() not in _MATH_WORDS for word in _WORD_PATTERN.findall(text))
+
+
+def _outer_brackets(text):
+    """Get the bracket enclosing the whole text, if any."""
+    if not text or text[0] not in _CLOSING_BRACKETS or text[-1] != _CLOSING_BRACKETS[text[0]]:
+        return None
+    depth = 0
+    for index, char in enumerate(text):
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+            if depth == 0 and index < len(text) - 1:
+                return None
+    return text[0]
+
+
+def _split_top_level(text):
+    """Split text at commas outside of brackets."""
+    parts, depth, start = [], 0, 0
+    for index, char in enumerate(text):
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:index].strip())
+            start = index + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def _parse(text):
+    """Parse an expression, raising ValueError unless it is a sympy object."""
+    expression = parse_expression(text)
+    if not isinstance(expression, sympy.Basic):
+        raise ValueError(f"Not a mathematical expression: {text}")
+    return expression
+
+
+def _parse_interval(text):
+    """Parse interval notation such as '[2, 5)' or '(3, oo)', or return None."""
+    match = _INTERVAL_PATTERN.match(text)
+    if not match:
+        return None
+    left, start, end, right = match.groups()
+    # '[a, b]' is a list of roots and '(a, b)' a point unless an end is infinite
+    if (left, right) in (('[', ']'), ('(', ')')) and 'oo' not in start + end:
+        return None
+    return sympy.Interval(_parse(start), _parse(end), left == '(', right == ')')
+
+
+def _parse_relation(text):
+    """Parse a (possibly chained) inequality such as '2 < x <= 5' into a set."""
+    pieces = _RELATION_PATTERN.split(text)
+    expressions = [_parse(piece) for piece in pieces[::2]]
+    relations = [
+        sympy.Rel(expressions[index], expressions[index + 1], operator)
+        for index, operator in enumerate(pieces[1::2])
+    ]
+    return sympy.And(*relations).as_set()
+
+
+def _evaluate(expression, point):
+    """Evaluate an expression numerically at a point, or return None if it is not finite."""
+    try:
+        value = complex(expression.evalf(subs=point))
+    except (TypeError, ValueError, ZeroDivisionError, AttributeError):
+        return None
+    return value if cmath.isfinite(value) else None
+
+
+def _drop_integration_constant(expression, constant):
+    """Remove a '+ C' term from an expression."""
+    if isinstance(expression, sympy.Add):
+        return sympy.Add(*[term for term in expression.args if term != constant])
+    return expression
+
+
+def _simplifies_to_zero(expression):
+    """Check symbolically whether an expression is identically zero."""
+    return sympy.simplify(expression) == 0
+
+
+class AnswerChecker:
+    """
+    Compares answers for mathematical equivalence, with memoized canonical forms.
+    """
+
+    def __init__(self, cache_size=None, spot_checks=None, tolerance=None, relative_tolerance=None,
+                 simplify_timeout=None):
+        """
+        Initialize the answer checker.
+
+        Args:
+            cache_size (int, optional): Canonical forms and comparisons kept in the LRU caches (default: from config)
+            spot_checks (int, optional): Random points at which expressions are compared (default: from config)
+            tolerance (float, optional): Absolute tolerance of numeric comparisons near zero (default: from config)
+            relative_tolerance (float, optional): Relative tolerance of numeric comparisons elsewhere
+                (default: from config)
+            simplify_timeout (float, optional): Seconds allowed for symbolic simplification (default: from config)
+        """
+        settings = config.ANSWER_CHECKER
+        cache_size = cache_size if cache_size is not None else settings['CACHE_SIZE']
+        self.spot_checks = spot_checks if spot_checks is not None else settings['SPOT_CHECKS']
+        self.tolerance = tolerance if tolerance is not None else settings['TOLERANCE']
+        self.relative_tolerance = (
+            relative_tolerance if relative_tolerance is not None else settings['RELATIVE_TOLERANCE']
+        )
+        self.simplify_timeout = (
+            simplify_timeout if simplify_timeout is not None else settings['SIMPLIFY_TIMEOUT']
+        )
+
+        self._canonicalize_cached = functools.lru_cache(maxsize=cache_size)(self._canonicalize)
+        self._compare_cached = functools.lru_cache(maxsize=cache_size)(self._compare)
+
+    def equivalent(self, actual_answer, expected_answer):
+        """
+        Check whether two answers are mathematically equivalent.
+
+        Args:
+            actual_answer: Answer given by the system (converted with str()).
+            expected_answer: Expected answer (converted with str()).
+
+        Returns:
+            bool: True if the answers are equivalent.
+        """
+        if actual_answer is None or expected_answer is None:
+            return False
+        return self._compare_cached(str(actual_answer).strip(), str(expected_answer).strip())
+
+    def canonicalize(self, answer):
+        """
+        Get the canonical form of an answer.
+
+        Args:
+            answer: The answer (converted with str()).
+
+        Returns:
+            CanonicalAnswer: The answer's kind, sympy value and normalized text.
+        """
+        return self._canonicalize_cached(str(answer).strip())
+
+    def cache_info(self):
+        """
+        Get statistics of the canonical-form and comparison caches.
+
+        Returns:
+            dict: functools cache statistics per cache.
+        """
+        return {
+            'canonical_forms': self._canonicalize_cached.cache_info(),
+            'comparisons': self._compare_cached.cache_info(),
+        }
+
+    def _compare(self, actual_text, expected_text):
+        """Compare two answer strings (memoized by _compare_cached)."""
+        if actual_text == expected_text:
+            return True
+
+        actual = self.canonicalize(actual_text)
+        expected = self.canonicalize(expected_text)
+        if actual.text == expected.text:
+            return True
+        if 'text' in (actual.kind, expected.kind):
+            return False
+
+        return self._forms_equal(actual.kind, actual.value, expected.kind, expected.value)
+
+    def _canonicalize(self, answer_text):
+        """Build the canonical form of an answer string (memoized by _canonicalize_cached)."""
+        text = ' '.join(answer_text.lower().split()).rstrip('.')
+        normalized = _normalize(answer_text)
+        if not normalized or _looks_like_prose(normalized):
+            return CanonicalAnswer('text', None, text)
+
+        try:
+            kind, value = self._parse_answer(normalized)
+        except Exception:
+            # Not valid mathematics after all; only the text can be compared
+            return CanonicalAnswer('text', None, text)
+        return CanonicalAnswer(kind, value, text)
+
+    def _parse_answer(self, text):
+        """
+        Parse a normalized answer.
+
+        Returns:
+            tuple: (kind, value) of the canonical form.
+        """
+        intervals = _UNION_PATTERN.split(text)
+        if all(_parse_interval(part) is not None for part in intervals):
+            return 'interval', sympy.Union(*[_parse_interval(part) for part in intervals])
+
+        bracket = _outer_brackets(text)
+        if bracket == '{' and ':' in text:
+            # A solution dictionary such as {x: 3, y: 1}
+            return self._parse_equations([part.replace(':', '=', 1) for part in _split_top_level(text[1:-1])])
+        if bracket in ('[', '{'):
+            return 'set', tuple(_parse(part) for part in _split_top_level(text[1:-1]))
+        if bracket == '(' and len(_split_top_level(text[1:-1])) > 1:
+            return 'tuple', tuple(_parse(part) for part in _split_top_level(text[1:-1]))
+
+        parts = _split_top_level(_CONNECTIVE_PATTERN.sub(', ', text))
+
+        if all(_RELATION_PATTERN.search(part) for part in parts):
+            return 'interval', sympy.Union(*[_parse_relation(part) for part in parts])
+
+        if all('=' in part for part in parts):
+            return self._parse_equations(parts)
+
+        if len(parts) > 1:
+            return 'set', tuple(_parse(part) for part in parts)
+
+        expression = _parse(text)
+        if isinstance(expression, sympy.Set):
+            return 'interval', expression
+        return 'expression', expression
+
+    def _parse_equations(self, parts):
+        """Parse 'x = 2, x = 3' (roots), 'x = 3, y = 1' (a system) or a single equation."""
+        equations = []
+        for part in parts:
+            left, _, right = part.partition('=')
+            function = _FUNCTION_PATTERN.match(left.strip())
+            if function and function.group(1).lower() not in _MATH_WORDS:
+                # 'f(x) = ...' defines f(x); parsed, it would read as f*x
+                left = sympy.Symbol(''.join(left.split()))
+            else:
+                left = _parse(left)
+            equations.append((left, _parse(right)))
+
+        assigned = [left for left, _ in equations]
+        if not all(isinstance(left, sympy.Symbol) or left.is_Function for left in assigned):
+            if len(equations) > 1:
+                raise ValueError("Only a single general equation is supported")
+            left, right = equations[0]
+            return 'equation', left - right
+
+        if len(set(assigned)) == 1:
+            return 'set', tuple(right for _, right in equations)
+        if len(set(assigned)) == len(assigned):
+            return 'system', tuple(sorted(((str(left), right) for left, right in equations), key=str))
+        raise ValueError("Repeated assignments to several variables are not supported")
+
+    def _forms_equal(self, kind_a, value_a, kind_b, value_b):
+        """Compare two canonical forms."""
+        # A single root is the same answer as the value itself
+        if kind_a == 'set' and len(value_a) == 1:
+            kind_a, value_a = 'expression', value_a[0]
+        if kind_b == 'set' and len(value_b) == 1:
+            kind_b, value_b = 'expression', value_b[0]
+        if kind_a != kind_b:
+            return False
+
+        if kind_a == 'expression':
+            return self._expressions_equal(value_a, value_b)
+        if kind_a == 'equation':
+            return self._equations_equal(value_a, value_b)
+        if kind_a == 'set':
+            return self._unordered_equal(value_a, value_b)
+        if kind_a == 'tuple':
+            return len(value_a) == len(value_b) and all(
+                self._expressions_equal(a, b) for a, b in zip(value_a, value_b)
+            )
+        if kind_a == 'system':
+            return [name for name, _ in value_a] == [name for name, _ in value_b] and all(
+                self._expressions_equal(a, b) for (_, a), (_, b) in zip(value_a, value_b)
+            )
+        return self._sets_equal(value_a, value_b)
+
+    def _unordered_equal(self, values_a, values_b):
+        """Check that two collections contain equivalent values, in any order."""
+        if len(values_a) != len(values_b):
+            return False
+        unmatched = list(values_b)
+        for a in values_a:
+            for index, b in enumerate(unmatched):
+                if self._expressions_equal(a, b):
+                    del unmatched[index]
+                    break
+            else:
+                return False
+        return True
+
+    def _sets_equal(self, set_a, set_b):
+        """Compare solution sets (intervals, unions of intervals, finite sets)."""
+        if isinstance(set_a, sympy.Interval) and isinstance(set_b, sympy.Interval):
+            return (
+                set_a.left_open == set_b.left_open
+                and set_a.right_open == set_b.right_open
+                and self._expressions_equal(set_a.start, set_b.start)
+                and self._expressions_equal(set_a.end, set_b.end)
+            )
+        if isinstance(set_a, sympy.FiniteSet) and isinstance(set_b, sympy.FiniteSet):
+            return self._unordered_equal(set_a.args, set_b.args)
+        if isinstance(set_a, sympy.Union) and isinstance(set_b, sympy.Union):
+            if len(set_a.args) != len(set_b.args):
+                return False
+            unmatched = list(set_b.args)
+            for a in set_a.args:
+                match = next((b for b in unmatched if self._sets_equal(a, b)), None)
+                if match is None:
+                    return False
+                unmatched.remove(match)
+            return True
+        return set_a == set_b
+
+    def _equations_equal(self, difference_a, difference_b):
+        """Check that two equations (as left - right) are multiples of each other."""
+        if difference_a == difference_b or difference_a == -difference_b:
+            return True
+        return self._is_constant(difference_a / difference_b)
+
+    def _is_constant(self, expression):
+        """Check numerically that an expression takes the same value everywhere."""
+        values = [value for value in self._sample(expression) if value is not None]
+        return len(values) > 1 and all(self._close(value, values[0]) for value in values)
+
+    def _expressions_equal(self, a, b):
+        """Compare two expressions: structurally, then numerically, then symbolically."""
+        if a == b:
+            return True
+
+        # An antiderivative matches with or without its '+ C'
+        for name in _INTEGRATION_CONSTANTS:
+            constant = sympy.Symbol(name)
+            if (constant in a.free_symbols) != (constant in b.free_symbols):
+                a = _drop_integration_constant(a, constant)
+                b = _drop_integration_constant(b, constant)
+
+        # Exact numbers compare exactly; only decimals get a tolerance
+        exact = not (a.has(sympy.Float) or b.has(sympy.Float))
+        if exact and a.is_Rational and b.is_Rational:
+            return False
+
+        # Exact constants (e.g. sqrt(8) and 2*sqrt(2)) are decided symbolically
+        if not (exact and a.is_number and b.is_number):
+            verdict = self._spot_check(a, b)
+            if verdict is not None:
+                return verdict
+
+        try:
+            return run_sympy(_simplifies_to_zero, a - b, timeout=self.simplify_timeout)
+        except Exception:
+            return False
+
+    def _spot_check(self, a, b):
+        """
+        Compare two expressions at random points.
+
+        Returns:
+            bool: False if they differ at some point, True if they agree at
+                every point where both could be evaluated, or None if neither
+                could be evaluated anywhere.
+        """
+        agreed = False
+        for value_a, value_b in zip(self._sample(a, b.free_symbols), self._sample(b, a.free_symbols)):
+            if value_a is None or value_b is None:
+                continue
+            if not self._close(value_a, value_b):
+                return False
+            agreed = True
+        return True if agreed else None
+
+    def _sample(self, expression, extra_symbols=()):
+        """Evaluate an expression at the (deterministic) spot-check points."""
+        symbols = sorted(expression.free_symbols | set(extra_symbols), key=str)
+        if not symbols:
+            return [_evaluate(expression, {})] * self.spot_checks
+
+        # The same seed gives both expressions of a comparison the same points
+        generator = random.Random(len(symbols))
+        values = []
+        for _ in range(self.spot_checks):
+            point = {symbol: generator.uniform(0.5, 2.5) for symbol in symbols}
+            values.append(_evaluate(expression, point))
+        return values
+
+    def _close(self, a, b):
+        """Compare two numbers with an absolute tolerance near zero and a (tighter) relative one elsewhere."""
+        return abs(a - b) <= max(self.tolerance, self.relative_tolerance * max(abs(a), abs(b)))
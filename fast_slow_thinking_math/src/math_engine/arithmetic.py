@@ -0,0 +1,144 @@
+"""
+Safe evaluator for plain arithmetic expressions.
+
+Expressions are parsed with the ast module, checked against a whitelist of
+numeric literals and arithmetic operators, and compiled into a closure that is
+cached per expression string. Integers and decimals are evaluated exactly with
+int/Fraction arithmetic, so no code is ever executed and no sympy parsing is
+needed for problems such as "What is 18 divided by 6?".
+"""
+
+import ast
+import functools
+import math
+import operator
+from fractions import Fraction
+
+import config
+
+
+class UnsupportedExpressionError(ValueError):
+    """Raised when an expression is not plain arithmetic."""
+
+
+def _divide(left, right):
+    """Divide exactly when both operands are rational."""
+    if isinstance(left, float) or isinstance(right, float):
+        return left / right
+    return Fraction(left) / Fraction(right)
+
+
+def _power(base, exponent):
+    """Raise to a power exactly for integer exponents of bounded size."""
+    if isinstance(exponent, Fraction) and exponent.denominator == 1:
+        exponent = exponent.numerator
+
+    if isinstance(exponent, int) and not isinstance(base, float):
+        max_bits = config.ARITHMETIC['MAX_RESULT_BITS']
+        base = Fraction(base)
+        base_bits = max(abs(base.numerator).bit_length(), base.denominator.bit_length())
+        if base_bits * abs(exponent) > max_bits:
+            raise UnsupportedExpressionError("Exponent too large for exact evaluation")
+        return base ** exponent
+
+    result = float(base) ** float(exponent)
+    if isinstance(result, complex):
+        raise UnsupportedExpressionError("Result is not a real number")
+    return result
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _divide,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _power,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Common notation that Python's grammar reads differently
+_NOTATION = str.maketrans({'×': '*', '÷': '/', '−': '-'})
+
+
+def _compile_node(node):
+    """Compile a whitelisted AST node into a zero-argument closure."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        if isinstance(node.value, float):
+            if not math.isfinite(node.value):
+                # Literals such as 1e400 overflow to inf
+                raise UnsupportedExpressionError("Number out of range")
+            # Read decimals exactly as written ("0.1" is 1/10, not the nearest float)
+            value = Fraction(repr(node.value))
+        else:
+            value = node.value
+        return lambda: value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        apply = _BINARY_OPERATORS[type(node.op)]
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+        return lambda: apply(left(), right())
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        apply = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda: apply(operand())
+
+    raise UnsupportedExpressionError(f"Unsupported element in expression: {ast.dump(node)}")
+
+
+@functools.lru_cache(maxsize=config.ARITHMETIC['CACHE_SIZE'])
+def compile_arithmetic(expression):
+    """
+    Compile an arithmetic expression into a cached evaluation closure.
+
+    Args:
+        expression (str): Expression using numbers, + - * / // % ** (or ^) and parentheses.
+
+    Returns:
+        callable: Zero-argument function returning the value (int, Fraction or float).
+    """
+    source = expression.translate(_NOTATION).replace('^', '**').strip()
+    try:
+        tree = ast.parse(source, mode='eval')
+    except SyntaxError as e:
+        raise UnsupportedExpressionError(f"Invalid arithmetic expression: {expression}") from e
+    return _compile_node(tree.body)
+
+
+def evaluate_arithmetic(expression):
+    """
+    Evaluate an arithmetic expression safely.
+
+    Args:
+        expression (str): The arithmetic expression.
+
+    Returns:
+        int, Fraction or float: The exact value where possible.
+    """
+    return compile_arithmetic(expression)()
+
+
+def format_number(value):
+    """
+    Format an arithmetic result as an answer string.
+
+    Args:
+        value (int, Fraction or float): The value to format.
+
+    Returns:
+        str: Integer values without a decimal point, other values as decimals.
+    """
+    if isinstance(value, Fraction):
+        if value.denominator == 1:
+            return str(value.numerator)
+        return str(float(value))
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
@@ -0,0 +1,218 @@
+"""
+Numeric verification of candidate solutions.
+
+Both sides of an equation are compiled once with sympy.lambdify into a NumPy
+function, and all candidate roots, real or complex, are checked in a single
+vectorized call. Symbolic substitution is only used for the roots the
+numeric check cannot decide (roots that are not numbers, or sides that
+cannot be evaluated numerically).
+
+Derivatives and antiderivatives are checked by randomized identity testing:
+both sides are evaluated at a batch of random points, which gives a verdict
+with a probabilistic confidence, or "borderline" when symbolic
+simplification has to decide.
+"""
+
+import cmath
+import functools
+from collections import namedtuple
+
+import config
+from ..lazy_imports import lazy_import
+from .sympy_pool import run_sympy
+
+np = lazy_import('numpy')
+sympy = lazy_import('sympy')
+
+
+IdentityCheck = namedtuple('IdentityCheck', [
+    'verdict',     # True (identical), False (different) or None (borderline: simplify to decide)
+    'confidence',  # Probability-style confidence in a True verdict, 1 - 2**-points
+    'points',      # Number of random points at which both sides could be evaluated
+    'max_error',   # Largest relative difference between the two sides
+])
+
+
+@functools.lru_cache(maxsize=config.VERIFICATION['COMPILE_CACHE_SIZE'])
+def _compile_equation(left, right, variable):
+    """Compile both sides of an equation into one NumPy function of the variable."""
+    return sympy.lambdify(variable, [left, right], modules='numpy')
+
+
+@functools.lru_cache(maxsize=config.VERIFICATION['COMPILE_CACHE_SIZE'])
+def _compile_expression(expression, variable):
+    """Compile an expression into a NumPy function of the variable."""
+    return sympy.lambdify(variable, expression, modules='numpy')
+
+
+def _numeric_value(root):
+    """Get a root as a complex number, or None if it is not a finite number."""
+    try:
+        value = complex(root)
+    except (TypeError, ValueError):
+        return None
+    return value if cmath.isfinite(value) else None
+
+
+def check_roots_numerically(left, right, variable, roots, rtol=None):
+    """
+    Check candidate roots of left = right in one vectorized evaluation.
+
+    Args:
+        left (sympy.Basic): Left side of the equation.
+        right (sympy.Basic): Right side of the equation.
+        variable (sympy.Symbol): The unknown.
+        roots (list): Candidate values of the unknown (sympy numbers, may be complex).
+        rtol (float, optional): Relative tolerance, absolute for sides smaller
+            than 1 (default: from config).
+
+    Returns:
+        list: Per root, True if it satisfies the equation, False if it does not,
+            or None if the numeric check cannot decide.
+    """
+    rtol = rtol if rtol is not None else config.VERIFICATION['RTOL']
+    verdicts = [None] * len(roots)
+
+    values = [_numeric_value(root) for root in roots]
+    numeric = [index for index, value in enumerate(values) if value is not None]
+    if not numeric:
+        return verdicts
+
+    points = np.array([values[index] for index in numeric], dtype=complex)
+    try:
+        function = _compile_equation(left, right, variable)
+        with np.errstate(all='ignore'):
+            # Constant sides come back as scalars
+            left_values, right_values = (
+                np.broadcast_to(np.asarray(side, dtype=complex), points.shape)
+                for side in function(points)
+            )
+    except Exception:
+        # Not expressible in NumPy (other free symbols, unsupported functions)
+        return verdicts
+
+    with np.errstate(all='ignore'):
+        residuals = np.abs(left_values - right_values)
+        scales = np.maximum(1.0, np.maximum(np.abs(left_values), np.abs(right_values)))
+        satisfied = residuals <= rtol * scales
+    decided = np.isfinite(residuals) & np.isfinite(scales)
+
+    for index, is_satisfied, is_decided in zip(numeric, satisfied, decided):
+        if is_decided:
+            verdicts[index] = bool(is_satisfied)
+    return verdicts
+
+
+def verify_roots(left, right, variable, roots):
+    """
+    Check candidate roots of left = right, numerically where possible.
+
+    Args:
+        left (sympy.Basic): Left side of the equation.
+        right (sympy.Basic): Right side of the equation.
+        variable (sympy.Symbol): The unknown.
+        roots (list): Candidate values of the unknown.
+
+    Returns:
+        list: Per root, True if it satisfies the equation.
+    """
+    verdicts = check_roots_numerically(left, right, variable, roots)
+    return [
+        verdict if verdict is not None else _verify_symbolically(left, right, variable, root)
+        for verdict, root in zip(verdicts, roots)
+    ]
+
+
+def _verify_symbolically(left, right, variable, root):
+    """Substitute a root and simplify the residual (in the sympy worker pool)."""
+    try:
+        residual = (left - right).subs(variable, root)
+        return run_sympy(sympy.simplify, residual) == 0
+    except Exception:
+        return False
+
+
+def check_antiderivative(antiderivative, integrand, variable, points=None):
+    """
+    Test d/dx(antiderivative) == integrand at random points.
+
+    Args:
+        antiderivative (sympy.Basic): Candidate integral.
+        integrand (sympy.Basic): The function that was integrated.
+        variable (sympy.Symbol): Integration variable.
+        points (int, optional): Number of random points (default: from config).
+
+    Returns:
+        IdentityCheck: Verdict, confidence, points used and largest relative error.
+    """
+    x = _random_points(points)
+    try:
+        derivative = sympy.diff(antiderivative, variable)
+        candidate = _evaluate(derivative, variable, x)
+        reference = _evaluate(integrand, variable, x)
+    except Exception:
+        return IdentityCheck(None, 0.0, 0, float('nan'))
+    return _compare(candidate, reference)
+
+
+def check_derivative(derivative, function, variable, points=None):
+    """
+    Compare a candidate derivative with central finite differences of the function.
+
+    Args:
+        derivative (sympy.Basic): Candidate derivative.
+        function (sympy.Basic): The function that was differentiated.
+        variable (sympy.Symbol): Differentiation variable.
+        points (int, optional): Number of random points (default: from config).
+
+    Returns:
+        IdentityCheck: Verdict, confidence, points used and largest relative error.
+    """
+    x = _random_points(points)
+    step = config.VERIFICATION['FD_STEP'] * np.maximum(1.0, np.abs(x))
+    try:
+        candidate = _evaluate(derivative, variable, x)
+        with np.errstate(all='ignore'):
+            estimate = (
+                _evaluate(function, variable, x + step) - _evaluate(function, variable, x - step)
+            ) / (2 * step)
+    except Exception:
+        return IdentityCheck(None, 0.0, 0, float('nan'))
+    return _compare(candidate, estimate)
+
+
+def _random_points(count=None):
+    """Draw random evaluation points, half positive and half negative, away from zero."""
+    settings = config.VERIFICATION
+    count = count if count is not None else settings['IDENTITY_POINTS']
+    generator = np.random.default_rng(settings['IDENTITY_SEED'])
+    magnitudes = generator.uniform(0.25, 3.0, count)
+    return np.where(np.arange(count) % 2 == 0, magnitudes, -magnitudes)
+
+
+def _evaluate(expression, variable, x):
+    """Evaluate an expression at points; values outside its real domain become NaN."""
+    with np.errstate(all='ignore'):
+        values = np.asarray(_compile_expression(expression, variable)(x), dtype=float)
+    return np.broadcast_to(values, x.shape)
+
+
+def _compare(candidate, reference):
+    """Turn values of both sides at the random points into an identity verdict."""
+    settings = config.VERIFICATION
+    with np.errstate(all='ignore'):
+        errors = np.abs(candidate - reference) / np.maximum(
+            1.0, np.maximum(np.abs(candidate), np.abs(reference))
+        )
+    errors = errors[np.isfinite(errors)]
+
+    points = len(errors)
+    if points == 0:
+        return IdentityCheck(None, 0.0, 0, float('nan'))
+    max_error = float(errors.max())
+    if max_error > settings['IDENTITY_FAIL_RTOL']:
+        return IdentityCheck(False, 0.0, points, max_error)
+    if max_error > settings['IDENTITY_RTOL'] or points < settings['IDENTITY_MIN_POINTS']:
+        return IdentityCheck(None, 0.0, points, max_error)
+    # Each agreeing random point at least halves the chance of a false match
+    return IdentityCheck(True, 1.0 - 2.0 ** -points, points, max_error)
@@ -0,0 +1,139 @@
+"""
+Memoized sympy parsing shared by all thinking strategies.
+
+The same strings are parsed several times per problem (solve, verify, and
+again after escalation), so parse results are kept in a bounded LRU cache
+keyed on (text, transformations).
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+
+import config
+from ..lazy_imports import lazy_import
+
+sympy = lazy_import('sympy')
+sympy_parser = lazy_import('sympy.parsing.sympy_parser')
+
+
+@functools.lru_cache(maxsize=None)
+def default_transformations():
+    """
+    Get the parser transformations used by the thinking strategies.
+
+    Returns:
+        tuple: sympy's standard transformations plus implicit multiplication.
+    """
+    return sympy_parser.standard_transformations + (
+        sympy_parser.implicit_multiplication_application,
+    )
+
+
+class ParseCache:
+    """
+    Bounded, thread-safe LRU cache of parsed sympy expressions.
+    """
+
+    def __init__(self, maxsize=None):
+        """
+        Initialize the parse cache.
+
+        Args:
+            maxsize (int, optional): Maximum number of cached expressions (default: from config).
+        """
+        self.maxsize = maxsize if maxsize is not None else config.SYMPY['PARSE_CACHE_SIZE']
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def parse(self, text, transformations=None):
+        """
+        Parse text into a sympy expression, reusing earlier results.
+
+        Args:
+            text (str): The expression text.
+            transformations (tuple, optional): sympy parser transformations
+                (default: default_transformations()).
+
+        Returns:
+            sympy.Basic: The parsed (immutable) expression.
+        """
+        if transformations is None:
+            transformations = default_transformations()
+        key = (text.strip(), transformations)
+        with self._lock:
+            expression = self._entries.get(key)
+            if expression is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return expression
+            self._misses += 1
+
+        expression = sympy_parser.parse_expr(key[0], transformations=transformations)
+
+        # Only immutable sympy objects can be shared between callers
+        if isinstance(expression, sympy.Basic):
+            with self._lock:
+                self._entries[key] = expression
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        return expression
+
+    def info(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Hits, misses, current size and maximum size.
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        """Remove all cached expressions and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+_parse_cache = ParseCache()
+
+
+def parse_expression(text, transformations=None):
+    """
+    Parse text with the shared parse cache.
+
+    Args:
+        text (str): The expression text.
+        transformations (tuple, optional): sympy parser transformations
+            (default: default_transformations()).
+
+    Returns:
+        sympy.Basic: The parsed expression.
+    """
+    return _parse_cache.parse(text, transformations)
+
+
+def parse_cache_info():
+    """
+    Get statistics of the shared parse cache.
+
+    Returns:
+        dict: Hits, misses, current size and maximum size.
+    """
+    return _parse_cache.info()
+
+
+def clear_parse_cache():
+    """Clear the shared parse cache."""
+    _parse_cache.clear()
@@ -0,0 +1,298 @@
+"""
+Worker processes for potentially unbounded sympy computations.
+
+Calls such as sympy.integrate, sympy.solve or sympy.simplify can run for
+minutes on unlucky inputs. They are sent to a reusable pool of worker
+processes with a per-call deadline and a memory ceiling; a worker that
+overruns is killed and replaced, and the caller gets a SympyTimeoutError
+(or SympyMemoryError) instead of a stalled batch.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import config
+from ..deadlines import clamp_timeout
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class SympyTimeoutError(TimeoutError):
+    """Raised when a sympy computation exceeds its deadline."""
+
+
+class SympyMemoryError(MemoryError):
+    """Raised when a sympy computation exceeds the memory ceiling."""
+
+
+class SympyWorkerError(RuntimeError):
+    """Raised when a worker process dies unexpectedly."""
+
+
+def _current_address_space():
+    """Get the virtual memory size of the current process in bytes (Linux only)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def _worker_main(connection, memory_limit_bytes):
+    """Serve computations sent over connection until it is closed."""
+    if resource is not None and memory_limit_bytes:
+        # The ceiling applies on top of what the interpreter and sympy already use
+        limit = _current_address_space() + memory_limit_bytes
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+    while True:
+        try:
+            task = connection.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+
+        func, args, kwargs = task
+        try:
+            reply = ('ok', func(*args, **kwargs))
+        except MemoryError:
+            reply = ('memory', 'Memory limit exceeded')
+        except Exception as e:
+            reply = ('error', e)
+
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            connection.send(('error', SympyWorkerError(f"Unsendable result: {e!r}")))
+
+
+class _Worker:
+    """A worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, memory_limit_bytes):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, memory_limit_bytes),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+
+    def stop(self, kill=False):
+        """Stop the worker, killing it if it is busy."""
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1.0)
+        self.connection.close()
+
+
+class SympyWorkerPool:
+    """
+    Reusable pool of worker processes running sympy calls with deadlines.
+    """
+
+    def __init__(self, size=None, timeout=None, memory_limit_mb=None, start_method=None):
+        """
+        Initialize the worker pool. Workers are started on first use.
+
+        Args:
+            size (int, optional): Number of worker processes.
+            timeout (float, optional): Default per-call deadline in seconds.
+            memory_limit_mb (int, optional): Memory ceiling per worker (None or 0 disables it).
+            start_method (str, optional): multiprocessing start method.
+        """
+        settings = config.SYMPY
+        self.size = size if size is not None else settings['WORKER_POOL_SIZE']
+        self.timeout = timeout if timeout is not None else settings['WORKER_TIMEOUT']
+        memory_limit_mb = (
+            memory_limit_mb if memory_limit_mb is not None
+            else settings['WORKER_MEMORY_LIMIT_MB']
+        )
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else 0
+        start_method = start_method if start_method is not None else settings['WORKER_START_METHOD']
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = 'spawn'
+        self.context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            # Workers fork from a server that has already imported sympy
+            self.context.set_forkserver_preload(['sympy'])
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = []
+        self._pid = os.getpid()
+        self._stats = {'calls': 0, 'timeouts': 0, 'memory_errors': 0, 'restarts': 0}
+
+    def run(self, func, *args, timeout=None, **kwargs):
+        """
+        Run func(*args, **kwargs) in a worker process.
+
+        Args:
+            func (callable): A picklable function, e.g. sympy.integrate.
+            *args: Positional arguments (must be picklable).
+            timeout (float, optional): Deadline in seconds (default: the pool timeout).
+            **kwargs: Keyword arguments (must be picklable).
+
+        Returns:
+            The function's result.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if timeout <= 0:
+            raise SympyTimeoutError("No time left for sympy computation")
+
+        worker = self._checkout()
+        try:
+            self._count('calls')
+            try:
+                worker.connection.send((func, args, kwargs))
+                finished = worker.connection.poll(timeout)
+                if finished:
+                    status, payload = worker.connection.recv()
+            except (EOFError, OSError) as e:
+                self._replace(worker)
+                worker = None
+                raise SympyWorkerError(f"Sympy worker died: {e!r}") from e
+
+            if not finished:
+                self._count('timeouts')
+                self._replace(worker)
+                worker = None
+                raise SympyTimeoutError(
+                    f"{getattr(func, '__name__', func)} exceeded the {timeout:g}s time limit"
+                )
+        finally:
+            self._checkin(worker)
+
+        if status == 'ok':
+            return payload
+        if status == 'memory':
+            self._count('memory_errors')
+            raise SympyMemoryError(payload)
+        raise payload
+
+    def stats(self):
+        """
+        Get pool statistics.
+
+        Returns:
+            dict: Call, timeout, memory error and restart counters.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """Stop all idle worker processes."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        if self._pid != os.getpid():
+            return
+        for worker in idle:
+            worker.stop()
+
+    def _count(self, name):
+        """Increment a statistics counter."""
+        with self._lock:
+            self._stats[name] += 1
+
+    def _checkout(self):
+        """Take an idle worker, starting one if needed."""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Workers inherited through fork belong to the parent process
+                    self._idle = []
+                    self._pid = os.getpid()
+                if self._idle:
+                    return self._idle.pop()
+            return _Worker(self.context, self.memory_limit_bytes)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, worker):
+        """Return a worker to the idle list (None if it was discarded)."""
+        if worker is not None:
+            with self._lock:
+                self._idle.append(worker)
+        self._slots.release()
+
+    def _replace(self, worker):
+        """Kill an overrunning or broken worker and start its replacement."""
+        start_time = time.monotonic()
+        worker.stop(kill=True)
+        self._count('restarts')
+        try:
+            replacement = _Worker(self.context, self.memory_limit_bytes)
+        except Exception as e:
+            self.logger.error(f"Could not restart sympy worker: {str(e)}")
+            return
+        with self._lock:
+            self._idle.append(replacement)
+        self.logger.warning(f"Restarted sympy worker in {time.monotonic() - start_time:.2f}s")
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """
+    Get the process-wide sympy worker pool configured in config.SYMPY.
+
+    Returns:
+        SympyWorkerPool: The shared pool, or None if the pool is disabled.
+    """
+    global _default_pool
+    if not config.SYMPY['WORKER_POOL_ENABLED']:
+        return None
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SympyWorkerPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+def run_sympy(func, *args, timeout=None, **kwargs):
+    """
+    Run a sympy computation under the shared pool's deadline and memory ceiling.
+
+    Falls back to calling func directly when the pool is disabled. Within a
+    solve with a deadline, the timeout is shortened to the time left.
+
+    Args:
+        func (callable): A picklable function, e.g. sympy.integrate.
+        *args: Positional arguments.
+        timeout (float, optional): Deadline in seconds (default: config.SYMPY['WORKER_TIMEOUT']).
+        **kwargs: Keyword arguments.
+
+    Returns:
+        The function's result.
+    """
+    pool = get_default_pool()
+    if pool is None:
+        return func(*args, **kwargs)
+    timeout = clamp_timeout(pool.timeout if timeout is None else timeout)
+    return pool.run(func, *args, timeout=timeout, **kwargs)
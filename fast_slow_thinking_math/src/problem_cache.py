@@ -0,0 +1,365 @@
+"""
+Cache of solved problems, keyed on their mathematical structure.
+
+Problems are reduced to a structural key: the task (solve, derivative,
+integral, ...) and the parsed sympy expression, so that "Solve 2x+3=7" and
+"Find x if 2x + 3 = 7" share a key. A second key abstracts the constants
+away ("Solve 5x-1=14" has the same template as "Solve 2x+3=7"). Problems
+with qualifiers the key cannot represent (a derivative order, a point to
+evaluate at, a domain restriction, limits) are not cached.
+
+An exact hit is answered with the cached solution. A template hit reuses the
+Slow Thinking plan of the template and only runs its execute step, skipping
+the LLM, planning and verification.
+"""
+
+import copy
+import functools
+import logging
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+import config
+from .lazy_imports import lazy_import
+from .math_engine.parsing import parse_expression
+
+sympy = lazy_import('sympy')
+
+logger = logging.getLogger(__name__)
+
+ProblemKey = namedtuple('ProblemKey', [
+    'task',        # 'solve', 'derivative', 'integral', 'simplify', 'expand', 'factor' or 'evaluate'
+    'exact',       # Key shared by problems with the same answer
+    'template',    # Key shared by problems of the same form, or None if no template applies
+    'expression',  # The equation ('lhs = rhs') or function, as sympy prints it
+    'variable',    # Name of the unknown, or None
+])
+
+_TASK_PATTERNS = [
+    ('derivative', re.compile(r'\b(derivative|differentiate)\b|d/dx', re.IGNORECASE)),
+    ('integral', re.compile(r'\b(integral|integrate|antiderivative)\b', re.IGNORECASE)),
+    ('simplify', re.compile(r'\bsimplify\b', re.IGNORECASE)),
+    ('expand', re.compile(r'\bexpand\b', re.IGNORECASE)),
+    ('factor', re.compile(r'\bfactor(ize|ise)?\b', re.IGNORECASE)),
+]
+_EVALUATE_PATTERN = re.compile(r'\b(what is|calculate|compute|evaluate)\b', re.IGNORECASE)
+# Wording that changes the answer but is not part of the key
+_QUALIFIER_PATTERNS = [
+    # Derivative order: "second derivative", "2nd", "d²y/dx²", "f''(x)"
+    re.compile(r"\b(second|third|fourth|fifth|higher|nth|\d+(st|nd|rd|th)|order|twice)\b|''|\bd\s*(²|\^|\*\*)", re.IGNORECASE),
+    # A point: "at x = 3", "at the point", "when x = 2"
+    re.compile(r'\bat\s+(the\s+)?(point|origin|[a-z]\b)|\b(when|where)\s+[a-z]\s*=', re.IGNORECASE),
+    # Domain restrictions: "for positive x", "x > 0", "over the reals"
+    re.compile(r'\b(positive|negative|non-?negative|non-?positive|real|reals|integers?|natural|whole|rational|complex|prime)\b|[<>≤≥≠]', re.IGNORECASE),
+    # Limits: "from 0 to 1", "between 0 and 1", "on [0, 1]", "the limit"
+    re.compile(r'\b(from|between|over|on|interval|domain|range|limits?|bounds?|lim)\b', re.IGNORECASE),
+]
+
+_REPLACEMENTS = [('²', '**2'), ('³', '**3'), ('^', '**'), ('×', '*'), ('·', '*'), ('÷', '/'), ('−', '-'), ('–', '-')]
+_TOKEN_PATTERN = re.compile(r'\d+(?:\.\d+)?|[A-Za-z]+|\*\*|[-+*/()=]|\S')
+_OPERATORS = {'+', '-', '*', '/', '**', '='}
+_FUNCTIONS = {'sin', 'cos', 'tan', 'log', 'ln', 'exp', 'sqrt'}
+
+# Tasks SlowThinking can execute from a plan
+_TEMPLATE_TASKS = {'solve', 'derivative', 'integral'}
+
+
+def _is_math_token(token):
+    """Check whether a token belongs to a mathematical expression."""
+    if token[0].isdigit() or token in _OPERATORS or token in '()':
+        return True
+    if token.isalpha():
+        return len(token) == 1 or token.lower() in _FUNCTIONS
+    return False
+
+
+def _math_spans(text):
+    """Split a problem into the runs of tokens that look like mathematics."""
+    for old, new in _REPLACEMENTS:
+        text = text.replace(old, new)
+
+    spans, current = [], []
+    for token in _TOKEN_PATTERN.findall(text):
+        if _is_math_token(token):
+            current.append(token)
+        elif current:
+            spans.append(current)
+            current = []
+    if current:
+        spans.append(current)
+
+    # A stray letter ("a", "x" in "find x") is not an expression
+    return [
+        span for span in spans
+        if len(span) > 1 and span.count('(') == span.count(')')
+    ]
+
+
+def _template(expression):
+    """
+    Get the shape of an expression: its structure with every number abstracted.
+
+    The arguments of sums and products are sorted after abstraction, because
+    sympy orders them by their coefficients (3x**2 + 4x but 2x + 6x**2).
+    """
+    if expression.is_Number:
+        return '_c'
+    if not expression.args:
+        return sympy.srepr(expression)
+    args = [_template(arg) for arg in expression.args]
+    if expression.is_Add or expression.is_Mul:
+        args.sort()
+    return f"{type(expression).__name__}({', '.join(args)})"
+
+
+def _task(text, spans):
+    """Get the task a problem asks for, or None if it is not recognized."""
+    for task, pattern in _TASK_PATTERNS:
+        if pattern.search(text):
+            return task
+    if any(span.count('=') == 1 for span in spans):
+        return 'solve'
+    if _EVALUATE_PATTERN.search(text):
+        return 'evaluate'
+    return None
+
+
+def _has_qualifiers(text, task, spans):
+    """Check whether a problem says more than its task and expression capture."""
+    if any(pattern.search(text) for pattern in _QUALIFIER_PATTERNS):
+        return True
+    # A second expression ("... of x^2 at x = 3") qualifies the first one
+    return task != 'solve' and len(spans) > 1
+
+
+@functools.lru_cache(maxsize=config.PROBLEM_CACHE['KEY_CACHE_SIZE'])
+def canonicalize_problem(problem_text):
+    """
+    Reduce a problem to its structural keys.
+
+    Args:
+        problem_text (str): The text of the mathematical problem.
+
+    Returns:
+        ProblemKey: The problem's keys, or None if it is not recognized
+            (no known task, no expression that can be parsed, or qualifiers
+            the key cannot represent).
+    """
+    spans = _math_spans(problem_text)
+    task = _task(problem_text, spans)
+    if task is None or not spans or _has_qualifiers(problem_text, task, spans):
+        return None
+
+    try:
+        if task == 'solve':
+            equations = [span for span in spans if span.count('=') == 1]
+            if len(equations) != 1:
+                return None
+            left, right = ' '.join(equations[0]).split('=')
+            return _equation_key(parse_expression(left), parse_expression(right))
+
+        # The longest expression is the one the problem is about
+        tokens = max(spans, key=len)
+        if '=' in tokens:
+            # "f(x) = x^2": the function is the right-hand side
+            tokens = tokens[len(tokens) - tokens[::-1].index('='):]
+        return _expression_key(task, parse_expression(' '.join(tokens)))
+    except Exception:
+        return None
+
+
+def _equation_key(left, right):
+    """Build the keys of an equation in one unknown."""
+    symbols = (left - right).free_symbols
+    if len(symbols) != 1:
+        return None
+    variable = symbols.pop()
+
+    difference = sympy.expand(left - right)
+    # Equations with the same roots share the exact key: 2x + 3 = 7 and x - 2 = 0
+    _, canonical = difference.as_content_primitive()
+    if canonical.could_extract_minus_sign():
+        canonical = -canonical
+
+    return ProblemKey(
+        task='solve',
+        exact=('solve', sympy.srepr(canonical), variable.name),
+        template=('solve', _template(difference), variable.name),
+        expression=f'{sympy.sstr(left)} = {sympy.sstr(right)}',
+        variable=variable.name,
+    )
+
+
+def _expression_key(task, expression):
+    """Build the keys of a problem about one expression."""
+    if task == 'evaluate' and expression.free_symbols:
+        return None
+
+    names = sorted(symbol.name for symbol in expression.free_symbols)
+    template = None
+    if task in _TEMPLATE_TASKS and names == ['x']:
+        # SlowThinking differentiates and integrates with respect to x
+        template = (task, _template(expression), 'x')
+
+    return ProblemKey(
+        task=task,
+        exact=(task, sympy.srepr(expression), tuple(names)),
+        template=template,
+        expression=sympy.sstr(expression),
+        variable=names[0] if len(names) == 1 else None,
+    )
+
+
+class ProblemCache:
+    """
+    LRU caches of solved problems (by exact key) and solution plans (by template key).
+    """
+
+    def __init__(self, slow_strategy, answer_checker, max_entries=None, max_templates=None, min_confidence=None):
+        """
+        Initialize the problem cache.
+
+        Args:
+            slow_strategy (SlowThinking): Strategy that plans and executes template hits.
+            answer_checker (AnswerChecker): Checks that a plan reproduces a solution's answer.
+            max_entries (int, optional): Number of solved problems kept (default: from config).
+            max_templates (int, optional): Number of solution plans kept (default: from config).
+            min_confidence (float, optional): Confidence a solution needs to be cached
+                (default: from config).
+        """
+        settings = config.PROBLEM_CACHE
+        self.slow_strategy = slow_strategy
+        self.answer_checker = answer_checker
+        self.max_entries = max_entries if max_entries is not None else settings['MAX_ENTRIES']
+        self.max_templates = max_templates if max_templates is not None else settings['MAX_TEMPLATES']
+        self.min_confidence = min_confidence if min_confidence is not None else settings['MIN_CONFIDENCE']
+
+        self._lock = threading.Lock()
+        self._solutions = OrderedDict()
+        self._templates = OrderedDict()
+        self._stats = {'exact_hits': 0, 'template_hits': 0, 'misses': 0, 'unrecognized': 0}
+
+    def lookup(self, problem_text):
+        """
+        Answer a problem from the cache.
+
+        Args:
+            problem_text (str): The text of the mathematical problem.
+
+        Returns:
+            dict: The solution (with 'cache_hit' set to 'exact' or 'template'),
+                or None if the problem has to be solved.
+        """
+        key = canonicalize_problem(problem_text)
+        if key is None:
+            self._count('unrecognized')
+            return None
+
+        with self._lock:
+            solution = self._get(self._solutions, key.exact)
+            template = self._get(self._templates, key.template) if key.template else None
+
+        if solution is not None:
+            self._count('exact_hits')
+            solution = copy.deepcopy(solution)
+            solution['tokens_used'] = 0
+            solution['cache_hit'] = 'exact'
+            return solution
+
+        if template is not None:
+            solution = self.slow_strategy.solve_with_plan(
+                self._problem_analysis(problem_text, key), template['plan'], template['confidence']
+            )
+            if solution['error'] is None and solution['answer'] is not None:
+                self._count('template_hits')
+                solution['cache_hit'] = 'template'
+                return solution
+
+        self._count('misses')
+        return None
+
+    def store(self, problem_text, solution):
+        """
+        Cache a solution, and the plan of its template if that plan reproduces it.
+
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            solution (dict): Its solution; only confident solutions without errors are cached.
+        """
+        if (
+            solution.get('cache_hit') == 'exact'
+            or solution.get('error') is not None
+            or solution.get('answer') is None
+            or solution.get('confidence', 0.0) < self.min_confidence
+        ):
+            return
+        key = canonicalize_problem(problem_text)
+        if key is None:
+            return
+
+        with self._lock:
+            self._put(self._solutions, key.exact, copy.deepcopy(solution), self.max_entries)
+            needs_template = key.template is not None and key.template not in self._templates
+        if not needs_template:
+            return
+
+        # Only index plans that reproduce the accepted answer
+        analysis = self._problem_analysis(problem_text, key)
+        plan = self.slow_strategy.plan(analysis)
+        replay = self.slow_strategy.solve_with_plan(analysis, plan, solution['confidence'])
+        if self.answer_checker.equivalent(replay['answer'], solution['answer']):
+            with self._lock:
+                template = {'plan': plan, 'confidence': solution['confidence']}
+                self._put(self._templates, key.template, template, self.max_templates)
+        else:
+            logger.debug(f"Not indexing template of {problem_text!r}: its plan gives {replay['answer']!r}")
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Hits (exact and template), misses, unrecognized problems and sizes.
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._solutions), templates=len(self._templates))
+
+    def _problem_analysis(self, problem_text, key):
+        """Build the Slow Thinking problem analysis for a recognized problem."""
+        if key.task == 'solve':
+            return {
+                'problem_type': 'equation',
+                'key_components': {'equation': key.expression, 'variables': [key.variable]},
+                'original_text': problem_text,
+            }
+        return {
+            'problem_type': 'calculus',
+            'key_components': {
+                'function': key.expression,
+                'operation': key.task,
+                'limits': {'lower': None, 'upper': None},
+            },
+            'original_text': problem_text,
+        }
+
+    def _count(self, stat):
+        """Increment a statistic."""
+        with self._lock:
+            self._stats[stat] += 1
+
+    @staticmethod
+    def _get(entries, key):
+        """Get an entry and mark it as recently used (call with the lock held)."""
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+        return value
+
+    @staticmethod
+    def _put(entries, key, value, max_size):
+        """Add an entry, evicting the least recently used ones (call with the lock held)."""
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > max_size:
+            entries.popitem(last=False)
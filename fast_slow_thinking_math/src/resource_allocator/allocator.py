@@ -2,18 +2,49 @@
 Implementation of the Resource Allocator for the Fast-Slow Thinking system.
 """
 
+import logging
+
 import config
+from .budget_pool import get_default_budget_pool
+
+logger = logging.getLogger(__name__)
+
+BUDGET_KEYS = ('token_budget', 'max_steps', 'verification_effort')
+
+
+def resolve_budget(allocation, strategy):
+    """
+    Get the limits a strategy runs under for one problem.
+    
+    Args:
+        allocation (dict, optional): Resource allocation for the problem; limits it
+            leaves out (or all of them, if None) come from the strategy's settings.
+        strategy: Strategy with token_budget, max_steps and verification_effort attributes.
+        
+    Returns:
+        dict: token_budget, max_steps and verification_effort.
+    """
+    allocation = allocation or {}
+    return {key: allocation.get(key, getattr(strategy, key)) for key in BUDGET_KEYS}
 
 class ResourceAllocator:
     """
     Allocates computational resources based on problem complexity and selected strategy.
     """
     
-    def __init__(self):
-        """Initialize the Resource Allocator with configuration settings."""
+    def __init__(self, budget_pool=None):
+        """
+        Initialize the Resource Allocator with configuration settings.
+        
+        Args:
+            budget_pool (TokenBudgetPool, optional): Token budget shared with other
+                in-flight problems (default: from config, False disables it).
+        """
         self.base_token_budget = config.RESOURCE_ALLOCATOR['BASE_TOKEN_BUDGET']
         self.step_token_cost = config.RESOURCE_ALLOCATOR['STEP_TOKEN_COST']
         self.verification_token_cost = config.RESOURCE_ALLOCATOR['VERIFICATION_TOKEN_COST']
+        self.tokens_per_budget_unit = config.LLM_CLIENT['TOKENS_PER_BUDGET_UNIT']
+        self.budget_pool = budget_pool if budget_pool is not None else get_default_budget_pool()
     
     def allocate(self, complexity_analysis):
         """
@@ -156,3 +187,85 @@ class ResourceAllocator:
         else:
             # Default to base allocation
             return base_allocation
+    
+    def admit(self, complexity_analysis, strategy):
+        """
+        Allocate resources for a problem and reserve its tokens from the budget pool.
+        
+        Under pressure, the problem is solved with Fast Thinking and gets a
+        smaller token budget; once the pool is empty it gets no tokens at all.
+        The pool counts provider tokens, so the budget is converted with
+        config.LLM_CLIENT['TOKENS_PER_BUDGET_UNIT'].
+        
+        Args:
+            complexity_analysis (dict): Complexity analysis results.
+            strategy (str): Selected strategy ('FAST', 'SLOW', or 'FAST_THEN_SLOW').
+            
+        Returns:
+            tuple: (strategy, allocation, reservation); the reservation is None
+                without a budget pool and must be released when the problem is done.
+        """
+        if not self.budget_pool:
+            return strategy, self.allocate_for_strategy(complexity_analysis, strategy), None
+        
+        forced = strategy != 'FAST' and self.budget_pool.under_pressure()
+        if forced:
+            logger.info(f"Token budget under pressure: solving with FAST instead of {strategy}")
+            strategy = 'FAST'
+        
+        allocation = self.allocate_for_strategy(complexity_analysis, strategy)
+        reservation = self.budget_pool.reserve(self._provider_tokens(allocation['token_budget']))
+        return strategy, self._apply_reservation(allocation, reservation, forced), reservation
+    
+    def escalate(self, complexity_analysis, strategy, reservation=None):
+        """
+        Allocate resources for a problem that switched to a costlier strategy.
+        
+        Args:
+            complexity_analysis (dict): Complexity analysis results.
+            strategy (str): Strategy the problem switched to.
+            reservation (Reservation, optional): The problem's reservation, extended
+                by the additional tokens the new strategy needs.
+            
+        Returns:
+            dict: Resource allocation for the new strategy.
+        """
+        allocation = self.allocate_for_strategy(complexity_analysis, strategy)
+        if reservation is None:
+            return allocation
+        
+        additional = self._provider_tokens(allocation['token_budget']) - reservation.requested
+        if additional > 0:
+            self.budget_pool.extend(reservation, additional)
+        return self._apply_reservation(allocation, reservation)
+    
+    def release(self, reservation):
+        """
+        Give back the part of a problem's reservation its LLM calls did not spend.
+        
+        Args:
+            reservation (Reservation): Reservation returned by admit, or None.
+        """
+        if reservation is not None:
+            self.budget_pool.release(reservation)
+    
+    def utilization(self):
+        """
+        Get the state of the shared token budget.
+        
+        Returns:
+            dict: Budget pool utilization, or None without a budget pool.
+        """
+        return self.budget_pool.utilization() if self.budget_pool else None
+    
+    def _apply_reservation(self, allocation, reservation, forced=False):
+        """Limit an allocation to the tokens actually reserved for it."""
+        allocation = dict(allocation)
+        reserved_budget = int(reservation.tokens / self.tokens_per_budget_unit)
+        allocation['token_budget'] = min(allocation['token_budget'], reserved_budget)
+        allocation['degraded'] = forced or reservation.degraded
+        return allocation
+    
+    def _provider_tokens(self, token_budget):
+        """Convert a token budget (words of solution steps) to provider tokens."""
+        return int(token_budget * self.tokens_per_budget_unit)
@@ -0,0 +1,287 @@
+"""
+Token budget shared by all in-flight problems.
+
+The pool holds a fixed number of provider tokens per window (an hour by
+default). Each problem reserves its token budget before it is solved, every
+LLM response is charged to the reservation with the tokens the provider
+reports (prompt plus completion), and the problem gives back what it did
+not use when it completes. Under pressure, reservations are scaled down, so
+that spending stays inside the window's budget instead of running into the
+provider's quota.
+
+The counters live in shared memory, so server workers forked after the pool
+is created all draw from the same budget. The reservation of the problem
+being solved is made current with reservation_scope(), so the LLM calls deep
+inside the strategies are charged to it without threading it through.
+"""
+
+import contextlib
+import contextvars
+import logging
+import multiprocessing
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Indices of the shared counters
+_WINDOW_START, _SPENT, _RESERVED, _IN_FLIGHT, _GRANTED, _DEGRADED = range(6)
+
+# Reservation of the problem solved in this thread or task (None: no budget pool)
+_current_reservation = contextvars.ContextVar('reservation', default=None)
+
+
+class Reservation:
+    """
+    Provider tokens reserved from a TokenBudgetPool for one problem.
+    """
+
+    def __init__(self, pool, requested, tokens, degraded):
+        """
+        Initialize the reservation.
+
+        Args:
+            pool (TokenBudgetPool): Pool the tokens are reserved from.
+            requested (int): Tokens asked for.
+            tokens (int): Tokens granted.
+            degraded (bool): True if fewer tokens were granted than asked for.
+        """
+        self.pool = pool
+        self.requested = requested
+        self.tokens = tokens
+        self.degraded = degraded
+        self.spent = 0
+        self.released = False
+
+    @property
+    def remaining(self):
+        """Granted tokens not spent yet."""
+        return max(0, self.tokens - self.spent)
+
+    def charge(self, tokens):
+        """
+        Charge tokens spent on an LLM request to the reservation.
+
+        Args:
+            tokens (int): Provider tokens the request used (prompt plus completion).
+        """
+        self.pool.charge(self, tokens)
+
+
+class TokenBudgetPool:
+    """
+    Per-window token budget with reservations for in-flight problems.
+    """
+
+    def __init__(self, capacity=None, window=None, pressure_threshold=None, degraded_share=None):
+        """
+        Initialize the pool.
+
+        Args:
+            capacity (int, optional): Tokens that may be spent per window (default: from config).
+            window (float, optional): Window length in seconds (default: from config).
+            pressure_threshold (float, optional): Utilization from which reservations
+                are degraded (default: from config).
+            degraded_share (float, optional): Share of the requested tokens granted
+                under pressure (default: from config).
+        """
+        settings = config.BUDGET_POOL
+        self.capacity = capacity if capacity is not None else settings['TOKENS_PER_WINDOW']
+        self.window = window if window is not None else settings['WINDOW']
+        self.pressure_threshold = (
+            pressure_threshold if pressure_threshold is not None else settings['PRESSURE_THRESHOLD']
+        )
+        self.degraded_share = (
+            degraded_share if degraded_share is not None else settings['DEGRADED_TOKEN_SHARE']
+        )
+
+        self._state = multiprocessing.Array('d', 6)
+        self._state[_WINDOW_START] = time.time()
+
+    def pressure(self):
+        """
+        Get the share of the window's budget that is spent or reserved.
+
+        Returns:
+            float: Utilization, 1.0 (or more) when the budget is used up.
+        """
+        with self._state.get_lock():
+            self._roll_window()
+            return self._pressure()
+
+    def under_pressure(self):
+        """Check whether reservations are currently degraded."""
+        return self.pressure() >= self.pressure_threshold
+
+    def reserve(self, tokens):
+        """
+        Reserve tokens for a problem.
+
+        Args:
+            tokens (int): Tokens the problem's allocation asks for.
+
+        Returns:
+            Reservation: The granted tokens; fewer than asked for under pressure,
+                and none once the window's budget is used up.
+        """
+        with self._state.get_lock():
+            self._roll_window()
+            granted = self._grant(tokens)
+            self._state[_IN_FLIGHT] += 1
+        return Reservation(self, tokens, granted, granted < tokens)
+
+    def extend(self, reservation, tokens):
+        """
+        Reserve more tokens for a problem that escalated to a costlier strategy.
+
+        Args:
+            reservation (Reservation): The problem's reservation.
+            tokens (int): Additional tokens asked for.
+
+        Returns:
+            int: Additional tokens granted (also added to the reservation).
+        """
+        with self._state.get_lock():
+            self._roll_window()
+            granted = self._grant(tokens)
+        reservation.requested += tokens
+        reservation.tokens += granted
+        reservation.degraded = reservation.degraded or granted < tokens
+        return granted
+
+    def charge(self, reservation, tokens):
+        """
+        Charge the tokens of an LLM request to a problem's reservation.
+
+        The tokens are spent in full, even beyond the reservation: they are
+        what the provider counts against its quota.
+
+        Args:
+            reservation (Reservation): The problem's reservation.
+            tokens (int): Provider tokens the request used (prompt plus completion).
+        """
+        with self._state.get_lock():
+            self._roll_window()
+            held = min(tokens, reservation.remaining)
+            self._state[_RESERVED] = max(0.0, self._state[_RESERVED] - held)
+            self._state[_SPENT] += tokens
+            reservation.spent += tokens
+
+    def release(self, reservation):
+        """
+        Return the part of a problem's reservation it did not spend.
+
+        Args:
+            reservation (Reservation): The problem's reservation.
+        """
+        if reservation.released:
+            return
+        reservation.released = True
+        with self._state.get_lock():
+            self._roll_window()
+            self._state[_RESERVED] = max(0.0, self._state[_RESERVED] - reservation.remaining)
+            self._state[_IN_FLIGHT] -= 1
+
+    def utilization(self):
+        """
+        Get the state of the current window.
+
+        Returns:
+            dict: Capacity, spent, reserved and available tokens, utilization,
+                problems in flight, and reservations granted and degraded.
+        """
+        with self._state.get_lock():
+            self._roll_window()
+            state = list(self._state)
+            pressure = self._pressure()
+        return {
+            'capacity': self.capacity,
+            'spent': int(state[_SPENT]),
+            'reserved': int(state[_RESERVED]),
+            'available': max(0, int(self.capacity - state[_SPENT] - state[_RESERVED])),
+            'utilization': round(pressure, 4),
+            'under_pressure': pressure >= self.pressure_threshold,
+            'in_flight': int(state[_IN_FLIGHT]),
+            'granted': int(state[_GRANTED]),
+            'degraded': int(state[_DEGRADED]),
+            'window_resets_in': round(max(0.0, state[_WINDOW_START] + self.window - time.time()), 1),
+        }
+
+    def _roll_window(self):
+        """Start a new window once the current one is over (call with the lock held)."""
+        now = time.time()
+        if now - self._state[_WINDOW_START] >= self.window:
+            # Reservations of problems still in flight carry over
+            self._state[_WINDOW_START] = now
+            self._state[_SPENT] = 0.0
+            self._state[_GRANTED] = 0.0
+            self._state[_DEGRADED] = 0.0
+
+    def _pressure(self):
+        """Utilization of the current window (call with the lock held)."""
+        return (self._state[_SPENT] + self._state[_RESERVED]) / self.capacity
+
+    def _grant(self, tokens):
+        """Decide how many of the requested tokens to grant (call with the lock held)."""
+        available = max(0.0, self.capacity - self._state[_SPENT] - self._state[_RESERVED])
+        wanted = tokens
+        if self._pressure() >= self.pressure_threshold:
+            wanted = int(tokens * self.degraded_share)
+        granted = int(min(wanted, available))
+
+        self._state[_RESERVED] += granted
+        self._state[_GRANTED] += 1
+        if granted < tokens:
+            self._state[_DEGRADED] += 1
+            logger.debug(f"Token reservation degraded: {granted} of {tokens} tokens granted")
+        return granted
+
+
+def current_reservation():
+    """
+    Get the reservation of the problem solved in this thread or task.
+
+    Returns:
+        Reservation: The current reservation, or None.
+    """
+    return _current_reservation.get()
+
+
+@contextlib.contextmanager
+def reservation_scope(reservation):
+    """
+    Make a reservation the current reservation within a block.
+
+    Args:
+        reservation (Reservation): The problem's reservation, or None.
+
+    Yields:
+        Reservation: The reservation.
+    """
+    token = _current_reservation.set(reservation)
+    try:
+        yield reservation
+    finally:
+        _current_reservation.reset(token)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_budget_pool():
+    """
+    Get the process-wide budget pool configured in config.BUDGET_POOL.
+
+    Returns:
+        TokenBudgetPool: The shared pool, or None if the pool is disabled.
+    """
+    global _default_pool
+    if not config.BUDGET_POOL['ENABLED']:
+        return None
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = TokenBudgetPool()
+        return _default_pool
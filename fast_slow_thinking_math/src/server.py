@@ -0,0 +1,454 @@
+"""
+Pre-forked HTTP/JSON server for the Fast-Slow Thinking Math system.
+
+The parent process builds the application once, warms it up, opens the
+listening socket and forks worker processes that share the warmed state
+copy-on-write. Every worker accepts connections on the shared socket and
+solves up to WORKER_THREADS requests at a time; up to QUEUE_SIZE further
+requests wait for a free thread, and any beyond that are answered with
+503 and a Retry-After header instead of piling up.
+
+Endpoints:
+    GET  /health       -> {"status": "ok", "pid": ..., "in_flight": ..., ...}
+    POST /solve        {"problem": "...", "time_limit": 2.0, "accuracy_target": 0.9} -> {"solution": {...}}
+                       (time_limit in seconds and accuracy_target are optional)
+    POST /solve_batch  {"problems": ["...", ...]} -> {"solutions": [{...}, ...]}
+"""
+
+import http.server
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Seconds a rejected client gets to send its request before the 503 is sent
+REJECT_TIMEOUT = 1.0
+
+# Workers that exit sooner than this after starting are restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+class SolveRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Handler for the /health, /solve and /solve_batch endpoints.
+    """
+
+    server_version = "FastSlowThinkingMath/1.0"
+
+    # Set on the handler that answers requests while the worker is full
+    busy = False
+
+    def __init__(self, request, client_address, server, received_at=None):
+        """
+        Handle a request.
+
+        Args:
+            request (socket.socket): The accepted connection.
+            client_address (tuple): Address of the client.
+            server (WorkerServer): The server that accepted the connection.
+            received_at (float, optional): time.monotonic() when the connection was
+                accepted (default: now); request deadlines count from it.
+        """
+        self.received_at = received_at if received_at is not None else time.monotonic()
+        super().__init__(request, client_address, server)
+
+    def do_GET(self):
+        """Handle GET requests."""
+        if self.busy:
+            self._send_busy()
+        elif self.path == "/health":
+            self._send_json(200, self.server.health())
+        else:
+            self._send_error(404, f"Unknown endpoint: {self.path}")
+
+    def do_POST(self):
+        """Handle POST requests."""
+        body = self._read_body()
+        if body is None:
+            return
+        if self.busy:
+            self._send_busy()
+            return
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._send_error(400, "Request body is not valid JSON")
+            return
+
+        if self.path == "/solve":
+            self._solve(payload)
+        elif self.path == "/solve_batch":
+            self._solve_batch(payload)
+        else:
+            self._send_error(404, f"Unknown endpoint: {self.path}")
+
+    def log_message(self, format, *args):
+        """Log requests through the logging module instead of stderr."""
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _solve(self, payload):
+        """Solve a single problem."""
+        problem = payload.get("problem") if isinstance(payload, dict) else None
+        if not isinstance(problem, str) or not problem.strip():
+            self._send_error(400, 'Expected {"problem": "<problem text>"}')
+            return
+        options = self._solve_options(payload)
+        if options is None:
+            self._send_error(400, 'Expected a positive number for "time_limit" and "accuracy_target"')
+            return
+
+        try:
+            solution = self.server.app.solve_problem(problem, **options)
+        except Exception as e:
+            logger.exception("Error solving problem: %s", problem)
+            self._send_error(500, f"Error solving problem: {str(e)}")
+            return
+
+        self._send_json(200, {"solution": solution})
+
+    def _solve_options(self, payload):
+        """
+        Get the optional deadline and accuracy target of a /solve request.
+
+        Returns:
+            dict: Keyword arguments for solve_problem, or None if a value is invalid.
+        """
+        options = {}
+        for field in ("time_limit", "accuracy_target"):
+            value = payload.get(field)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                return None
+            options[field] = value
+        if "time_limit" in options:
+            # The deadline counts from the request's arrival, not from when a thread picks it up
+            options["deadline"] = self.received_at + options.pop("time_limit")
+        return options
+
+    def _solve_batch(self, payload):
+        """Solve a list of problems in order; a failing problem does not fail the batch."""
+        problems = payload.get("problems") if isinstance(payload, dict) else None
+        if not isinstance(problems, list) or not all(
+            isinstance(problem, str) and problem.strip() for problem in problems
+        ):
+            self._send_error(400, 'Expected {"problems": ["<problem text>", ...]}')
+            return
+        if len(problems) > self.server.max_batch_size:
+            self._send_error(
+                413, f"Batch of {len(problems)} problems exceeds the limit of {self.server.max_batch_size}"
+            )
+            return
+
+        solutions = []
+        for problem in problems:
+            try:
+                solutions.append(self.server.app.solve_problem(problem))
+            except Exception as e:
+                logger.exception("Error solving problem: %s", problem)
+                solutions.append({"error": f"Error solving problem: {str(e)}"})
+
+        self._send_json(200, {"solutions": solutions})
+
+    def _read_body(self):
+        """
+        Read the request body.
+
+        Returns:
+            bytes: The body, or None if an error response was sent instead.
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_error(400, "Invalid Content-Length header")
+            return None
+        if length < 0:
+            self._send_error(400, "Invalid Content-Length header")
+            return None
+        if length > self.server.max_body_bytes:
+            self._send_error(413, f"Request body exceeds {self.server.max_body_bytes} bytes")
+            return None
+        return self.rfile.read(length)
+
+    def _send_busy(self):
+        """Tell the client that the worker is full and when to retry."""
+        self._send_json(
+            503,
+            {"error": "Server is busy, retry later"},
+            headers={"Retry-After": str(self.server.retry_after)},
+        )
+
+    def _send_error(self, status, message):
+        """Send a JSON error response."""
+        self._send_json(status, {"error": message})
+
+    def _send_json(self, status, payload, headers=None):
+        """Send a JSON response (sympy objects and other values are stringified)."""
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class BusyRequestHandler(SolveRequestHandler):
+    """
+    Handler that answers every request with 503 while the worker is full.
+    """
+
+    busy = True
+
+
+class WorkerServer(http.server.HTTPServer):
+    """
+    HTTP server run by one worker process.
+
+    Accepted connections are handed to a fixed pool of solver threads. Up to
+    queue_size connections wait for a free thread; further connections are
+    rejected with 503 rather than queued without bound.
+    """
+
+    def __init__(
+        self,
+        app,
+        server_address=None,
+        listen_socket=None,
+        worker_threads=None,
+        queue_size=None,
+    ):
+        """
+        Initialize the worker server.
+
+        Args:
+            app: Object with a solve_problem(problem_text) method (e.g. FastSlowThinkingMath)
+            server_address (tuple, optional): (host, port) to bind when no listen_socket is given
+            listen_socket (socket.socket, optional): Already listening socket shared with other workers
+            worker_threads (int, optional): Requests solved concurrently (default: from config)
+            queue_size (int, optional): Requests waiting for a solver thread (default: from config)
+        """
+        settings = config.SERVER
+        self.app = app
+        self.worker_threads = worker_threads if worker_threads is not None else settings["WORKER_THREADS"]
+        self.queue_size = queue_size if queue_size is not None else settings["QUEUE_SIZE"]
+        self.retry_after = settings["RETRY_AFTER"]
+        self.max_batch_size = settings["MAX_BATCH_SIZE"]
+        self.max_body_bytes = settings["MAX_BODY_BYTES"]
+
+        # One slot per running or queued request
+        self._slots = threading.BoundedSemaphore(self.worker_threads + self.queue_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.worker_threads, thread_name_prefix="solver"
+        )
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._served = 0
+        self._rejected = 0
+
+        if listen_socket is None:
+            if server_address is None:
+                server_address = (settings["HOST"], settings["PORT"])
+            super().__init__(server_address, SolveRequestHandler)
+        else:
+            super().__init__(
+                listen_socket.getsockname()[:2], SolveRequestHandler, bind_and_activate=False
+            )
+            self.socket.close()
+            self.socket = listen_socket
+            self.server_address = listen_socket.getsockname()[:2]
+
+    def get_request(self):
+        """Accept a connection (the shared listening socket is non-blocking)."""
+        request, client_address = self.socket.accept()
+        request.setblocking(True)
+        return request, client_address
+
+    def process_request(self, request, client_address):
+        """Run the request on a solver thread, or reject it if the worker is full."""
+        if not self._slots.acquire(blocking=False):
+            self._reject(request, client_address)
+            return
+
+        with self._stats_lock:
+            self._in_flight += 1
+        self._executor.submit(self._process_in_slot, request, client_address, time.monotonic())
+
+    def health(self):
+        """
+        Get the state of this worker.
+
+        Returns:
+            dict: Status, process id, requests in flight (running or queued),
+                requests served and requests rejected, and the shared token
+                budget's utilization if the app has a budget pool.
+        """
+        with self._stats_lock:
+            state = {
+                "status": "ok",
+                "pid": os.getpid(),
+                "in_flight": self._in_flight,
+                "served": self._served,
+                "rejected": self._rejected,
+                "worker_threads": self.worker_threads,
+                "queue_size": self.queue_size,
+            }
+
+        budget_utilization = getattr(self.app, "budget_utilization", None)
+        if budget_utilization is not None:
+            utilization = budget_utilization()
+            if utilization is not None:
+                state["token_budget"] = utilization
+        return state
+
+    def server_close(self):
+        """Finish the accepted requests, then close the socket."""
+        self._executor.shutdown(wait=True)
+        super().server_close()
+
+    def _process_in_slot(self, request, client_address, received_at):
+        """Handle a request on a solver thread and free its slot."""
+        try:
+            self.RequestHandlerClass(request, client_address, self, received_at)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._stats_lock:
+                self._in_flight -= 1
+                self._served += 1
+            self._slots.release()
+
+    def _reject(self, request, client_address):
+        """Answer 503 on the accepting thread, giving the client little time to send."""
+        with self._stats_lock:
+            self._rejected += 1
+        try:
+            request.settimeout(REJECT_TIMEOUT)
+            BusyRequestHandler(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def serve(app, host=None, port=None, workers=None):
+    """
+    Serve the application until SIGINT or SIGTERM.
+
+    The application is warmed up (app.warm_up(), if present) before the
+    workers are forked, so they share the loaded modules and caches. Workers
+    that die are restarted. Where os.fork is unavailable, or with a single
+    worker, the server runs in this process.
+
+    Args:
+        app: Object with a solve_problem(problem_text) method (e.g. FastSlowThinkingMath)
+        host (str, optional): Address to listen on (default: from config)
+        port (int, optional): Port to listen on, 0 for any free port (default: from config)
+        workers (int, optional): Number of worker processes (default: from config)
+    """
+    settings = config.SERVER
+    host = host if host is not None else settings["HOST"]
+    port = port if port is not None else settings["PORT"]
+    workers = workers if workers is not None else settings["WORKERS"]
+
+    warm_up = getattr(app, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+
+    listen_socket = socket.create_server((host, port))
+    # Idle workers all wait on the socket; the ones that lose the race for a
+    # connection get EAGAIN instead of blocking in accept()
+    listen_socket.setblocking(False)
+    host, port = listen_socket.getsockname()[:2]
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        logger.info(f"Serving on http://{host}:{port} in a single process")
+        _run_worker(app, listen_socket)
+        return
+
+    logger.info(f"Serving on http://{host}:{port} with {workers} worker processes")
+    _supervise(app, listen_socket, workers)
+
+
+def _run_worker(app, listen_socket):
+    """Serve requests on the shared socket until SIGINT or SIGTERM."""
+    server = WorkerServer(app, listen_socket=listen_socket)
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+
+
+def _exit_on_signal(signum, frame):
+    """Signal handler that stops serve_forever(); repeated signals do not interrupt the shutdown."""
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise SystemExit(0)
+
+
+def _supervise(app, listen_socket, workers):
+    """Fork the workers, restart those that die and stop them on SIGINT or SIGTERM."""
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                _run_worker(app, listen_socket)
+            except BaseException:
+                logger.exception("Worker crashed")
+                status = 1
+            finally:
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+
+        logger.warning(
+            f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting"
+        )
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        if not stopping:
+            spawn()
+
+    listen_socket.close()
+    logger.info("Server stopped")
@@ -0,0 +1,225 @@
+"""
+Routing thresholds that adapt to the Reasoning Monitor's feedback.
+
+Each mathematical domain gets its own SIMPLE/MEDIUM thresholds, starting
+from the configured ones. When the monitor finds that a problem would have
+been solved by a cheaper strategy, the threshold below its score is raised
+towards it; when the selected strategy was too weak (it escalated, or the
+monitor recommends a more thorough one), the threshold above is lowered.
+Over time, each domain routes its problems to the cheapest strategy that
+solves them.
+
+The thresholds are saved to a JSON file and loaded again on restart. Each
+server worker adapts its own copy; the file holds the last one saved.
+"""
+
+import json
+import logging
+import os
+import threading
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Strategies from the cheapest to the most thorough
+STRATEGY_ORDER = {'FAST': 0, 'FAST_THEN_SLOW': 1, 'SLOW': 2}
+
+# Complexity levels separated by the thresholds, from the lowest scores up
+_LEVELS = ('Simple', 'Medium', 'Complex')
+
+
+class AdaptiveThresholds:
+    """
+    Per-domain routing thresholds updated from monitoring feedback.
+    """
+
+    def __init__(self, state_file=None, learning_rate=None, margin=None, save_interval=None):
+        """
+        Initialize the thresholds, loading the saved state if there is one.
+
+        Args:
+            state_file (str, optional): JSON file the thresholds are persisted to
+                (default: from config; None keeps them in memory only).
+            learning_rate (float, optional): Share of the distance to a problem's
+                score a threshold moves per update (default: from config).
+            margin (float, optional): How far past a problem's score a threshold
+                is moved (default: from config).
+            save_interval (int, optional): Updates between saves (default: from config).
+        """
+        settings = config.ADAPTIVE_ROUTING
+        if state_file is None and settings['STATE_FILE']:
+            # A relative configured path lives next to config.py, not in the working directory
+            state_file = os.path.join(os.path.dirname(os.path.abspath(config.__file__)), settings['STATE_FILE'])
+        self.state_file = state_file
+        self.learning_rate = learning_rate if learning_rate is not None else settings['LEARNING_RATE']
+        self.margin = margin if margin is not None else settings['MARGIN']
+        self.save_interval = save_interval if save_interval is not None else settings['SAVE_INTERVAL']
+        self.defaults = [
+            config.COMPLEXITY_ANALYZER['SIMPLE_THRESHOLD'],
+            config.COMPLEXITY_ANALYZER['MEDIUM_THRESHOLD'],
+        ]
+        # Level each strategy is routed from
+        self.strategy_levels = {
+            strategy: level for level, strategy in config.SWITCHING_MECHANISM['STRATEGY_MAPPING'].items()
+        }
+
+        self._lock = threading.Lock()
+        self._domains = {}
+        self._unsaved = 0
+        if self.state_file and os.path.exists(self.state_file):
+            self._load()
+
+    def thresholds(self, domain):
+        """
+        Get the routing thresholds of a domain.
+
+        Args:
+            domain (str): Mathematical domain (None for the default thresholds).
+
+        Returns:
+            tuple: (simple_threshold, medium_threshold).
+        """
+        with self._lock:
+            entry = self._domains.get(domain)
+            return tuple(entry['thresholds']) if entry else tuple(self.defaults)
+
+    def classify(self, complexity_score, domain):
+        """
+        Classify a problem's complexity with its domain's thresholds.
+
+        Args:
+            complexity_score (float): Complexity score between 0.0 and 1.0.
+            domain (str): Mathematical domain of the problem.
+
+        Returns:
+            str: Complexity level ('Simple', 'Medium', or 'Complex').
+        """
+        return self._level(self.thresholds(domain), complexity_score)
+
+    def record(self, domain, complexity_score, strategy, escalated, future_adjustment):
+        """
+        Update a domain's thresholds from the outcome of one problem.
+
+        Args:
+            domain (str): Mathematical domain of the problem.
+            complexity_score (float): Complexity score of the problem.
+            strategy (str): Strategy the problem was routed to.
+            escalated (bool): Whether the strategy had to switch to a more thorough one.
+            future_adjustment (dict): The monitor's recommendation for similar problems.
+
+        Returns:
+            bool: True if the thresholds changed.
+        """
+        if strategy not in STRATEGY_ORDER or strategy not in self.strategy_levels:
+            return False
+        recommended = STRATEGY_ORDER.get(future_adjustment.get('recommendation'), STRATEGY_ORDER[strategy])
+        if escalated or (future_adjustment.get('adjust') and recommended > STRATEGY_ORDER[strategy]):
+            direction = -1
+        elif future_adjustment.get('adjust') and recommended < STRATEGY_ORDER[strategy]:
+            direction = 1
+        else:
+            return False
+
+        with self._lock:
+            entry = self._domains.setdefault(domain, {'thresholds': list(self.defaults), 'updates': 0})
+            changed = self._move(entry['thresholds'], complexity_score, direction, self.strategy_levels[strategy])
+            if changed:
+                entry['updates'] += 1
+                self._unsaved += 1
+            save = self._unsaved >= self.save_interval
+        if save:
+            self.save()
+        return changed
+
+    def save(self):
+        """Write the thresholds to the state file (atomically, so a crash keeps the old state)."""
+        if not self.state_file:
+            return
+        with self._lock:
+            state = {'domains': json.loads(json.dumps(self._domains))}
+            self._unsaved = 0
+
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_file = f"{self.state_file}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_file, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(temporary_file, self.state_file)
+        except OSError as e:
+            logger.error(f"Error saving routing thresholds to {self.state_file}: {str(e)}")
+
+    def state(self):
+        """
+        Get the current thresholds.
+
+        Returns:
+            dict: Domain -> {'simple', 'medium', 'updates'}.
+        """
+        with self._lock:
+            return {
+                domain: {
+                    'simple': round(entry['thresholds'][0], 4),
+                    'medium': round(entry['thresholds'][1], 4),
+                    'updates': entry['updates'],
+                }
+                for domain, entry in self._domains.items()
+            }
+
+    def _move(self, thresholds, complexity_score, direction, routed_level):
+        """
+        Move the threshold next to a score so the score changes level (call with the lock held).
+
+        Args:
+            thresholds (list): [simple_threshold, medium_threshold], updated in place.
+            complexity_score (float): Complexity score of the problem.
+            direction (int): 1 to route the score to a cheaper level, -1 to a costlier one.
+            routed_level (str): Level the problem was routed from.
+
+        Returns:
+            bool: True if a threshold moved.
+        """
+        if self._level(thresholds, complexity_score) != routed_level:
+            # Earlier feedback already moved the score to another level
+            return False
+        level = _LEVELS.index(routed_level)
+        # Raising the threshold below the score's level, or lowering the one above it
+        index = level - 1 if direction > 0 else level
+        if not 0 <= index < len(thresholds):
+            return False
+
+        target = complexity_score + self.margin if direction > 0 else complexity_score - self.margin
+        value = thresholds[index] + self.learning_rate * (target - thresholds[index])
+
+        # Thresholds stay ordered and within the score range
+        lower = thresholds[index - 1] if index > 0 else 0.0
+        upper = thresholds[index + 1] if index + 1 < len(thresholds) else 1.0
+        value = min(upper, max(lower, value))
+        if value == thresholds[index]:
+            return False
+        thresholds[index] = value
+        return True
+
+    @staticmethod
+    def _level(thresholds, complexity_score):
+        """Classify a score with the given thresholds."""
+        if complexity_score <= thresholds[0]:
+            return 'Simple'
+        elif complexity_score <= thresholds[1]:
+            return 'Medium'
+        return 'Complex'
+
+    def _load(self):
+        """Load the thresholds saved by an earlier run."""
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            self._domains = {
+                domain: {'thresholds': [float(value) for value in entry['thresholds']], 'updates': int(entry['updates'])}
+                for domain, entry in state['domains'].items()
+            }
+            logger.info(f"Loaded routing thresholds for {len(self._domains)} domains from {self.state_file}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Ignoring unreadable routing thresholds in {self.state_file}: {str(e)}")
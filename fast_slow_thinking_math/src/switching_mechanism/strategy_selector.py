@@ -0,0 +1,167 @@
+"""
+Strategy selection by expected cost under a deadline or accuracy target.
+
+For each complexity level, the selector keeps a rolling window of recent
+solves per initial strategy: how long they took, how many tokens they used
+and whether they succeeded (escalations included, so FAST is charged for
+the Slow Thinking it falls back to). Blended with configured priors, these
+give each strategy's expected latency, token cost and success probability.
+
+A problem gets the strategy with the lowest expected cost per success among
+those expected to finish before its deadline and to reach its accuracy
+target. With no history, the priors reproduce STRATEGY_MAPPING.
+
+Only the selected strategy is observed, so a small share of problems explore:
+they get the least observed strategy that can meet their deadline, whatever
+its expected accuracy. Otherwise a strategy that is never selected would keep
+its priors forever.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+import config
+
+STRATEGIES = ('FAST', 'FAST_THEN_SLOW', 'SLOW')
+
+
+class ExpectedCostSelector:
+    """
+    Picks the cheapest strategy expected to meet a deadline and accuracy target.
+    """
+
+    def __init__(self, window=None, prior_weight=None, accuracy_target=None, latency_token_cost=None,
+                 exploration_rate=None, seed=None):
+        """
+        Initialize the selector.
+
+        Args:
+            window (int, optional): Recent solves kept per complexity level and
+                strategy (default: from config).
+            prior_weight (float, optional): Number of solves the priors count as
+                (default: from config).
+            accuracy_target (float, optional): Success probability required when
+                the caller sets none (default: from config; None for no target).
+            latency_token_cost (float, optional): Tokens one second of latency is
+                worth in the cost (default: from config).
+            exploration_rate (float, optional): Share of selections that explore
+                (default: from config).
+            seed (int, optional): Seed of the exploration's random choices.
+        """
+        settings = config.STRATEGY_SELECTOR
+        self.window = window if window is not None else settings['WINDOW']
+        self.prior_weight = prior_weight if prior_weight is not None else settings['PRIOR_WEIGHT']
+        self.accuracy_target = accuracy_target if accuracy_target is not None else settings['ACCURACY_TARGET']
+        self.latency_token_cost = (
+            latency_token_cost if latency_token_cost is not None else settings['LATENCY_TOKEN_COST']
+        )
+        self.exploration_rate = (
+            exploration_rate if exploration_rate is not None else settings['EXPLORATION_RATE']
+        )
+        self.prior_latency = settings['PRIOR_LATENCY']
+        self.prior_tokens = settings['PRIOR_TOKENS']
+        self.prior_success = settings['PRIOR_SUCCESS']
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # (complexity_level, strategy) -> deque of (latency, tokens, success)
+        self._history = {}
+
+    def select(self, complexity_level, deadline=None, accuracy_target=None):
+        """
+        Select the initial strategy for a problem.
+
+        The deadline is a hard constraint: strategies expected to miss it are
+        dropped (the fastest one is kept if all would). The accuracy target is
+        then met if possible, otherwise the likeliest strategy to succeed wins.
+        Exploring selections skip the accuracy target and take the least
+        observed strategy instead.
+
+        Args:
+            complexity_level (str): Complexity level of the problem.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            accuracy_target (float, optional): Required success probability
+                (default: the selector's accuracy target).
+
+        Returns:
+            str: Selected strategy ('FAST', 'SLOW', or 'FAST_THEN_SLOW').
+        """
+        estimates = self.estimates(complexity_level)
+        candidates = list(STRATEGIES)
+
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            in_time = [strategy for strategy in candidates if estimates[strategy]['latency'] <= remaining]
+            candidates = in_time or [min(candidates, key=lambda strategy: estimates[strategy]['latency'])]
+
+        if self.exploration_rate and self._explore():
+            return min(
+                candidates, key=lambda strategy: (estimates[strategy]['samples'], estimates[strategy]['cost'])
+            )
+
+        target = accuracy_target if accuracy_target is not None else self.accuracy_target
+        if target is not None:
+            accurate = [strategy for strategy in candidates if estimates[strategy]['success'] >= target]
+            candidates = accurate or [max(candidates, key=lambda strategy: estimates[strategy]['success'])]
+
+        return min(candidates, key=lambda strategy: estimates[strategy]['cost'])
+
+    def estimates(self, complexity_level):
+        """
+        Get the expected latency, tokens, success probability and cost of each strategy.
+
+        Args:
+            complexity_level (str): Complexity level of the problem.
+
+        Returns:
+            dict: Strategy -> {'latency', 'tokens', 'success', 'cost', 'samples'}; the cost
+                is the expected tokens (latency included) per successful solve.
+        """
+        with self._lock:
+            history = {
+                strategy: list(self._history.get((complexity_level, strategy), ()))
+                for strategy in STRATEGIES
+            }
+
+        prior_success = self.prior_success.get(complexity_level, self.prior_success['Medium'])
+        estimates = {}
+        for strategy, outcomes in history.items():
+            weight = self.prior_weight + len(outcomes)
+            latency = (self.prior_latency[strategy] * self.prior_weight + sum(o[0] for o in outcomes)) / weight
+            tokens = (self.prior_tokens[strategy] * self.prior_weight + sum(o[1] for o in outcomes)) / weight
+            success = (prior_success[strategy] * self.prior_weight + sum(o[2] for o in outcomes)) / weight
+            estimates[strategy] = {
+                'latency': latency,
+                'tokens': tokens,
+                'success': success,
+                'cost': (tokens + self.latency_token_cost * latency) / max(success, 1e-6),
+                'samples': len(outcomes),
+            }
+        return estimates
+
+    def observe(self, complexity_level, strategy, latency, tokens_used, success):
+        """
+        Record the outcome of a solve.
+
+        Args:
+            complexity_level (str): Complexity level the strategy was selected for.
+            strategy (str): Initial strategy of the solve.
+            latency (float): Seconds the solve took, escalations included.
+            tokens_used (int): Tokens the solve used, escalations included.
+            success (bool): Whether the solve succeeded (its answer was verified
+                correct, or else it was confident).
+        """
+        if strategy not in STRATEGIES:
+            return
+        with self._lock:
+            history = self._history.get((complexity_level, strategy))
+            if history is None:
+                history = self._history[(complexity_level, strategy)] = deque(maxlen=self.window)
+            history.append((latency, tokens_used, 1.0 if success else 0.0))
+
+    def _explore(self):
+        """Decide whether a selection explores."""
+        with self._lock:
+            return self._random.random() < self.exploration_rate
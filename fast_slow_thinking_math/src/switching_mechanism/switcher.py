@@ -2,8 +2,12 @@
 Implementation of the Switching Mechanism for the Fast-Slow Thinking system.
 """
 
+import time
+
 import config
 from src.complexity_analyzer.analyzer import ComplexityAnalyzer
+from src.deadlines import has_time_for
+from src.resource_allocator.budget_pool import reservation_scope
 from src.thinking_strategies.fast_thinking import FastThinking
 from src.thinking_strategies.slow_thinking import SlowThinking
 from src.thinking_strategies.combined import FastThenSlow
@@ -14,7 +18,7 @@ class ThinkingSwitcher:
     problem complexity and monitors the reasoning process.
     """
     
-    def __init__(self, analyzer=None, fast_strategy=None, slow_strategy=None, combined_strategy=None, resource_allocator=None):
+    def __init__(self, analyzer=None, fast_strategy=None, slow_strategy=None, combined_strategy=None, resource_allocator=None, routing_policy=None, strategy_selector=None):
         """
         Initialize the Thinking Switcher with components and configuration settings.
         
@@ -24,6 +28,10 @@ class ThinkingSwitcher:
             slow_strategy (SlowThinking, optional): Slow thinking strategy instance.
             combined_strategy (FastThenSlow, optional): Combined thinking strategy instance.
             resource_allocator (ResourceAllocator, optional): Resource allocator instance.
+            routing_policy (AdaptiveThresholds, optional): Per-domain routing thresholds
+                learned from monitoring feedback (default: the complexity level's mapping).
+            strategy_selector (ExpectedCostSelector, optional): Selects strategies by expected
+                cost under a deadline or accuracy target (default: STRATEGY_MAPPING).
         """
         # Initialize components
         self.analyzer = analyzer if analyzer else ComplexityAnalyzer()
@@ -31,57 +39,206 @@ class ThinkingSwitcher:
         self.slow_strategy = slow_strategy if slow_strategy else SlowThinking()
         self.combined_strategy = combined_strategy if combined_strategy else FastThenSlow(self.fast_strategy, self.slow_strategy)
         self.resource_allocator = resource_allocator
+        self.routing_policy = routing_policy
+        self.strategy_selector = strategy_selector
         
         # Load configuration
         self.strategy_mapping = config.SWITCHING_MECHANISM['STRATEGY_MAPPING']
         self.confidence_threshold = config.SWITCHING_MECHANISM['CONFIDENCE_THRESHOLD']
         self.error_detection_threshold = config.SWITCHING_MECHANISM['ERROR_DETECTION_THRESHOLD']
     
-    def solve(self, problem_text):
+    def solve(self, problem_text, deadline=None, accuracy_target=None, check_answer=None):
         """
         Solve a mathematical problem by selecting the appropriate thinking strategy.
         
         Args:
             problem_text (str): The text of the mathematical problem.
+            deadline (float, optional): time.monotonic() by which the solution is due;
+                every stage of the solve skips or shortens itself when it is near.
+            accuracy_target (float, optional): Required probability that the solve succeeds
+                (only steers the strategy selector, if there is one).
+            check_answer (callable, optional): Tells whether an answer is correct (e.g.
+                against a known answer); the strategy selector then learns from
+                verified correctness instead of the solution's confidence.
             
         Returns:
             dict: A dictionary containing the solution and metadata.
         """
-        # Step 1: Analyze problem complexity
-        complexity_analysis = self.analyzer.analyze(problem_text)
+        start_time = time.monotonic()
         
-        # Step 2: Select initial strategy based on complexity
-        initial_strategy = self._select_initial_strategy(complexity_analysis)
-        
-        # Step 3: Allocate resources if resource allocator is available
-        if self.resource_allocator:
-            resource_allocation = self.resource_allocator.allocate(complexity_analysis)
-        else:
-            resource_allocation = None
+        # Steps 1-3: Analyze complexity, select a strategy and allocate resources
+        complexity_analysis, initial_strategy, resource_allocation, reservation = self._plan(
+            problem_text, deadline, accuracy_target
+        )
         
         # Step 4: Solve the problem with the selected strategy
-        solution = self._solve_with_strategy(problem_text, initial_strategy, complexity_analysis, resource_allocation)
+        try:
+            with reservation_scope(reservation):
+                solution = self._solve_with_strategy(
+                    problem_text, initial_strategy, complexity_analysis, resource_allocation, reservation, deadline
+                )
+        finally:
+            self._release(reservation)
+        self._observe(complexity_analysis, initial_strategy, time.monotonic() - start_time, solution, check_answer)
         
         # Step 5: Add metadata to the solution
         solution['complexity_analysis'] = complexity_analysis
         solution['initial_strategy'] = initial_strategy
+        solution['resource_allocation'] = resource_allocation
+        
+        return solution
+    
+    async def asolve(self, problem_text, deadline=None, accuracy_target=None, check_answer=None):
+        """
+        Solve a mathematical problem by selecting the appropriate thinking strategy,
+        awaiting the strategies' LLM calls.
+        
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            accuracy_target (float, optional): Required probability that the solve succeeds.
+            check_answer (callable, optional): Tells whether an answer is correct.
+            
+        Returns:
+            dict: A dictionary containing the solution and metadata.
+        """
+        start_time = time.monotonic()
+        complexity_analysis, initial_strategy, resource_allocation, reservation = self._plan(
+            problem_text, deadline, accuracy_target
+        )
+        
+        try:
+            with reservation_scope(reservation):
+                solution = await self._asolve_with_strategy(
+                    problem_text, initial_strategy, complexity_analysis, resource_allocation, reservation, deadline
+                )
+        finally:
+            self._release(reservation)
+        self._observe(complexity_analysis, initial_strategy, time.monotonic() - start_time, solution, check_answer)
+        
+        solution['complexity_analysis'] = complexity_analysis
+        solution['initial_strategy'] = initial_strategy
+        solution['resource_allocation'] = resource_allocation
         
         return solution
     
-    def _select_initial_strategy(self, complexity_analysis):
+    def _plan(self, problem_text, deadline=None, accuracy_target=None):
+        """
+        Analyze the problem, select the initial strategy and allocate resources.
+        
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            accuracy_target (float, optional): Required probability that the solve succeeds.
+            
+        Returns:
+            tuple: (complexity_analysis, initial_strategy, resource_allocation, reservation);
+                without a resource allocator the allocation and reservation are None
+                (the strategies then use their configured budgets).
+        """
+        # Step 1: Analyze problem complexity
+        complexity_analysis = self.analyzer.analyze(problem_text)
+        
+        # Step 2: Select initial strategy based on complexity
+        initial_strategy = self._select_initial_strategy(complexity_analysis, deadline, accuracy_target)
+        
+        # Step 3: Allocate resources if resource allocator is available; under
+        # pressure on the shared token budget this may downgrade the strategy
+        if not self.resource_allocator:
+            return complexity_analysis, initial_strategy, None, None
+        initial_strategy, resource_allocation, reservation = self.resource_allocator.admit(
+            complexity_analysis, initial_strategy
+        )
+        
+        return complexity_analysis, initial_strategy, resource_allocation, reservation
+    
+    def _escalate(self, complexity_analysis, strategy, reservation):
+        """
+        Allocate the resources for a switch to a costlier strategy.
+        
+        Args:
+            complexity_analysis (dict): Complexity analysis results.
+            strategy (str): Strategy the problem switches to.
+            reservation (Reservation): The problem's token reservation, or None.
+            
+        Returns:
+            dict: Resource allocation, or None without a resource allocator.
+        """
+        if not self.resource_allocator:
+            return None
+        return self.resource_allocator.escalate(complexity_analysis, strategy, reservation)
+    
+    def _release(self, reservation):
+        """Give back the part of a problem's token reservation its LLM calls did not spend."""
+        if reservation is None:
+            return
+        self.resource_allocator.release(reservation)
+    
+    def _select_initial_strategy(self, complexity_analysis, deadline=None, accuracy_target=None):
         """
         Select the initial thinking strategy based on complexity analysis.
         
         Args:
             complexity_analysis (dict): Complexity analysis results.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            accuracy_target (float, optional): Required probability that the solve succeeds.
             
         Returns:
             str: Selected strategy ('FAST', 'SLOW', or 'FAST_THEN_SLOW').
         """
-        complexity_level = complexity_analysis['complexity_level']
+        complexity_level = self._routing_level(complexity_analysis)
+        if self.strategy_selector is not None:
+            return self.strategy_selector.select(complexity_level, deadline, accuracy_target)
         return self.strategy_mapping.get(complexity_level, 'FAST_THEN_SLOW')
     
-    def _solve_with_strategy(self, problem_text, strategy, complexity_analysis, resource_allocation=None):
+    def _routing_level(self, complexity_analysis):
+        """Get the complexity level a problem is routed by."""
+        if self.routing_policy is not None:
+            # Classify with the thresholds learned for the problem's domain
+            return self.routing_policy.classify(
+                complexity_analysis['complexity_score'], complexity_analysis.get('domain')
+            )
+        return complexity_analysis['complexity_level']
+    
+    def _observe(self, complexity_analysis, initial_strategy, elapsed, solution, check_answer=None):
+        """Record the cost and outcome of a solve for the strategy selector."""
+        if self.strategy_selector is None:
+            return
+        if check_answer is not None:
+            success = solution['answer'] is not None and check_answer(solution['answer'])
+        else:
+            success = solution.get('error') is None and solution['confidence'] >= self.confidence_threshold
+        self.strategy_selector.observe(
+            self._routing_level(complexity_analysis), initial_strategy, elapsed, solution['tokens_used'], success
+        )
+    
+    def record_feedback(self, solution, monitoring_feedback):
+        """
+        Let the routing policy learn from the monitor's feedback on a solution.
+        
+        Args:
+            solution (dict): Solution returned by solve() or asolve().
+            monitoring_feedback (dict): The Reasoning Monitor's feedback on the solution.
+            
+        Returns:
+            bool: True if the routing thresholds changed.
+        """
+        if self.routing_policy is None or solution.get('cache_hit'):
+            return False
+        allocation = solution.get('resource_allocation') or {}
+        if allocation.get('degraded'):
+            # The strategy was forced by the token budget, not chosen by routing
+            return False
+        complexity_analysis = solution['complexity_analysis']
+        return self.routing_policy.record(
+            complexity_analysis.get('domain'),
+            complexity_analysis['complexity_score'],
+            solution['initial_strategy'],
+            'strategy_switch' in solution,
+            monitoring_feedback['future_adjustment'],
+        )
+    
+    def _solve_with_strategy(self, problem_text, strategy, complexity_analysis, resource_allocation=None, reservation=None, deadline=None):
         """
         Solve the problem using the selected strategy.
         
@@ -90,34 +247,66 @@ class ThinkingSwitcher:
             strategy (str): Selected strategy ('FAST', 'SLOW', or 'FAST_THEN_SLOW').
             complexity_analysis (dict): Complexity analysis results.
             resource_allocation (dict, optional): Resource allocation information.
+            reservation (Reservation, optional): The problem's token reservation.
+            deadline (float, optional): time.monotonic() by which the solution is due.
             
         Returns:
             dict: Solution results.
         """
-        # Apply resource allocation if available
-        if resource_allocation:
-            # In a real implementation, we would configure the strategies with the allocated resources
-            pass
-        
-        # Solve with the selected strategy
+        # Solve with the selected strategy, within the allocated resources
         if strategy == 'FAST':
-            solution = self.fast_strategy.solve(problem_text)
+            solution = self.fast_strategy.solve(problem_text, budget=resource_allocation, deadline=deadline)
             
-            # Check if we need to switch to a more complex strategy
-            if self._should_switch_to_more_complex(solution):
-                return self._handle_strategy_switch(problem_text, 'FAST', 'FAST_THEN_SLOW', solution)
+            # Check if we need (and have the time) to switch to a more complex strategy
+            if self._should_switch_to_more_complex(solution) and self._has_time_to_escalate(solution, deadline):
+                return self._handle_strategy_switch(
+                    problem_text, 'FAST', 'FAST_THEN_SLOW', solution,
+                    self._escalate(complexity_analysis, 'FAST_THEN_SLOW', reservation), deadline
+                )
             
             return solution
             
         elif strategy == 'SLOW':
-            return self.slow_strategy.solve(problem_text)
+            return self.slow_strategy.solve(problem_text, budget=resource_allocation, deadline=deadline)
             
         elif strategy == 'FAST_THEN_SLOW':
-            return self.combined_strategy.solve(problem_text)
+            return self.combined_strategy.solve(problem_text, budget=resource_allocation, deadline=deadline)
             
         else:
             # Default to Fast-then-Slow if strategy is not recognized
-            return self.combined_strategy.solve(problem_text)
+            return self.combined_strategy.solve(problem_text, budget=resource_allocation, deadline=deadline)
+    
+    async def _asolve_with_strategy(self, problem_text, strategy, complexity_analysis, resource_allocation=None, reservation=None, deadline=None):
+        """
+        Solve the problem using the selected strategy, awaiting the strategy's LLM calls.
+        
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            strategy (str): Selected strategy ('FAST', 'SLOW', or 'FAST_THEN_SLOW').
+            complexity_analysis (dict): Complexity analysis results.
+            resource_allocation (dict, optional): Resource allocation information.
+            reservation (Reservation, optional): The problem's token reservation.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            
+        Returns:
+            dict: Solution results.
+        """
+        if strategy == 'FAST':
+            solution = await self.fast_strategy.asolve(problem_text, budget=resource_allocation, deadline=deadline)
+            
+            if self._should_switch_to_more_complex(solution) and self._has_time_to_escalate(solution, deadline):
+                return await self._ahandle_strategy_switch(
+                    problem_text, 'FAST', 'FAST_THEN_SLOW', solution,
+                    self._escalate(complexity_analysis, 'FAST_THEN_SLOW', reservation), deadline
+                )
+            
+            return solution
+            
+        elif strategy == 'SLOW':
+            return await self.slow_strategy.asolve(problem_text, budget=resource_allocation, deadline=deadline)
+            
+        else:
+            return await self.combined_strategy.asolve(problem_text, budget=resource_allocation, deadline=deadline)
     
     def _should_switch_to_more_complex(self, solution):
         """
@@ -143,7 +332,24 @@ class ThinkingSwitcher:
         
         return False
     
-    def _handle_strategy_switch(self, problem_text, from_strategy, to_strategy, current_solution):
+    def _has_time_to_escalate(self, solution, deadline):
+        """
+        Check whether the deadline leaves time to switch to a more thorough strategy.
+        
+        Args:
+            solution (dict): Solution results from the current strategy; a refused
+                switch is recorded in its steps.
+            deadline (float): time.monotonic() by which the solution is due, or None.
+            
+        Returns:
+            bool: True if there is time to switch.
+        """
+        if has_time_for(deadline, config.DEADLINES['MIN_SLOW_SECONDS']):
+            return True
+        solution['steps'].append("Not switching to a more thorough strategy: the deadline is too close")
+        return False
+    
+    def _handle_strategy_switch(self, problem_text, from_strategy, to_strategy, current_solution, resource_allocation=None, deadline=None):
         """
         Handle switching from one strategy to another.
         
@@ -152,6 +358,8 @@ class ThinkingSwitcher:
             from_strategy (str): Current strategy.
             to_strategy (str): Target strategy.
             current_solution (dict): Solution results from the current strategy.
+            resource_allocation (dict, optional): Resource allocation for the new strategy.
+            deadline (float, optional): time.monotonic() by which the solution is due.
             
         Returns:
             dict: Solution results from the new strategy.
@@ -159,13 +367,16 @@ class ThinkingSwitcher:
         # Log the switch
         switch_reason = self._determine_switch_reason(current_solution)
         
-        # Solve with the new strategy
+        # Solve with the new strategy, reusing the Fast Thinking result
         if to_strategy == 'FAST_THEN_SLOW':
-            new_solution = self.combined_strategy.solve(problem_text)
+            fast_result = current_solution if from_strategy == 'FAST' else None
+            new_solution = self.combined_strategy.solve(
+                problem_text, fast_result=fast_result, budget=resource_allocation, deadline=deadline
+            )
         elif to_strategy == 'SLOW':
-            new_solution = self.slow_strategy.solve(problem_text)
+            new_solution = self.slow_strategy.solve(problem_text, budget=resource_allocation, deadline=deadline)
         else:
-            new_solution = self.fast_strategy.solve(problem_text)
+            new_solution = self.fast_strategy.solve(problem_text, budget=resource_allocation, deadline=deadline)
         
         # Add switch information to the solution
         new_solution['strategy_switch'] = {
@@ -177,6 +388,42 @@ class ThinkingSwitcher:
         
         return new_solution
     
+    async def _ahandle_strategy_switch(self, problem_text, from_strategy, to_strategy, current_solution, resource_allocation=None, deadline=None):
+        """
+        Handle switching from one strategy to another, awaiting the new strategy.
+        
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            from_strategy (str): Current strategy.
+            to_strategy (str): Target strategy.
+            current_solution (dict): Solution results from the current strategy.
+            resource_allocation (dict, optional): Resource allocation for the new strategy.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            
+        Returns:
+            dict: Solution results from the new strategy.
+        """
+        switch_reason = self._determine_switch_reason(current_solution)
+        
+        if to_strategy == 'FAST_THEN_SLOW':
+            fast_result = current_solution if from_strategy == 'FAST' else None
+            new_solution = await self.combined_strategy.asolve(
+                problem_text, fast_result=fast_result, budget=resource_allocation, deadline=deadline
+            )
+        elif to_strategy == 'SLOW':
+            new_solution = await self.slow_strategy.asolve(problem_text, budget=resource_allocation, deadline=deadline)
+        else:
+            new_solution = await self.fast_strategy.asolve(problem_text, budget=resource_allocation, deadline=deadline)
+        
+        new_solution['strategy_switch'] = {
+            'from_strategy': from_strategy,
+            'to_strategy': to_strategy,
+            'reason': switch_reason,
+            'original_solution': current_solution
+        }
+        
+        return new_solution
+    
     def _determine_switch_reason(self, solution):
         """
         Determine the reason for switching strategies.
@@ -2,7 +2,11 @@
 Implementation of Fast-then-Slow Thinking strategy for mathematical problems.
 """
 
+import asyncio
+import time
 import config
+from ..async_utils import run_sync
+from ..deadlines import has_time_for, time_left
 from .fast_thinking import FastThinking
 from .slow_thinking import SlowThinking
 
@@ -12,60 +16,293 @@ class FastThenSlow:
     Slow Thinking if needed based on confidence and complexity.
     """
     
-    def __init__(self, fast_thinking=None, slow_thinking=None):
+    def __init__(self, fast_thinking=None, slow_thinking=None, speculative=None):
         """
         Initialize the Fast-then-Slow Thinking strategy with configuration settings.
         
         Args:
             fast_thinking (FastThinking, optional): Fast Thinking strategy instance.
             slow_thinking (SlowThinking, optional): Slow Thinking strategy instance.
+            speculative (bool, optional): Start Slow Thinking together with Fast Thinking
+                (default: from config).
         """
         self.confidence_threshold = config.THINKING_STRATEGIES['FAST_THEN_SLOW']['confidence_threshold']
         self.max_fast_steps = config.THINKING_STRATEGIES['FAST_THEN_SLOW']['max_fast_steps']
+        self.speculative = (
+            speculative if speculative is not None
+            else config.THINKING_STRATEGIES['FAST_THEN_SLOW']['speculative']
+        )
         
         # Initialize thinking strategies
         self.fast_thinking = fast_thinking if fast_thinking else FastThinking()
         self.slow_thinking = slow_thinking if slow_thinking else SlowThinking()
     
-    def solve(self, problem_text):
+    def solve(self, problem_text, fast_result=None, budget=None, deadline=None):
         """
         Solve a mathematical problem using Fast-then-Slow Thinking strategy.
         
         Args:
             problem_text (str): The text of the mathematical problem.
+            fast_result (dict, optional): An already computed Fast Thinking result
+                for this problem; when given, the Fast phase is not run again.
+            budget (dict, optional): Resource allocation (token_budget, max_steps,
+                verification_effort) shared by both phases (default: each phase's config).
+            deadline (float, optional): time.monotonic() by which the solution is due;
+                too close to it, the strategy does not switch to Slow Thinking.
             
         Returns:
             dict: A dictionary containing the solution and metadata.
         """
-        # Initialize solution tracking
-        steps = []
-        tokens_used = 0
+        if self.speculative and fast_result is None:
+            return run_sync(self._solve_speculative(problem_text, budget, deadline))
         
-        # Step 1: Try Fast Thinking first
-        steps.append("Starting with Fast Thinking approach")
-        fast_result = self.fast_thinking.solve(problem_text)
-        
-        # Add Fast Thinking steps to our steps
-        for i, fast_step in enumerate(fast_result['steps']):
-            steps.append(f"Fast Thinking {i+1}: {fast_step}")
-        
-        tokens_used += fast_result['tokens_used']
+        # Step 1: Try Fast Thinking first, unless the caller already did
+        if fast_result is None:
+            fast_result = self.fast_thinking.solve(
+                problem_text, budget=self._fast_budget(budget), deadline=deadline
+            )
         
         # Step 2: Evaluate if we need to switch to Slow Thinking
-        switch_decision = self._evaluate_switch_decision(fast_result)
-        steps.append(f"Switch decision: {switch_decision['decision']} - {switch_decision['reason']}")
-        tokens_used += len(steps[-1].split())
+        steps, tokens_used, switch_decision = self._review_fast_result(fast_result, budget, deadline)
         
         # Step 3: If needed, switch to Slow Thinking
+        slow_result = None
         if switch_decision['decision'] == 'switch':
             steps.append("Switching to Slow Thinking approach")
             
             # Pass relevant information from Fast Thinking to Slow Thinking
             context_for_slow = self._prepare_context_for_slow(problem_text, fast_result)
             
-            # Solve with Slow Thinking
-            slow_result = self.slow_thinking.solve(context_for_slow)
+            # Solve with Slow Thinking on what is left of the budget
+            slow_result = self.slow_thinking.solve(
+                context_for_slow, budget=self._slow_budget(budget, tokens_used), deadline=deadline
+            )
+        
+        return self._combine_results(fast_result, slow_result, steps, tokens_used, switch_decision, budget)
+    
+    async def asolve(self, problem_text, fast_result=None, budget=None, deadline=None):
+        """
+        Solve a mathematical problem using Fast-then-Slow Thinking strategy,
+        awaiting the LLM calls of both phases.
+        
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            fast_result (dict, optional): An already computed Fast Thinking result
+                for this problem; when given, the Fast phase is not run again.
+            budget (dict, optional): Resource allocation (token_budget, max_steps,
+                verification_effort) shared by both phases (default: each phase's config).
+            deadline (float, optional): time.monotonic() by which the solution is due;
+                too close to it, the strategy does not switch to Slow Thinking.
+            
+        Returns:
+            dict: A dictionary containing the solution and metadata.
+        """
+        if self.speculative and fast_result is None:
+            return await self._asolve_speculative(problem_text, budget, deadline)
+        
+        if fast_result is None:
+            fast_result = await self.fast_thinking.asolve(
+                problem_text, budget=self._fast_budget(budget), deadline=deadline
+            )
+        steps, tokens_used, switch_decision = self._review_fast_result(fast_result, budget, deadline)
+        
+        slow_result = None
+        if switch_decision['decision'] == 'switch':
+            steps.append("Switching to Slow Thinking approach")
+            context_for_slow = self._prepare_context_for_slow(problem_text, fast_result)
+            slow_result = await self.slow_thinking.asolve(
+                context_for_slow, budget=self._slow_budget(budget, tokens_used), deadline=deadline
+            )
+        
+        return self._combine_results(fast_result, slow_result, steps, tokens_used, switch_decision, budget)
+    
+    async def _solve_speculative(self, problem_text, budget=None, deadline=None):
+        """Run the speculative mode on a private event loop and release its connections."""
+        try:
+            return await self._asolve_speculative(problem_text, budget, deadline)
+        finally:
+            await self.fast_thinking.aclose()
+            await self.slow_thinking.aclose()
+    
+    async def _asolve_speculative(self, problem_text, budget=None, deadline=None):
+        """
+        Solve with Fast and Slow Thinking started at the same time.
+        
+        The Slow phase runs on the original problem text (it cannot use hints from
+        the Fast phase). Once the switch decision is made, the Slow phase is
+        cancelled if it is not needed. The solution's 'speculation' entry reports
+        the work that was wasted or the latency that was saved. The tokens of a
+        cancelled Slow phase are unknown (None): its request may already have
+        been sent and billed, up to 'max_wasted_tokens'.
+        
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            budget (dict, optional): Resource allocation shared by both phases.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            
+        Returns:
+            dict: A dictionary containing the solution and metadata.
+        """
+        start_time = time.monotonic()
+        slow_started_at = []
+        slow_finished_at = []
+        fast_budget = self._fast_budget(budget)
+        # The Slow phase starts before the Fast phase's usage is known
+        slow_budget = self._slow_budget(budget, fast_budget['token_budget'] if fast_budget else 0)
+        
+        async def run_slow():
+            slow_started_at.append(time.monotonic())
+            slow_result = await self.slow_thinking.asolve(problem_text, budget=slow_budget, deadline=deadline)
+            slow_finished_at.append(time.monotonic())
+            return slow_result
+        
+        slow_task = asyncio.ensure_future(run_slow())
+        try:
+            fast_result = await self.fast_thinking.asolve(problem_text, budget=fast_budget, deadline=deadline)
+        except BaseException:
+            slow_task.cancel()
+            raise
+        fast_elapsed = time.monotonic() - start_time
+        
+        # The Slow phase is already running and bounded by the deadline itself,
+        # so a near deadline is no reason to discard it
+        steps, tokens_used, switch_decision = self._review_fast_result(fast_result, budget)
+        
+        slow_result = None
+        if switch_decision['decision'] == 'switch':
+            steps.append("Switching to Slow Thinking approach (started speculatively)")
+            slow_result = await slow_task
+            slow_elapsed = slow_finished_at[0] - start_time
+            # The Slow result is used, so none of its work is wasted
+            speculation = {
+                'slow_cancelled': False,
+                'wasted_time': 0.0,
+                'wasted_tokens': 0,
+                'max_wasted_tokens': 0,
+                'time_saved': min(fast_elapsed, slow_elapsed),
+            }
+        elif slow_task.done():
+            # The Slow phase finished before the decision; its work is discarded
+            speculation = {
+                'slow_cancelled': False,
+                'wasted_time': slow_finished_at[0] - slow_started_at[0],
+                'wasted_tokens': slow_task.result()['tokens_used'],
+                'max_wasted_tokens': self.slow_thinking.response_token_limit(slow_budget),
+                'time_saved': 0.0,
+            }
+        else:
+            slow_task.cancel()
+            await asyncio.gather(slow_task, return_exceptions=True)
+            started = bool(slow_started_at)
+            speculation = {
+                'slow_cancelled': True,
+                'wasted_time': time.monotonic() - slow_started_at[0] if started else 0.0,
+                # A request that was already sent is billed, but its usage is never seen
+                'wasted_tokens': None if started else 0,
+                'max_wasted_tokens': self.slow_thinking.response_token_limit(slow_budget) if started else 0,
+                'time_saved': 0.0,
+            }
+        
+        solution = self._combine_results(fast_result, slow_result, steps, tokens_used, switch_decision, budget)
+        solution['speculation'] = speculation
+        return solution
+    
+    def _fast_budget(self, budget):
+        """
+        Get the Fast phase's share of a Fast-then-Slow allocation.
+        
+        Args:
+            budget (dict): Resource allocation for the whole strategy, or None.
+            
+        Returns:
+            dict: Allocation for the Fast phase, or None to use its config.
+        """
+        if budget is None:
+            return None
+        return {
+            'token_budget': int(budget['token_budget'] * config.RESOURCE_ALLOCATOR['FAST_TOKEN_SHARE']),
+            'max_steps': min(budget['max_steps'], self.fast_thinking.max_steps),
+            'verification_effort': budget['verification_effort'],
+        }
+    
+    def _slow_budget(self, budget, tokens_used):
+        """
+        Get what a Fast-then-Slow allocation leaves for the Slow phase.
+        
+        Args:
+            budget (dict): Resource allocation for the whole strategy, or None.
+            tokens_used (int): Tokens used before the Slow phase.
             
+        Returns:
+            dict: Allocation for the Slow phase, or None to use its config.
+        """
+        if budget is None:
+            return None
+        return {
+            'token_budget': max(0, budget['token_budget'] - tokens_used),
+            'max_steps': budget['max_steps'],
+            'verification_effort': budget['verification_effort'],
+        }
+    
+    def _review_fast_result(self, fast_result, budget=None, deadline=None):
+        """
+        Record the Fast Thinking phase and decide whether to switch to Slow Thinking.
+        
+        Args:
+            fast_result (dict): Result from Fast Thinking.
+            budget (dict, optional): Resource allocation for the whole strategy.
+            deadline (float, optional): time.monotonic() by which the solution is due.
+            
+        Returns:
+            tuple: (steps, tokens_used, switch_decision)
+        """
+        steps = ["Starting with Fast Thinking approach"]
+        
+        # Add Fast Thinking steps to our steps
+        for i, fast_step in enumerate(fast_result['steps']):
+            steps.append(f"Fast Thinking {i+1}: {fast_step}")
+        
+        tokens_used = fast_result['tokens_used']
+        
+        switch_decision = self._evaluate_switch_decision(fast_result)
+        if switch_decision['decision'] == 'switch' and budget is not None and tokens_used >= budget['token_budget']:
+            # Nothing is left for the Slow phase
+            switch_decision = {
+                'decision': 'continue',
+                'reason': f"Token budget exhausted ({tokens_used} of {budget['token_budget']} tokens used); "
+                          f"not switching despite: {switch_decision['reason']}"
+            }
+        elif switch_decision['decision'] == 'switch' and not has_time_for(
+            deadline, config.DEADLINES['MIN_SLOW_SECONDS']
+        ):
+            # Slow Thinking would not finish before the deadline
+            switch_decision = {
+                'decision': 'continue',
+                'reason': f"Deadline near ({max(0.0, time_left(deadline)):.1f}s left); "
+                          f"not switching despite: {switch_decision['reason']}"
+            }
+        steps.append(f"Switch decision: {switch_decision['decision']} - {switch_decision['reason']}")
+        tokens_used += len(steps[-1].split())
+        
+        return steps, tokens_used, switch_decision
+    
+    def _combine_results(self, fast_result, slow_result, steps, tokens_used, switch_decision, budget=None):
+        """
+        Build the final solution from the Fast Thinking result and, if the
+        strategy switched, the Slow Thinking result.
+        
+        Args:
+            fast_result (dict): Result from Fast Thinking.
+            slow_result (dict): Result from Slow Thinking, or None if not run.
+            steps (list): Steps recorded so far.
+            tokens_used (int): Tokens used so far.
+            switch_decision (dict): Decision information.
+            budget (dict, optional): Resource allocation for the whole strategy.
+            
+        Returns:
+            dict: The final solution.
+        """
+        if slow_result is not None:
             # Add Slow Thinking steps to our steps
             for i, slow_step in enumerate(slow_result['steps']):
                 steps.append(f"Slow Thinking {i+1}: {slow_step}")
@@ -95,7 +332,7 @@ class FastThenSlow:
             }
         
         # Prepare and return the final solution
-        return self._prepare_solution(result, steps, tokens_used)
+        return self._prepare_solution(result, steps, tokens_used, budget)
     
     def _evaluate_switch_decision(self, fast_result):
         """
@@ -166,10 +403,19 @@ class FastThenSlow:
         
         return problem_text
     
-    def _prepare_solution(self, result, steps, tokens_used):
+    def _prepare_solution(self, result, steps, tokens_used, budget=None):
         """Prepare the final solution output."""
         # Calculate total resources used
-        if 'slow_result' in result:
+        if budget is not None:
+            # Both phases shared one allocation
+            resources = {
+                'steps_used': len(steps),
+                'max_steps': budget['max_steps'],
+                'tokens_used': tokens_used,
+                'token_budget': budget['token_budget'],
+                'verification_effort': budget['verification_effort']
+            }
+        elif 'slow_result' in result:
             # Combined resources from both strategies
             resources = {
                 'steps_used': len(steps),
@@ -199,5 +445,6 @@ class FastThenSlow:
             'strategy': 'FAST_THEN_SLOW',
             'error': result.get('error', None),
             'resources': resources,
-            'switch_decision': result['switch_decision']
+            'switch_decision': result['switch_decision'],
+            'fast_answer': result['fast_result']['answer']
         }
@@ -3,14 +3,17 @@ Implementation of Fast Thinking strategy for mathematical problems.
 """
 
 import re
-import sympy
-from sympy.parsing.sympy_parser import (
-    parse_expr,
-    standard_transformations,
-    implicit_multiplication_application,
-)
 import config
+from ..deadlines import deadline_scope, has_time_for
+from ..lazy_imports import lazy_import
 from ..llm_integration import LLMIntegration
+from ..math_engine.parsing import parse_expression
+from ..math_engine.arithmetic import evaluate_arithmetic, format_number
+from ..math_engine.numeric_verification import verify_roots
+from ..math_engine.sympy_pool import run_sympy
+from ..resource_allocator.allocator import resolve_budget
+
+sympy = lazy_import('sympy')
 
 
 class FastThinking:
@@ -30,33 +33,70 @@ class FastThinking:
         # Initialize LLM integration
         self.llm = LLMIntegration(model="gpt-4")
 
-        # Set up sympy parsing transformations
-        self.transformations = standard_transformations + (
-            implicit_multiplication_application,
-        )
+        # Set up sympy parsing transformations (parses are memoized across strategies)
+        self.transformations = None  # parse_expression's default transformations
 
-    def solve(self, problem_text):
+    def solve(self, problem_text, budget=None, deadline=None):
         """
         Solve a mathematical problem using Fast Thinking strategy.
 
         Args:
             problem_text (str): The text of the mathematical problem.
+            budget (dict, optional): Resource allocation (token_budget, max_steps,
+                verification_effort) for this problem (default: from config).
+            deadline (float, optional): time.monotonic() by which the solution is due;
+                stages that do not fit before it are skipped or cut short.
+
+        Returns:
+            dict: A dictionary containing the solution and metadata.
+        """
+        budget = resolve_budget(budget, self)
+
+        # First, try using the LLM for fast thinking
+        llm_solution = self.llm.solve_problem(
+            problem_text, thinking_mode="fast", max_tokens=budget["token_budget"],
+            deadline=deadline,
+        )
+        with deadline_scope(deadline):
+            return self._complete_solution(problem_text, llm_solution, budget, deadline)
+
+    async def asolve(self, problem_text, budget=None, deadline=None):
+        """
+        Solve a mathematical problem using Fast Thinking strategy, awaiting the LLM call.
+
+        Args:
+            problem_text (str): The text of the mathematical problem.
+            budget (dict, optional): Resource allocation (token_budget, max_steps,
+                verification_effort) for this problem (default: from config).
+            deadline (float, optional): time.monotonic() by which the solution is due;
+                stages that do not fit before it are skipped or cut short.
 
         Returns:
             dict: A dictionary containing the solution and metadata.
         """
+        budget = resolve_budget(budget, self)
+        llm_solution = await self.llm.asolve_problem(
+            problem_text, thinking_mode="fast", max_tokens=budget["token_budget"],
+            deadline=deadline,
+        )
+        with deadline_scope(deadline):
+            return self._complete_solution(problem_text, llm_solution, budget, deadline)
+
+    async def aclose(self):
+        """Release the LLM client's pooled connections for the running event loop."""
+        await self.llm.aclose()
+
+    def _complete_solution(self, problem_text, llm_solution, budget, deadline=None):
+        """Use the LLM solution if confident, otherwise solve with traditional methods."""
         # Initialize solution tracking
         steps = []
         tokens_used = 0
 
-        # First, try using the LLM for fast thinking
-        llm_solution = self.llm.solve_problem(problem_text, thinking_mode="fast")
-
         if llm_solution["answer"] is not None and llm_solution["confidence"] > 0.7:
             # If LLM provides a confident solution, use it
             steps.extend(llm_solution["steps"])
             tokens_used += sum(len(step.split()) for step in steps)
-            return self._prepare_solution(llm_solution, steps, tokens_used)
+            return self._prepare_solution(llm_solution, steps, tokens_used, budget)
 
         # If LLM solution is not confident enough, fall back to traditional methods
         # Preprocess the problem
@@ -64,6 +104,16 @@ class FastThinking:
         tokens_used += len(processed_problem.split())
         steps.append(f"Preprocessed problem: {processed_problem}")
 
+        # Stop early if reading the problem already used up the token budget
+        if tokens_used >= budget["token_budget"]:
+            steps.append("Token budget exhausted before solving.")
+            result = {
+                "answer": None,
+                "confidence": 0.1,
+                "error": "Token budget exhausted",
+            }
+            return self._prepare_solution(result, steps, tokens_used, budget)
+
         # Identify problem type
         problem_type = self._identify_problem_type(processed_problem)
         steps.append(f"Identified problem type: {problem_type}")
@@ -85,10 +135,17 @@ class FastThinking:
                 "error": "Problem type not suitable for Fast Thinking",
             }
             steps.append("Problem type not recognized for Fast Thinking approach.")
-            return self._prepare_solution(result, steps, tokens_used)
+            return self._prepare_solution(result, steps, tokens_used, budget)
 
-        # Verify the solution if within token budget
-        if tokens_used < self.token_budget * 0.8 and result["answer"] is not None:
+        # Verify the solution if within token budget and there is time for it
+        if (
+            tokens_used < budget["token_budget"] * 0.8
+            and budget["verification_effort"] > 0
+            and result["answer"] is not None
+        ):
+            if not has_time_for(deadline, config.DEADLINES["MIN_VERIFICATION_SECONDS"]):
+                steps.append("Verification skipped: the deadline is too close.")
+                return self._prepare_solution(result, steps, tokens_used, budget)
             verification_result = self._verify_solution(
                 processed_problem, result, problem_type
             )
@@ -97,7 +154,7 @@ class FastThinking:
             tokens_used += len(verification_result["message"].split())
 
         # Prepare and return the final solution
-        return self._prepare_solution(result, steps, tokens_used)
+        return self._prepare_solution(result, steps, tokens_used, budget)
 
     def _preprocess_problem(self, problem_text):
         """Preprocess the problem text to extract the core mathematical problem."""
@@ -152,10 +209,10 @@ class FastThinking:
                 return {"answer": "2", "confidence": 0.99, "error": None}
 
             # Evaluate the expression
-            result = eval(expression)
+            result = format_number(evaluate_arithmetic(expression))
             steps.append(f"Evaluated expression: {result}")
 
-            return {"answer": str(result), "confidence": 0.95, "error": None}
+            return {"answer": result, "confidence": 0.95, "error": None}
         except Exception as e:
             steps.append(f"Error solving arithmetic problem: {str(e)}")
             return {"answer": None, "confidence": 0.1, "error": str(e)}
@@ -170,11 +227,11 @@ class FastThinking:
             # Parse the equation with sympy
             if "=" in equation:
                 left, right = equation.split("=")
-                eq = parse_expr(
+                eq = parse_expression(
                     left, transformations=self.transformations
-                ) - parse_expr(right, transformations=self.transformations)
+                ) - parse_expression(right, transformations=self.transformations)
             else:
-                eq = parse_expr(equation, transformations=self.transformations)
+                eq = parse_expression(equation, transformations=self.transformations)
 
             # Find the variable
             variables = list(eq.free_symbols)
@@ -188,7 +245,7 @@ class FastThinking:
 
             # Solve for the variable
             variable = variables[0]
-            solution = sympy.solve(eq, variable)
+            solution = run_sympy(sympy.solve, eq, variable)
             steps.append(f"Solved for {variable}: {solution}")
 
             # Format the solution
@@ -213,7 +270,7 @@ class FastThinking:
 
             # Parse the function with sympy
             x = sympy.Symbol("x")
-            function = parse_expr(function_text, transformations=self.transformations)
+            function = parse_expression(function_text, transformations=self.transformations)
 
             # Calculate the derivative
             derivative = sympy.diff(function, x)
@@ -233,10 +290,10 @@ class FastThinking:
 
             # Parse the function with sympy
             x = sympy.Symbol("x")
-            function = parse_expr(function_text, transformations=self.transformations)
+            function = parse_expression(function_text, transformations=self.transformations)
 
             # Calculate the integral
-            integral = sympy.integrate(function, x)
+            integral = run_sympy(sympy.integrate, function, x)
             steps.append(f"Calculated integral: {integral}")
 
             return {"answer": str(integral), "confidence": 0.8, "error": None}
@@ -314,8 +371,8 @@ class FastThinking:
             if problem_type == "arithmetic":
                 # For arithmetic, re-evaluate the expression
                 expression = self._extract_expression(problem_text)
-                verification = eval(expression)
-                if str(verification) == result["answer"]:
+                verification = format_number(evaluate_arithmetic(expression))
+                if verification == result["answer"]:
                     return {
                         "confidence": 0.95,
                         "message": "Verification successful: Solution is correct.",
@@ -326,29 +383,25 @@ class FastThinking:
                 equation = self._extract_equation(problem_text)
                 if "=" in equation:
                     left, right = equation.split("=")
-                    left_expr = parse_expr(left, transformations=self.transformations)
-                    right_expr = parse_expr(right, transformations=self.transformations)
+                    left_expr = parse_expression(left, transformations=self.transformations)
+                    right_expr = parse_expression(right, transformations=self.transformations)
 
                     # Extract variable and solution
                     variable = list(left_expr.free_symbols | right_expr.free_symbols)[0]
 
-                    # Parse the answer
+                    # Parse the answer (one or more roots)
                     if "=" in result["answer"]:
-                        solution_value = parse_expr(
-                            result["answer"].split("=")[1].strip(),
-                            transformations=self.transformations,
-                        )
+                        answer = result["answer"].split("=")[1].strip()
                     else:
-                        solution_value = parse_expr(
-                            result["answer"].strip("[]"),
-                            transformations=self.transformations,
-                        )
-
-                    # Substitute and check
-                    left_result = left_expr.subs(variable, solution_value)
-                    right_result = right_expr.subs(variable, solution_value)
-
-                    if abs(float(left_result) - float(right_result)) < 1e-10:
+                        answer = result["answer"].strip("[]")
+                    solution_values = [
+                        parse_expression(part.strip(), transformations=self.transformations)
+                        for part in answer.split(",")
+                    ]
+
+                    # Check all roots at once, numerically where possible
+                    if all(verify_roots(left_expr, right_expr, variable, solution_values)):
+                        solution_value = ", ".join(str(value) for value in solution_values)
                         return {
                             "confidence": 0.9,
                             "message": f"Verification successful: {variable}={solution_value} satisfies the equation.",
@@ -366,7 +419,7 @@ class FastThinking:
                 "message": f"Verification inconclusive: {str(e)}",
             }
 
-    def _prepare_solution(self, result, steps, tokens_used):
+    def _prepare_solution(self, result, steps, tokens_used, budget):
         """Prepare the final solution output."""
         return {
             "answer": result["answer"],
@@ -377,9 +430,9 @@ class FastThinking:
             "error": result.get("error", None),
             "resources": {
                 "steps_used": len(steps),
-                "max_steps": self.max_steps,
+                "max_steps": budget["max_steps"],
                 "tokens_used": tokens_used,
-                "token_budget": self.token_budget,
-                "verification_effort": self.verification_effort,
+                "token_budget": budget["token_budget"],
+                "verification_effort": budget["verification_effort"],
             },
         }
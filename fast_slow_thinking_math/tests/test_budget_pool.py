@@ -0,0 +1,183 @@
+"""
+Test module for the shared token budget pool.
+"""
+
+import os
+import time
+import unittest
+from unittest import mock
+
+from src.llm_integration import LLMIntegration
+from src.resource_allocator.allocator import ResourceAllocator
+from src.resource_allocator.budget_pool import TokenBudgetPool, current_reservation, reservation_scope
+from src.switching_mechanism.switcher import ThinkingSwitcher
+
+FAST_RESPONSE = '{"answer": "4", "explanation": "2 + 2 = 4", "confidence": 0.9}'
+
+
+def make_response(total_tokens):
+    """Build a fake ChatCompletion response reporting its token usage."""
+    response = mock.Mock()
+    response.choices = [mock.Mock(message=mock.Mock(content=FAST_RESPONSE))]
+    response.usage = mock.Mock(prompt_tokens=total_tokens - 20, completion_tokens=20, total_tokens=total_tokens)
+    return response
+
+
+class TestTokenBudgetPool(unittest.TestCase):
+    """Test cases for the token budget pool."""
+
+    def setUp(self):
+        self.pool = TokenBudgetPool(capacity=1000, window=3600, pressure_threshold=0.5, degraded_share=0.5)
+
+    def test_release_reclaims_unused_tokens(self):
+        """Test that a released reservation only charges the tokens spent."""
+        reservation = self.pool.reserve(300)
+        self.assertEqual(reservation.tokens, 300)
+        self.assertEqual(self.pool.utilization()['reserved'], 300)
+
+        reservation.charge(100)
+        self.assertEqual(self.pool.utilization()['reserved'], 200)
+        self.pool.release(reservation)
+        self.pool.release(reservation)
+
+        utilization = self.pool.utilization()
+        self.assertEqual((utilization['spent'], utilization['reserved']), (100, 0))
+        self.assertEqual(utilization['in_flight'], 0)
+
+    def test_charges_beyond_the_reservation(self):
+        """Test that spending beyond a reservation is charged in full."""
+        reservation = self.pool.reserve(100)
+        reservation.charge(150)
+        self.pool.release(reservation)
+
+        utilization = self.pool.utilization()
+        self.assertEqual((utilization['spent'], utilization['reserved']), (150, 0))
+
+    def test_degrades_under_pressure(self):
+        """Test that reservations shrink under pressure and stop once the budget is used up."""
+        self.pool.reserve(600)
+        degraded = self.pool.reserve(200)
+        rest = self.pool.reserve(1000)
+
+        self.assertEqual(degraded.tokens, 100)
+        self.assertTrue(degraded.degraded)
+        self.assertEqual(rest.tokens, 300)
+        self.assertEqual(self.pool.reserve(100).tokens, 0)
+        self.assertEqual(self.pool.utilization()['available'], 0)
+
+    def test_window_resets_spending(self):
+        """Test that spending is forgotten once the window is over."""
+        reservation = self.pool.reserve(400)
+        reservation.charge(400)
+        self.pool.release(reservation)
+        with mock.patch('time.time', return_value=time.time() + 3601):
+            self.assertEqual(self.pool.utilization()['spent'], 0)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires fork")
+    def test_shared_with_forked_workers(self):
+        """Test that a forked process draws from the same pool."""
+        pid = os.fork()
+        if pid == 0:
+            reservation = self.pool.reserve(250)
+            reservation.charge(250)
+            self.pool.release(reservation)
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(self.pool.utilization()['spent'], 250)
+
+
+class TestBudgetedAllocation(unittest.TestCase):
+    """Test cases for allocations drawn from the budget pool."""
+
+    def setUp(self):
+        self.pool = TokenBudgetPool(capacity=10000, window=3600, pressure_threshold=0.8, degraded_share=0.5)
+        self.allocator = ResourceAllocator(budget_pool=self.pool)
+        self.analysis = {'complexity_score': 0.9, 'complexity_level': 'Very Complex'}
+
+    def test_pressure_forces_fast(self):
+        """Test that a costly strategy is downgraded to FAST under pressure."""
+        strategy, allocation, _ = self.allocator.admit(self.analysis, 'SLOW')
+        self.assertEqual(strategy, 'SLOW')
+        self.assertFalse(allocation['degraded'])
+
+        self.pool.reserve(8500 - self.pool.utilization()['reserved'])
+        strategy, allocation, _ = self.allocator.admit(self.analysis, 'SLOW')
+
+        self.assertEqual(strategy, 'FAST')
+        self.assertTrue(allocation['degraded'])
+        full = self.allocator.allocate_for_strategy(self.analysis, 'FAST')['token_budget']
+        self.assertEqual(allocation['token_budget'], full // 2)
+
+    def test_reserves_provider_tokens(self):
+        """Test that token budgets are reserved in provider tokens."""
+        with mock.patch.dict('config.LLM_CLIENT', {'TOKENS_PER_BUDGET_UNIT': 2.0}):
+            allocator = ResourceAllocator(budget_pool=self.pool)
+            _, allocation, reservation = allocator.admit(self.analysis, 'SLOW')
+
+        self.assertEqual(reservation.tokens, 2 * allocation['token_budget'])
+
+    def test_switcher_releases_reservation(self):
+        """Test that a solved problem gives back its reservation and is charged what its LLM calls spent."""
+        fast = mock.Mock(max_steps=3, token_budget=100, verification_effort=0.2)
+
+        def solve(problem_text, budget=None, deadline=None):
+            current_reservation().charge(12)
+            return {
+                'answer': '4', 'confidence': 0.95, 'steps': ['step'], 'tokens_used': 3,
+                'strategy': 'FAST', 'error': None,
+                'resources': {'steps_used': 1, 'max_steps': 3},
+            }
+
+        fast.solve.side_effect = solve
+        analyzer = mock.Mock()
+        analyzer.analyze.return_value = {'complexity_score': 0.1, 'complexity_level': 'Simple'}
+        switcher = ThinkingSwitcher(
+            analyzer=analyzer, fast_strategy=fast, slow_strategy=mock.Mock(),
+            combined_strategy=mock.Mock(), resource_allocator=self.allocator,
+        )
+
+        solution = switcher.solve('What is 2 + 2?')
+
+        utilization = self.pool.utilization()
+        self.assertEqual((utilization['spent'], utilization['reserved'], utilization['in_flight']), (12, 0, 0))
+        self.assertEqual(solution['resource_allocation']['token_budget'], fast.solve.call_args.kwargs['budget']['token_budget'])
+
+
+class TestChargedLLMCalls(unittest.TestCase):
+    """Test cases for LLM calls charged to a reservation."""
+
+    def setUp(self):
+        self.pool = TokenBudgetPool(capacity=10000, window=3600, pressure_threshold=0.8, degraded_share=0.5)
+        self.llm = LLMIntegration(cache=False)
+
+    def test_charges_response_usage(self):
+        """Test that a reservation is charged the tokens the provider reports."""
+        reservation = self.pool.reserve(2000)
+        with mock.patch('openai.ChatCompletion.create', return_value=make_response(321)) as create:
+            with reservation_scope(reservation):
+                solution = self.llm.solve_problem('What is 2 + 2?')
+        self.pool.release(reservation)
+
+        self.assertEqual(solution['answer'], '4')
+        self.assertEqual(reservation.spent, 321)
+        self.assertEqual(self.pool.utilization()['spent'], 321)
+        self.assertEqual(create.call_args.kwargs['max_tokens'], 1000)
+
+    def test_skips_requests_the_reservation_cannot_cover(self):
+        """Test that a reservation below the response floor sends no request."""
+        with mock.patch.dict('config.LLM_CLIENT', {'MIN_MAX_TOKENS': 256}):
+            with mock.patch('openai.ChatCompletion.create', return_value=make_response(321)) as create:
+                with reservation_scope(self.pool.reserve(600)):
+                    capped = self.llm.solve_problem('What is 2 + 2?')
+                with reservation_scope(self.pool.reserve(100)):
+                    skipped = self.llm.solve_problem('What is 2 + 2?')
+
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(create.call_args.kwargs['max_tokens'], 600)
+        self.assertEqual(capped['answer'], '4')
+        self.assertEqual(skipped['error'], 'Token budget exhausted')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,13 @@
 Test module for the Complexity Analyzer.
 """
 
+import os
+import tempfile
 import unittest
+from benchmarks.benchmark_feature_extraction import LegacyFeatureExtractor
 from src.complexity_analyzer.analyzer import ComplexityAnalyzer
+from src.complexity_analyzer.features import FeatureExtractor
+from src.complexity_analyzer.learned_model import ComplexityModel, training_data
 
 class TestComplexityAnalyzer(unittest.TestCase):
     """Test cases for the Complexity Analyzer."""
@@ -60,6 +65,87 @@ class TestComplexityAnalyzer(unittest.TestCase):
         self.assertIn('feature_contributions', analysis)
         for feature in analysis['features']:
             self.assertIn(feature, analysis['feature_contributions'])
+    
+    def test_analyze_batch_matches_analyze(self):
+        """Test that batch analysis gives exactly the per-problem results."""
+        problems = [
+            "What is 25 × 4?",
+            "Solve the equation 2x² + 5x - 3 = 0 for x.",
+            "Find the derivative of f(x) = x³ + 2x² - 5x + 3",
+            "If a and b are prime, then find the sum of a and b, or the product of a and b.",
+            "Evaluate the integral ∫ sin(x) dx and simplify, if then if then",
+            "",
+            "x",
+        ]
+        batch = self.analyzer.analyze_batch(problems)
+        
+        self.assertEqual(batch, [self.analyzer.analyze(problem) for problem in problems])
+        self.assertEqual(self.analyzer.analyze_batch([]), [])
+
+class TestFeatureExtractor(unittest.TestCase):
+    """Test cases for the single-pass feature scanner."""
+    
+    def test_matches_per_pattern_extractor(self):
+        """Test that the single pass reproduces the per-pattern extractor exactly."""
+        problems = [
+            "Find the square root of 16 and the cube root of 27.",
+            "What is the sum of 3 and 4, and the product of 2 and 5?",
+            "Compute d/dx of sin(x) + cos(x) and the integral x∫y, if then if and and and",
+            "The rate of change and the standard deviation of the model's meaning",
+            "Solve, find, factor; expand the factorial: solve find",
+            "x qrt  qrt\tqrt, a-b*c×d/e÷f^g, ∑ x∑y ∏ a∏b",
+            "Calculate 12 divided by 4 minus the difference, times the ratio",
+        ]
+        legacy = LegacyFeatureExtractor()
+        extractor = FeatureExtractor()
+        
+        for problem in problems:
+            for text in (problem, problem.upper()):
+                self.assertEqual(extractor.extract_features(text), legacy.extract_features(text))
+
+
+class TestComplexityModel(unittest.TestCase):
+    """Test cases for the learned complexity model."""
+    
+    def setUp(self):
+        """Fit a model on results where Fast Thinking fails on calculus only."""
+        self.results = [
+            {'problem_text': "What is 25 × 4?", 'fast_correct': True},
+            {'problem_text': "What is 12 + 30?", 'fast_correct': True},
+            {'problem_text': "Solve for x: 3x + 2 = 14", 'fast_correct': True},
+            {'problem_text': "Find the derivative of f(x) = x³ + 2x² - 5x + 3", 'fast_correct': False},
+            {'problem_text': "Evaluate the integral ∫ sin(x) dx from 0 to π", 'fast_correct': False},
+            {'problem_text': "Find the limit of sin(x)/x as x approaches 0", 'complexity_level': 'Complex'},
+            {'problem_text': "Unlabeled problem"},
+        ]
+        feature_matrix, targets = training_data(self.results)
+        self.targets = targets
+        self.model = ComplexityModel.fit(feature_matrix, targets)
+    
+    def test_training_targets(self):
+        """Test that Fast Thinking outcomes and complexity levels become targets."""
+        self.assertEqual(self.targets.tolist(), [0.0, 0.0, 0.0, 1.0, 1.0, 1.0])
+    
+    def test_model_routes_by_fast_outcome(self):
+        """Test that the analyzer scores with the model, in batch and one by one."""
+        analyzer = ComplexityAnalyzer(model=self.model)
+        problems = ["What is 7 × 6?", "Find the derivative of f(x) = sin(x) + x²"]
+        
+        batch = analyzer.analyze_batch(problems)
+        
+        self.assertEqual(batch, [analyzer.analyze(problem) for problem in problems])
+        self.assertEqual([analysis['complexity_level'] for analysis in batch], ['Simple', 'Complex'])
+    
+    def test_save_and_load(self):
+        """Test that a saved model predicts exactly like the fitted one."""
+        feature_matrix, _ = training_data(self.results)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.npz')
+            self.model.save(path)
+            loaded = ComplexityModel.load(path)
+        
+        self.assertEqual(loaded.predict(feature_matrix).tolist(), self.model.predict(feature_matrix).tolist())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,191 @@
+"""
+Test module for evaluation runs.
+"""
+
+import io
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from main import FastSlowThinkingMath
+from src.checkpoint import EvaluationCheckpoint
+
+
+def fake_solution(problem_text, deadline=None, expected_answer=None):
+    """Solution stub: answers the number in the problem, with a fixed strategy."""
+    return {
+        'answer': problem_text.split()[-1],
+        'strategy': 'FAST',
+        'confidence': 0.5,
+        'tokens_used': 10,
+        'solution_time': 0.01,
+    }
+
+
+class EvaluationTestCase(unittest.TestCase):
+    """Base class: an evaluation system whose solver is stubbed out."""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(FastSlowThinkingMath, 'solve_problem', side_effect=fake_solution),
+            mock.patch.dict('config.LLM_CLIENT', {'BACKEND': 'local'}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.system = FastSlowThinkingMath()
+        self.problems = [
+            {'id': f'p{i}', 'problem': f'What is {i}', 'answer': str(i if i % 3 else -1),
+             'complexity_level': 'Simple'}
+            for i in range(10)
+        ]
+
+
+class TestEvaluation(EvaluationTestCase):
+    """Test cases for batch and streaming evaluation."""
+
+    def test_stream_matches_batch(self):
+        """Test that streaming writes the same results and metrics as evaluate_problems."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'problems.jsonl')
+            with open(path, 'w') as f:
+                for problem in self.problems:
+                    f.write(json.dumps(problem) + '\n')
+                f.write('\nnot json\n')
+
+            output = io.StringIO()
+            metrics = self.system.evaluate_stream(self.system.stream_problems(path), output, max_concurrency=3)
+
+        expected = self.system.evaluate_problems(self.problems, max_concurrency=3)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(results, expected['results'])
+        for key in ('total_problems', 'correct_answers', 'accuracy', 'strategy_counts', 'complexity_counts'):
+            self.assertEqual(metrics[key], expected['metrics'][key])
+        self.assertEqual(metrics['total_problems'], 10)
+
+    def test_reads_problems_lazily(self):
+        """Test that parallel evaluation only reads a bounded window ahead."""
+        read = []
+
+        def problems():
+            for i in itertools.count():
+                read.append(i)
+                yield {'id': i, 'problem': f'What is {i}', 'answer': str(i)}
+
+        results = self.system._solve_in_order(problems(), max_concurrency=2)
+        first = [next(results) for _ in range(5)]
+        results.close()
+
+        self.assertEqual([result['problem_id'] for result in first], [0, 1, 2, 3, 4])
+        self.assertLessEqual(len(read), 5 + 2 * 2)
+
+
+class TestCheckpointResume(EvaluationTestCase):
+    """Test cases for resuming interrupted evaluations."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'checkpoint.jsonl')
+
+    def test_resume_skips_completed_problems(self):
+        """Test that a resumed run only solves the remaining problems and rebuilds the metrics."""
+        expected = self.system.evaluate_problems(self.problems)
+
+        def crash_on_sixth(problem_text, deadline=None, expected_answer=None):
+            if problem_text == 'What is 6':
+                raise RuntimeError("crash")
+            return fake_solution(problem_text)
+
+        with mock.patch.object(self.system, 'solve_problem', side_effect=crash_on_sixth):
+            with EvaluationCheckpoint(self.path) as checkpoint:
+                with self.assertRaises(RuntimeError):
+                    self.system.evaluate_problems(self.problems, checkpoint=checkpoint)
+
+        # A crash in the middle of writing leaves a partial line behind
+        with open(self.path, 'a') as f:
+            f.write('{"problem_id": "p6", "is_co')
+
+        with mock.patch.object(self.system, 'solve_problem', side_effect=fake_solution) as solve:
+            with EvaluationCheckpoint(self.path) as checkpoint:
+                resumed = self.system.evaluate_problems(self.problems, checkpoint=checkpoint, resume=True)
+
+        self.assertEqual(solve.call_count, 4)
+        self.assertEqual(resumed['results'], expected['results'])
+        for key in ('total_problems', 'correct_answers', 'accuracy', 'strategy_counts'):
+            self.assertEqual(resumed['metrics'][key], expected['metrics'][key])
+        self.assertEqual(len(EvaluationCheckpoint(self.path).load()), 10)
+
+    def test_resume_solves_problems_without_id_again(self):
+        """Test that results of problems without an id are not reused on resume."""
+        problems = [{'problem': f'What is {i}', 'answer': str(i)} for i in range(3)]
+        with EvaluationCheckpoint(self.path) as checkpoint:
+            self.system.evaluate_problems(problems[:2], checkpoint=checkpoint)
+
+        with mock.patch.object(self.system, 'solve_problem', side_effect=fake_solution) as solve:
+            with EvaluationCheckpoint(self.path) as checkpoint:
+                resumed = self.system.evaluate_problems(problems, checkpoint=checkpoint, resume=True)
+
+        self.assertEqual(solve.call_count, 3)
+        self.assertEqual([r['problem_text'] for r in resumed['results']], [p['problem'] for p in problems])
+        self.assertEqual(resumed['metrics']['total_problems'], 3)
+
+    def test_checkpoint_per_input(self):
+        """Test that different input files get different checkpoints."""
+        first = EvaluationCheckpoint.for_input('data/problems.json').path
+        self.assertEqual(first, EvaluationCheckpoint.for_input('data/problems.json').path)
+        self.assertNotEqual(first, EvaluationCheckpoint.for_input('other/problems.json').path)
+        self.assertNotEqual(first, EvaluationCheckpoint.for_input('data/more_problems.json').path)
+
+    def test_resume_stream(self):
+        """Test that a streaming run resumes from the lines already in its output."""
+        with open(self.path, 'w') as f:
+            self.system.evaluate_stream(self.problems[:3], f)
+            f.write('{"problem_id": "p3"')
+
+        with mock.patch.object(self.system, 'solve_problem', side_effect=fake_solution) as solve:
+            with open(self.path, 'a') as f:
+                metrics = self.system.evaluate_stream(
+                    self.problems, f, completed=EvaluationCheckpoint(self.path).iter_results()
+                )
+
+        self.assertEqual(solve.call_count, 7)
+        self.assertEqual(metrics['total_problems'], 10)
+        with open(self.path) as f:
+            self.assertEqual([json.loads(line)['problem_id'] for line in f], [f'p{i}' for i in range(10)])
+
+    def test_resume_stream_without_ids(self):
+        """Test that a resumed stream matches problems without an id by position."""
+        problems = [{'problem': f'What is {i}', 'answer': str(i)} for i in range(5)]
+        with open(self.path, 'w') as f:
+            self.system.evaluate_stream(problems[:2], f)
+
+        with mock.patch.object(self.system, 'solve_problem', side_effect=fake_solution) as solve:
+            with open(self.path, 'a') as f:
+                metrics = self.system.evaluate_stream(
+                    problems, f, completed=EvaluationCheckpoint(self.path).iter_results()
+                )
+
+        self.assertEqual(solve.call_count, 3)
+        self.assertEqual(metrics['total_problems'], 5)
+        with open(self.path) as f:
+            self.assertEqual([json.loads(line)['problem_text'] for line in f], [p['problem'] for p in problems])
+
+    def test_resume_stream_rejects_other_input(self):
+        """Test that results of another input are not resumed from."""
+        with open(self.path, 'w') as f:
+            self.system.evaluate_stream(self.problems[:3], f)
+
+        with open(self.path, 'a') as f:
+            with self.assertRaises(ValueError):
+                self.system.evaluate_stream(
+                    self.problems[1:], f, completed=EvaluationCheckpoint(self.path).iter_results()
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Test module for deferred imports.
+"""
+
+import sys
+import unittest
+from unittest import mock
+
+from benchmarks.import_time import build_report, measure_imports
+from src.lazy_imports import lazy_import, load_now
+
+
+class TestLazyImports(unittest.TestCase):
+    """Test cases for lazily imported modules."""
+
+    def test_imports_on_first_use(self):
+        """Test that the module is imported on first attribute access, once."""
+        on_load = mock.Mock()
+        with mock.patch('importlib.import_module', return_value=sys.modules['json']) as import_module:
+            module = lazy_import('json', on_load=on_load)
+            import_module.assert_not_called()
+
+            self.assertEqual(module.dumps([1]), '[1]')
+            self.assertEqual(module.loads('2'), 2)
+
+        import_module.assert_called_once_with('json')
+        on_load.assert_called_once_with(sys.modules['json'])
+
+    def test_forwards_every_public_attribute(self):
+        """Test that module attributes named like proxy methods are not hidden."""
+        module = lazy_import('json')
+
+        self.assertIs(module.load, sys.modules['json'].load)
+        self.assertIs(load_now(module), sys.modules['json'])
+
+    def test_main_does_not_import_heavy_dependencies(self):
+        """Test that importing the entry point leaves heavy dependencies unloaded."""
+        report = build_report(measure_imports('main'))
+
+        self.assertEqual(report['heavy_imported'], [], f"Eagerly imported: {report['heavy_imported']}")
+        self.assertGreater(report['total_ms'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
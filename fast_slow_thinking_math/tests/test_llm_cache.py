@@ -0,0 +1,134 @@
+"""
+Test module for the LLM response cache.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+from src.llm_cache import ResponseCache
+from src.llm_integration import LLMIntegration
+
+FAST_RESPONSE = '{"answer": "4", "explanation": "2 + 2 = 4", "confidence": 0.9}'
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the ResponseCache."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        shutil.rmtree(self.directory)
+
+    def test_key_is_content_addressed(self):
+        """Test that keys depend on the request content only."""
+        first = ResponseCache.make_key({'model': 'gpt-4', 'temperature': 0.3})
+        second = ResponseCache.make_key({'temperature': 0.3, 'model': 'gpt-4'})
+        third = ResponseCache.make_key({'model': 'gpt-4', 'temperature': 0.7})
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+
+    def test_persists_across_instances(self):
+        """Test that responses survive in the on-disk tier."""
+        ResponseCache(path=self.path).set('key', 'value')
+        cache = ResponseCache(path=self.path)
+
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(cache.stats()['disk_hits'], 1)
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+
+    def test_creates_directory_on_first_write(self):
+        """Test that the cache directory is only created once a response is stored."""
+        path = os.path.join(self.directory, 'nested', 'cache.sqlite3')
+        cache = ResponseCache(path=path)
+
+        self.assertIsNone(cache.get('key'))
+        cache.clear()
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+
+        cache.set('key', 'value')
+        self.assertTrue(os.path.exists(path))
+
+    def test_default_path_is_relative_to_the_package(self):
+        """Test that a relative configured path does not depend on the working directory."""
+        package_directory = os.path.dirname(os.path.abspath(config.__file__))
+        cache = ResponseCache()
+
+        self.assertEqual(
+            cache.path, os.path.join(package_directory, config.LLM_CACHE['PATH'])
+        )
+
+    def test_ttl_expiry(self):
+        """Test that expired responses are treated as misses."""
+        cache = ResponseCache(path=self.path, ttl_seconds=10)
+        with mock.patch('src.llm_cache.time.time', return_value=1000.0):
+            cache.set('key', 'value')
+        with mock.patch('src.llm_cache.time.time', return_value=1020.0):
+            self.assertIsNone(cache.get('key'))
+
+    def test_lru_eviction_by_size(self):
+        """Test that the least recently used responses are evicted first."""
+        cache = ResponseCache(
+            path=self.path, max_size_bytes=10, ttl_seconds=1000, memory_entries=0
+        )
+        with mock.patch('src.llm_cache.time.time', return_value=1.0):
+            cache.set('a', 'aaaa')
+        with mock.patch('src.llm_cache.time.time', return_value=2.0):
+            cache.set('b', 'bbbb')
+        with mock.patch('src.llm_cache.time.time', return_value=3.0):
+            cache.get('a')
+        with mock.patch('src.llm_cache.time.time', return_value=4.0):
+            cache.set('c', 'cccc')
+
+        with mock.patch('src.llm_cache.time.time', return_value=5.0):
+            self.assertEqual(cache.get('a'), 'aaaa')
+            self.assertIsNone(cache.get('b'))
+            self.assertEqual(cache.get('c'), 'cccc')
+
+    def test_memory_hits_keep_entries_on_disk(self):
+        """Test that entries served from the in-process tier are not evicted as unused."""
+        cache = ResponseCache(
+            path=self.path, max_size_bytes=10, ttl_seconds=1000, memory_entries=2,
+            touch_interval=3600,
+        )
+        with mock.patch('src.llm_cache.time.time', return_value=1.0):
+            cache.set('a', 'aaaa')
+        with mock.patch('src.llm_cache.time.time', return_value=2.0):
+            cache.set('b', 'bbbb')
+        with mock.patch('src.llm_cache.time.time', return_value=3.0):
+            self.assertEqual(cache.get('a'), 'aaaa')
+        with mock.patch('src.llm_cache.time.time', return_value=4.0):
+            cache.set('c', 'cccc')
+
+        reopened = ResponseCache(path=self.path, ttl_seconds=1000)
+        with mock.patch('src.llm_cache.time.time', return_value=5.0):
+            self.assertEqual(reopened.get('a'), 'aaaa')
+            self.assertIsNone(reopened.get('b'))
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+
+    def test_llm_integration_skips_repeat_calls(self):
+        """Test that a repeated request does not reach the API."""
+        llm = LLMIntegration(cache=ResponseCache(path=self.path))
+        response = mock.Mock()
+        response.choices = [mock.Mock(message=mock.Mock(content=FAST_RESPONSE))]
+
+        with mock.patch('openai.ChatCompletion.create', return_value=response) as create:
+            first = llm.solve_problem('What is 2 + 2?')
+            second = llm.solve_problem('What is 2 + 2?')
+
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second['answer'], '4')
+
+
+if __name__ == '__main__':
+    unittest.main()
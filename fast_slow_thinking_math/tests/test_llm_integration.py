@@ -0,0 +1,201 @@
+"""
+Test module for the asynchronous LLM client.
+"""
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from src.llm_hedging import HedgingPolicy
+from src.llm_integration import LLMIntegration, TokenBucket
+
+RESPONSE_TEMPLATE = '{{"answer": "{answer}", "explanation": "", "confidence": 0.9}}'
+
+
+def make_response(answer):
+    """Build a fake ChatCompletion response with the given answer."""
+    response = mock.Mock()
+    content = RESPONSE_TEMPLATE.format(answer=answer)
+    response.choices = [mock.Mock(message=mock.Mock(content=content))]
+    return response
+
+
+class TestAsyncLLMIntegration(unittest.TestCase):
+    """Test cases for the asynchronous LLM client."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.in_flight = 0
+        self.max_seen = 0
+
+    async def fake_acreate(self, **request):
+        """Fake API call that records how many requests run at once."""
+        self.in_flight += 1
+        self.max_seen = max(self.max_seen, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return make_response(request['messages'][1]['content'].split('\n')[1])
+
+    def test_max_in_flight(self):
+        """Test that concurrent requests are capped by the semaphore."""
+        llm = LLMIntegration(
+            cache=False, max_in_flight=2, rate_limiter=TokenBucket(1000.0, 1000)
+        )
+        problems = [f'problem {i}' for i in range(6)]
+
+        with mock.patch('openai.ChatCompletion.acreate', new=self.fake_acreate):
+            solutions = llm.solve_problems(problems)
+
+        self.assertEqual(self.max_seen, 2)
+        self.assertEqual([s['answer'] for s in solutions], problems)
+
+    def test_errors_are_returned_as_solutions(self):
+        """Test that API errors produce a zero-confidence solution."""
+        llm = LLMIntegration(cache=False)
+
+        async def solve():
+            try:
+                return await llm.asolve_problem('What is 1 + 1?')
+            finally:
+                await llm.aclose()
+
+        with mock.patch('openai.ChatCompletion.acreate', side_effect=RuntimeError('boom')):
+            solution = asyncio.run(solve())
+
+        self.assertIsNone(solution['answer'])
+        self.assertEqual(solution['confidence'], 0.0)
+        self.assertEqual(solution['error'], 'boom')
+
+    def test_deadline_bounds_requests(self):
+        """Test that a deadline sets the request timeout and expires slow requests."""
+        llm = LLMIntegration(cache=False, hedging=False)
+
+        async def solve(deadline):
+            try:
+                return await llm.asolve_problem('What is 1 + 1?', deadline=deadline)
+            finally:
+                await llm.aclose()
+
+        with mock.patch('openai.ChatCompletion.acreate') as acreate:
+            solution = asyncio.run(solve(time.monotonic() - 1.0))
+        acreate.assert_not_called()
+        self.assertEqual(solution['error'], 'Deadline exceeded')
+
+        timeouts = []
+
+        async def slow_acreate(**request):
+            timeouts.append(request['request_timeout'])
+            await asyncio.sleep(5.0)
+
+        with mock.patch('openai.ChatCompletion.acreate', new=slow_acreate):
+            start = time.monotonic()
+            solution = asyncio.run(solve(time.monotonic() + 0.6))
+        self.assertEqual(solution['error'], 'Deadline exceeded')
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertLessEqual(timeouts[0], 0.6)
+
+    def test_budget_units_are_converted_to_response_tokens(self):
+        """Test that word budgets become provider-token limits with a floor and the mode's cap."""
+        llm = LLMIntegration(cache=False)
+
+        with mock.patch.dict('config.LLM_CLIENT', {'TOKENS_PER_BUDGET_UNIT': 2.0, 'MIN_MAX_TOKENS': 256}):
+            self.assertEqual(llm.response_token_limit('slow', 400), 800)
+            self.assertEqual(llm.response_token_limit('fast', 50), 256)
+            self.assertEqual(llm.response_token_limit('fast', 5000), 1000)
+            self.assertEqual(llm.response_token_limit('slow'), 2000)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for the token-bucket rate limiter."""
+
+    def test_waits_when_empty(self):
+        """Test that acquiring beyond the burst waits for a refill."""
+        bucket = TokenBucket(rate=50.0, capacity=1)
+
+        async def acquire_twice():
+            await bucket.acquire()
+            start = time.monotonic()
+            await bucket.acquire()
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(acquire_twice()), 0.015)
+
+
+class TestHedgingPolicy(unittest.TestCase):
+    """Test cases for hedged requests."""
+
+    def make_policy(self, budget_ratio=1.0):
+        """Build a policy that has already seen fast requests."""
+        policy = HedgingPolicy(
+            percentile=95, window=10, min_samples=5, budget_ratio=budget_ratio, max_burst=1
+        )
+        for _ in range(5):
+            policy.record_latency(0.01)
+        return policy
+
+    def test_hedge_wins_over_slow_request(self):
+        """Test that a slow synchronous request is hedged and the hedge answers."""
+        policy = self.make_policy()
+        delays = iter([0.5, 0.0])
+
+        def request():
+            delay = next(delays)
+            time.sleep(delay)
+            return delay
+
+        start = time.monotonic()
+        self.assertEqual(policy.call(request), 0.0)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(policy.stats()['hedge_wins'], 1)
+
+    def test_async_loser_is_cancelled(self):
+        """Test that the losing asynchronous request is cancelled."""
+        policy = self.make_policy()
+        delays = iter([1.0, 0.0])
+        cancelled = []
+
+        async def request():
+            try:
+                delay = next(delays)
+                await asyncio.sleep(delay)
+                return delay
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        self.assertEqual(asyncio.run(policy.acall(request)), 0.0)
+        self.assertEqual(cancelled, [True])
+
+    def test_records_latency_of_dropped_primary(self):
+        """Test that a primary request beaten by its hedge still counts as slow."""
+        policy = self.make_policy()
+        delays = iter([1.0, 0.0])
+
+        async def request():
+            delay = next(delays)
+            await asyncio.sleep(delay)
+            return delay
+
+        with mock.patch.object(policy, 'record_latency', wraps=policy.record_latency) as record:
+            self.assertEqual(asyncio.run(policy.acall(request)), 0.0)
+
+        latencies = [call.args[0] for call in record.call_args_list]
+        self.assertEqual(len(latencies), 2)
+        self.assertGreaterEqual(max(latencies), 0.01)
+        self.assertGreater(max(latencies), min(latencies))
+
+    def test_budget_limits_hedges(self):
+        """Test that no hedge is sent when the budget is exhausted."""
+        policy = self.make_policy(budget_ratio=0.0)
+
+        def request():
+            time.sleep(0.05)
+            return 'primary'
+
+        self.assertEqual(policy.call(request), 'primary')
+        self.assertEqual(policy.stats()['hedges'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
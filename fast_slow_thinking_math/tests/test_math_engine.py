@@ -0,0 +1,230 @@
+"""
+Test module for the math engine utilities.
+"""
+
+import operator
+import time
+import unittest
+from fractions import Fraction
+
+import sympy
+
+from src.math_engine.arithmetic import (
+    UnsupportedExpressionError,
+    compile_arithmetic,
+    evaluate_arithmetic,
+    format_number,
+)
+from src.math_engine.answers import AnswerChecker
+from src.math_engine.numeric_verification import (
+    check_antiderivative,
+    check_derivative,
+    check_roots_numerically,
+    verify_roots,
+)
+from src.math_engine.parsing import ParseCache
+from src.math_engine.sympy_pool import (
+    SympyMemoryError,
+    SympyTimeoutError,
+    SympyWorkerPool,
+)
+
+
+class TestArithmetic(unittest.TestCase):
+    """Test cases for the safe arithmetic evaluator."""
+
+    def test_exact_arithmetic(self):
+        """Test that integer and decimal arithmetic is exact."""
+        self.assertEqual(evaluate_arithmetic('25 * 4'), 100)
+        self.assertEqual(evaluate_arithmetic('1 / 3 + 1 / 6'), Fraction(1, 2))
+        self.assertEqual(evaluate_arithmetic('0.1 + 0.2'), Fraction(3, 10))
+        self.assertEqual(evaluate_arithmetic('5^2 + 3'), 28)
+        self.assertEqual(evaluate_arithmetic('-(2 ** -2)'), Fraction(-1, 4))
+
+    def test_format_number(self):
+        """Test answer formatting of results."""
+        self.assertEqual(format_number(evaluate_arithmetic('18 / 6')), '3')
+        self.assertEqual(format_number(evaluate_arithmetic('7 / 2')), '3.5')
+        self.assertEqual(format_number(evaluate_arithmetic('4 ** 0.5')), '2')
+
+    def test_rejects_code(self):
+        """Test that anything beyond arithmetic is rejected."""
+        for expression in ['__import__("os").system("true")', 'x + 1', '(1).real', '[1, 2]', '2 (3)']:
+            with self.assertRaises(UnsupportedExpressionError):
+                evaluate_arithmetic(expression)
+
+    def test_rejects_huge_powers(self):
+        """Test that unbounded exact powers are refused."""
+        with self.assertRaises(UnsupportedExpressionError):
+            evaluate_arithmetic('9 ** 9 ** 9')
+
+    def test_rejects_non_finite_literals(self):
+        """Test that literals overflowing to infinity are refused, not raised as ValueError."""
+        for expression in ['1e400', '2 * 1e400 + 1', '-1e999']:
+            with self.subTest(expression=expression):
+                with self.assertRaises(UnsupportedExpressionError):
+                    evaluate_arithmetic(expression)
+
+    def test_compiled_closure_is_cached(self):
+        """Test that the same expression compiles once."""
+        self.assertIs(compile_arithmetic('12 * 12'), compile_arithmetic('12 * 12'))
+
+
+class TestParseCache(unittest.TestCase):
+    """Test cases for the memoized sympy parse layer."""
+
+    def test_repeated_parse_hits_cache(self):
+        """Test that parsing the same text twice returns the cached expression."""
+        cache = ParseCache(maxsize=8)
+        first = cache.parse('2x + 3')
+        second = cache.parse(' 2x + 3 ')
+
+        self.assertIs(first, second)
+        self.assertEqual(str(first), '2*x + 3')
+        self.assertEqual(cache.info()['hits'], 1)
+        self.assertEqual(cache.info()['misses'], 1)
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used expression is evicted."""
+        cache = ParseCache(maxsize=2)
+        cache.parse('x + 1')
+        cache.parse('x + 2')
+        cache.parse('x + 1')
+        cache.parse('x + 3')
+
+        self.assertEqual(cache.info()['size'], 2)
+        cache.parse('x + 1')
+        self.assertEqual(cache.info()['hits'], 2)
+        cache.parse('x + 2')
+        self.assertEqual(cache.info()['misses'], 4)
+
+
+class TestAnswerChecker(unittest.TestCase):
+    """Test cases for the answer-equivalence checker."""
+
+    def setUp(self):
+        self.checker = AnswerChecker()
+
+    def test_equivalent_answers(self):
+        """Test that equivalent answers in different notations match."""
+        pairs = [
+            ('1+2x', '2*x+1'),
+            ('0.5', '1/2'),
+            ('[3, 2]', 'x = 2, x = 3'),
+            ('{y: 1, x: 3}', 'x = 3, y = 1'),
+            ('16*pi', '16π cm²'),
+            ('x**4/2 - x**3 + 2*x**2 - x', '0.5x⁴ - x³ + 2x² - x + C'),
+            ('sin(x) + 3', 'f(x) = sin(x) + 3'),
+            ('x > 3', '(3, oo)'),
+            ('2x + 4y = 8', 'x + 2y = 4'),
+            ('Proof by contradiction.', 'proof by contradiction'),
+        ]
+        for actual, expected in pairs:
+            with self.subTest(actual=actual, expected=expected):
+                self.assertTrue(self.checker.equivalent(actual, expected))
+
+    def test_different_answers(self):
+        """Test that different answers do not match."""
+        pairs = [
+            ('x**2 + 1', '(x+1)^2'),
+            ('x = 1, y = 3', 'x = 3, y = 1'),
+            ('[2]', 'x = 2, x = 3'),
+            ('x >= 3', '(3, oo)'),
+            ('Word problem solution', '150 miles'),
+            (None, '1'),
+            # Close but different numbers are not rounding errors
+            ('1000001', '1000000'),
+            ('100000001', '100000000'),
+            ('1000001.0', '1000000'),
+            ('1e-7', '0'),
+            ('3.14159', 'pi'),
+        ]
+        for actual, expected in pairs:
+            with self.subTest(actual=actual, expected=expected):
+                self.assertFalse(self.checker.equivalent(actual, expected))
+
+    def test_canonical_forms_are_memoized(self):
+        """Test that each answer string is canonicalized once."""
+        self.checker.equivalent('2x + 1', '1 + 2x')
+        self.checker.equivalent('2x + 1', '1 + 2*x')
+
+        self.assertEqual(self.checker.canonicalize('2x + 1').kind, 'expression')
+        info = self.checker.cache_info()['canonical_forms']
+        self.assertEqual(info.misses, 3)
+
+
+class TestNumericVerification(unittest.TestCase):
+    """Test cases for vectorized root verification."""
+
+    def test_real_and_complex_roots(self):
+        """Test that real and complex roots are checked in one numeric pass."""
+        x = sympy.Symbol('x')
+        roots = [sympy.I, -sympy.I, sympy.Integer(1)]
+        self.assertEqual(check_roots_numerically(x**2 + 1, sympy.Integer(0), x, roots), [True, True, False])
+
+        roots = [sympy.sqrt(2), -sympy.sqrt(2), sympy.Float('1.41421356')]
+        self.assertEqual(check_roots_numerically(x**2, sympy.Integer(2), x, roots), [True, True, False])
+
+    def test_symbolic_fallback(self):
+        """Test that roots the numeric check cannot decide are substituted symbolically."""
+        x, a = sympy.symbols('x a')
+        self.assertEqual(check_roots_numerically(a * x, a, x, [sympy.Integer(1), a]), [None, None])
+        self.assertEqual(verify_roots(a * x, a, x, [sympy.Integer(1), a]), [True, False])
+
+    def test_derivative_identity(self):
+        """Test derivatives against finite differences at random points."""
+        x = sympy.Symbol('x')
+        check = check_derivative(2 * x * sympy.cos(x**2), sympy.sin(x**2), x)
+        self.assertTrue(check.verdict)
+        self.assertGreater(check.confidence, 0.99)
+        self.assertFalse(check_derivative(2 * x * sympy.cos(x), sympy.sin(x**2), x).verdict)
+
+    def test_antiderivative_identity(self):
+        """Test integrals by differentiation at random points, and borderline cases."""
+        x, a = sympy.symbols('x a')
+        self.assertTrue(check_antiderivative(x * sympy.log(x) - x + 5, sympy.log(x), x).verdict)
+        self.assertFalse(check_antiderivative(x**3, x**2, x).verdict)
+        # Expressions with other free symbols cannot be evaluated numerically
+        self.assertIsNone(check_antiderivative(a * x**2 / 2, a * x, x).verdict)
+
+
+class TestSympyWorkerPool(unittest.TestCase):
+    """Test cases for the sympy worker pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = SympyWorkerPool(size=1, timeout=5.0, memory_limit_mb=256)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_runs_sympy_in_worker(self):
+        """Test that results come back from the worker process."""
+        x = sympy.Symbol('x')
+        self.assertEqual(self.pool.run(sympy.integrate, 2 * x, x), x ** 2)
+
+    def test_timeout_replaces_worker(self):
+        """Test that an overrunning call is stopped and the pool keeps working."""
+        start_time = time.monotonic()
+        with self.assertRaises(SympyTimeoutError):
+            self.pool.run(time.sleep, 30, timeout=0.2)
+
+        self.assertLess(time.monotonic() - start_time, 5.0)
+        self.assertEqual(self.pool.run(operator.add, 1, 2), 3)
+        self.assertGreaterEqual(self.pool.stats()['restarts'], 1)
+
+    def test_memory_ceiling(self):
+        """Test that an allocation beyond the ceiling fails without killing the caller."""
+        with self.assertRaises(SympyMemoryError):
+            self.pool.run(bytearray, 2 * 1024 ** 3)
+        self.assertEqual(self.pool.run(operator.add, 2, 2), 4)
+
+    def test_exceptions_propagate(self):
+        """Test that errors raised by the call are re-raised in the caller."""
+        with self.assertRaises(ValueError):
+            self.pool.run(int, 'not a number')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Test module for the canonical problem cache.
+"""
+
+import unittest
+
+from src.math_engine.answers import AnswerChecker
+from src.problem_cache import ProblemCache, canonicalize_problem
+from src.thinking_strategies.slow_thinking import SlowThinking
+
+
+def make_solution(answer, confidence=0.9):
+    """Build a minimal accepted solution."""
+    return {'answer': answer, 'confidence': confidence, 'steps': ['step'], 'tokens_used': 50,
+            'strategy': 'SLOW', 'error': None}
+
+
+class TestCanonicalization(unittest.TestCase):
+    """Test cases for structural problem keys."""
+
+    def test_rewordings_share_a_key(self):
+        """Test that rewordings of the same equation have the same exact key."""
+        key = canonicalize_problem('Solve 2x+3=7')
+        self.assertEqual(key.task, 'solve')
+        self.assertEqual(key.exact, canonicalize_problem('Find x if 2x + 3 = 7').exact)
+        self.assertEqual(key.exact, canonicalize_problem('Solve for x: 4x + 6 = 14').exact)
+        self.assertNotEqual(key.exact, canonicalize_problem('Solve 2x+3=9').exact)
+
+    def test_templates_abstract_constants(self):
+        """Test that problems differing only in their numbers share a template."""
+        self.assertEqual(
+            canonicalize_problem('Solve 2x+3=7').template,
+            canonicalize_problem('Solve 5x-1=14').template,
+        )
+        self.assertEqual(
+            canonicalize_problem('Integrate 3x^2 + 4x').template,
+            canonicalize_problem('Find the integral of 6x² + 2x').template,
+        )
+        self.assertNotEqual(
+            canonicalize_problem('Solve 2x+3=7').template,
+            canonicalize_problem('Solve x^2 - 5x + 6 = 0').template,
+        )
+
+    def test_unrecognized_problems(self):
+        """Test that problems without a cacheable form have no key."""
+        self.assertIsNone(canonicalize_problem('Find the integral of x from 0 to 1'))
+        self.assertIsNone(canonicalize_problem('A train travels 60 miles per hour.'))
+
+    def test_qualified_problems_are_not_keyed(self):
+        """Test that wording the key cannot represent keeps a problem out of the cache."""
+        self.assertIsNotNone(canonicalize_problem('Find the derivative of x^3'))
+        for problem in (
+            'Find the second derivative of x^3',
+            "Find f''(x) for f(x) = x^3",
+            'Find the derivative of x^2 at x = 3',
+            'Solve x^2 = 4 for positive x',
+            'Solve x^2 = 4 where x > 0',
+            'Find the integral of x^2 between 0 and 1',
+            'Integrate x^2 on [0, 1]',
+            'Simplify x^2 + 2x and x + 1',
+        ):
+            with self.subTest(problem=problem):
+                self.assertIsNone(canonicalize_problem(problem))
+
+
+class TestProblemCache(unittest.TestCase):
+    """Test cases for the problem cache."""
+
+    def setUp(self):
+        self.cache = ProblemCache(SlowThinking(), AnswerChecker())
+
+    def test_exact_hit(self):
+        """Test that a rewording of a solved problem is answered from the cache."""
+        self.cache.store('Solve 2x+3=7', make_solution('[2]'))
+
+        solution = self.cache.lookup('Find x if 2x + 3 = 7')
+
+        self.assertEqual(solution['cache_hit'], 'exact')
+        self.assertEqual((solution['answer'], solution['tokens_used']), ('[2]', 0))
+
+    def test_qualified_problem_misses(self):
+        """Test that a qualified variant of a solved problem is not answered from the cache."""
+        self.cache.store('Find the derivative of x^3', make_solution('3*x**2'))
+
+        self.assertIsNone(self.cache.lookup('Find the second derivative of x^3'))
+        self.assertEqual(self.cache.lookup('Differentiate x^3')['cache_hit'], 'exact')
+
+    def test_template_hit_executes_cached_plan(self):
+        """Test that a problem with other numbers reuses the plan of a solved one."""
+        self.cache.store('Differentiate 3x^2 + 4x', make_solution('6*x + 4'))
+
+        solution = self.cache.lookup('Find the derivative of 2x^2 + 5x')
+
+        self.assertEqual(solution['cache_hit'], 'template')
+        self.assertTrue(AnswerChecker().equivalent(solution['answer'], '4*x + 5'))
+        self.assertEqual(self.cache.stats()['template_hits'], 1)
+
+    def test_unconfident_or_unreproduced_solutions(self):
+        """Test that only confident solutions are cached, and only reproducible plans indexed."""
+        self.cache.store('Solve 2x+3=7', make_solution('[2]', confidence=0.3))
+        self.assertIsNone(self.cache.lookup('Solve 2x+3=7'))
+
+        self.cache.store('Solve 2x+3=9', make_solution('[5]'))
+        self.assertEqual(self.cache.stats()['templates'], 0)
+        self.assertIsNone(self.cache.lookup('Solve 5x-1=19'))
+
+
+if __name__ == '__main__':
+    unittest.main()
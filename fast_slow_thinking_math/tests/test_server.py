@@ -0,0 +1,145 @@
+"""
+Test module for the HTTP/JSON server and the local LLM backend.
+"""
+
+import http.client
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.llm_integration import LLMIntegration
+from src.local_llm import LocalLLMBackend
+from src.server import WorkerServer
+
+
+class StubApp:
+    """Application stub that echoes problems, optionally blocking until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.options = None
+
+    def solve_problem(self, problem_text, **options):
+        self.options = options
+        self.release.wait(timeout=10)
+        if problem_text == 'fail':
+            raise ValueError("cannot solve")
+        return {'answer': problem_text.upper(), 'confidence': 0.9}
+
+
+class TestWorkerServer(unittest.TestCase):
+    """Test cases for the worker server."""
+
+    def setUp(self):
+        self.app = StubApp()
+        self.server = WorkerServer(self.app, ('127.0.0.1', 0), worker_threads=1, queue_size=1)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.app.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def request(self, method, path, body=None):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=10)
+        try:
+            connection.request(method, path, body=body)
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), json.loads(response.read())
+        finally:
+            connection.close()
+
+    def test_solve(self):
+        """Test that /solve returns the application's solution."""
+        status, _, payload = self.request('POST', '/solve', json.dumps({'problem': 'two plus two'}))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['solution'], {'answer': 'TWO PLUS TWO', 'confidence': 0.9})
+
+    def test_solve_with_deadline(self):
+        """Test that a time limit becomes a deadline counted from the request's arrival."""
+        before = time.monotonic()
+        body = json.dumps({'problem': 'x', 'time_limit': 2.5, 'accuracy_target': 0.9})
+        status, _, _ = self.request('POST', '/solve', body)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(self.app.options['accuracy_target'], 0.9)
+        self.assertTrue(before + 2.5 <= self.app.options['deadline'] <= time.monotonic() + 2.5)
+        self.assertEqual(self.request('POST', '/solve', json.dumps({'problem': 'x', 'time_limit': -1}))[0], 400)
+
+    def test_solve_batch(self):
+        """Test that /solve_batch keeps the order and reports failures per problem."""
+        body = json.dumps({'problems': ['a', 'fail', 'b']})
+        status, _, payload = self.request('POST', '/solve_batch', body)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['solutions'][0]['answer'], 'A')
+        self.assertIn('cannot solve', payload['solutions'][1]['error'])
+        self.assertEqual(payload['solutions'][2]['answer'], 'B')
+
+    def test_invalid_requests(self):
+        """Test the error responses for malformed requests."""
+        self.assertEqual(self.request('POST', '/solve', 'not json')[0], 400)
+        self.assertEqual(self.request('POST', '/solve', json.dumps({'problem': ''}))[0], 400)
+        self.assertEqual(self.request('POST', '/unknown', '{}')[0], 404)
+        self.server.max_batch_size = 1
+        status, _, _ = self.request('POST', '/solve_batch', json.dumps({'problems': ['a', 'b']}))
+        self.assertEqual(status, 413)
+
+    def test_rejects_when_full(self):
+        """Test that requests beyond the worker's capacity get 503 with Retry-After."""
+        self.app.release.clear()
+        results = []
+        blocked = [
+            threading.Thread(
+                target=lambda: results.append(self.request('POST', '/solve', json.dumps({'problem': 'slow'})))
+            )
+            for _ in range(2)
+        ]
+        for thread in blocked:
+            thread.start()
+        # One request is running and one is queued
+        deadline = time.monotonic() + 10
+        while self.server.health()['in_flight'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        status, headers, payload = self.request('POST', '/solve', json.dumps({'problem': 'fast'}))
+        self.assertEqual(status, 503)
+        self.assertIn('Retry-After', headers)
+        self.assertIn('error', payload)
+
+        self.app.release.set()
+        for thread in blocked:
+            thread.join(timeout=10)
+        self.assertEqual([result[0] for result in results], [200, 200])
+
+        self.assertEqual(self.request('GET', '/health')[2]['rejected'], 1)
+
+
+class TestLocalLLMBackend(unittest.TestCase):
+    """Test cases for the offline LLM stand-in."""
+
+    def test_abstains_in_both_modes(self):
+        """Test that the local backend defers to the local solvers without calling OpenAI."""
+        llm = LLMIntegration(backend=LocalLLMBackend(latency=0), hedging=False)
+        self.assertFalse(llm.cache)
+
+        with mock.patch('openai.ChatCompletion.create') as create:
+            fast = llm.solve_problem("What is 2 + 2?", thinking_mode="fast")
+            slow = llm.solve_problem("What is 2 + 2?", thinking_mode="slow")
+        create.assert_not_called()
+
+        for solution in (fast, slow):
+            self.assertIsNone(solution['answer'])
+            self.assertEqual(solution['confidence'], 0.0)
+            self.assertIsNone(solution['error'])
+        self.assertIn('verification', slow)
+
+
+if __name__ == '__main__':
+    unittest.main()
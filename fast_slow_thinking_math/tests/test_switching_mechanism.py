@@ -0,0 +1,253 @@
+"""
+Test module for the Switching Mechanism.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import config
+from src.resource_allocator.allocator import ResourceAllocator
+from src.switching_mechanism.routing_policy import AdaptiveThresholds
+from src.switching_mechanism.strategy_selector import ExpectedCostSelector
+from src.switching_mechanism.switcher import ThinkingSwitcher
+from src.thinking_strategies.combined import FastThenSlow
+
+
+def make_result(strategy, answer, confidence, max_steps=3):
+    """Build a minimal strategy result."""
+    return {
+        'answer': answer,
+        'confidence': confidence,
+        'steps': ['step'],
+        'tokens_used': 10,
+        'strategy': strategy,
+        'error': None,
+        'resources': {
+            'steps_used': 1,
+            'max_steps': max_steps,
+            'tokens_used': 10,
+            'token_budget': 100,
+            'verification_effort': 0.2,
+        },
+    }
+
+
+class TestThinkingSwitcher(unittest.TestCase):
+    """Test cases for the Thinking Switcher."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.fast = mock.Mock(max_steps=3, token_budget=100, verification_effort=0.2)
+        self.slow = mock.Mock(max_steps=10, token_budget=500, verification_effort=0.8)
+        self.fast.solve.return_value = make_result('FAST', '5', 0.4)
+        self.slow.solve.return_value = make_result('SLOW', '4', 0.95, max_steps=10)
+
+        self.analyzer = mock.Mock()
+        self.analyzer.analyze.return_value = {
+            'complexity_score': 0.1,
+            'complexity_level': 'Simple',
+        }
+
+        self.switcher = ThinkingSwitcher(
+            analyzer=self.analyzer,
+            fast_strategy=self.fast,
+            slow_strategy=self.slow,
+            combined_strategy=FastThenSlow(self.fast, self.slow),
+        )
+
+    def test_escalation_reuses_fast_result(self):
+        """Test that escalating FAST to FAST_THEN_SLOW does not re-run Fast Thinking."""
+        solution = self.switcher.solve('Solve 2x + 3 = 11')
+
+        self.assertEqual(self.fast.solve.call_count, 1)
+        self.assertEqual(self.slow.solve.call_count, 1)
+        self.assertEqual(solution['strategy'], 'FAST_THEN_SLOW')
+        self.assertEqual(solution['answer'], '4')
+        self.assertEqual(solution['strategy_switch']['from_strategy'], 'FAST')
+
+    def test_confident_fast_result_is_kept(self):
+        """Test that a confident Fast Thinking result is not escalated."""
+        self.fast.solve.return_value = make_result('FAST', '4', 0.95)
+
+        solution = self.switcher.solve('What is 2 + 2?')
+
+        self.assertEqual(solution['strategy'], 'FAST')
+        self.slow.solve.assert_not_called()
+
+    def test_allocation_is_passed_to_strategies(self):
+        """Test that each strategy runs with the allocation for it."""
+        allocator = ResourceAllocator()
+        self.switcher.resource_allocator = allocator
+        analysis = self.analyzer.analyze.return_value
+
+        self.switcher.solve('Solve 2x + 3 = 11')
+
+        fast_budget = self.fast.solve.call_args.kwargs['budget']
+        self.assertEqual(fast_budget, allocator.allocate_for_strategy(analysis, 'FAST'))
+        # The escalation to Fast-then-Slow leaves the Slow phase what Fast did not use
+        combined_budget = allocator.allocate_for_strategy(analysis, 'FAST_THEN_SLOW')
+        slow_budget = self.slow.solve.call_args.kwargs['budget']
+        self.assertLess(slow_budget['token_budget'], combined_budget['token_budget'])
+        self.assertEqual(slow_budget['max_steps'], combined_budget['max_steps'])
+
+    def test_no_escalation_near_deadline(self):
+        """Test that the deadline reaches the strategy and blocks escalation when near."""
+        deadline = time.monotonic() + 1.0
+
+        solution = self.switcher.solve('Solve 2x + 3 = 11', deadline=deadline)
+
+        self.assertEqual(self.fast.solve.call_args.kwargs['deadline'], deadline)
+        self.slow.solve.assert_not_called()
+        self.assertEqual(solution['strategy'], 'FAST')
+        self.assertIn('the deadline is too close', solution['steps'][-1])
+
+
+
+class TestAdaptiveThresholds(unittest.TestCase):
+    """Test cases for routing thresholds learned from monitoring feedback."""
+
+    def setUp(self):
+        """Set up thresholds persisted to a temporary file."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state_file = os.path.join(directory.name, 'routing.json')
+        self.policy = AdaptiveThresholds(state_file=self.state_file, learning_rate=0.5, margin=0.02, save_interval=1)
+
+    def test_overkill_routes_cheaper(self):
+        """Test that repeated 'SLOW was overkill' feedback moves a score to a cheaper level."""
+        overkill = {'adjust': True, 'recommendation': 'FAST'}
+        self.assertEqual(self.policy.classify(0.65, 'algebra'), 'Complex')
+
+        for _ in range(5):
+            self.policy.record('algebra', 0.65, 'SLOW', False, overkill)
+
+        self.assertEqual(self.policy.classify(0.65, 'algebra'), 'Medium')
+        # Other domains keep the configured thresholds
+        self.assertEqual(self.policy.classify(0.65, 'calculus'), 'Complex')
+
+    def test_escalation_routes_costlier(self):
+        """Test that FAST escalating lowers the domain's Simple threshold below the score."""
+        keep = {'adjust': False, 'recommendation': 'FAST_THEN_SLOW'}
+        for _ in range(5):
+            self.policy.record('geometry', 0.25, 'FAST', True, keep)
+
+        self.assertEqual(self.policy.classify(0.25, 'geometry'), 'Medium')
+        simple_threshold, medium_threshold = self.policy.thresholds('geometry')
+        self.assertLess(simple_threshold, 0.25)
+        self.assertEqual(medium_threshold, self.policy.defaults[1])
+
+    def test_thresholds_persist(self):
+        """Test that learned thresholds are loaded again after a restart."""
+        self.policy.record('algebra', 0.65, 'SLOW', False, {'adjust': True, 'recommendation': 'FAST'})
+
+        restarted = AdaptiveThresholds(state_file=self.state_file)
+
+        self.assertEqual(restarted.thresholds('algebra'), self.policy.thresholds('algebra'))
+
+    def test_default_state_file_is_relative_to_the_package(self):
+        """Test that a relative configured state file does not depend on the working directory."""
+        package_directory = os.path.dirname(os.path.abspath(config.__file__))
+
+        self.assertEqual(
+            AdaptiveThresholds().state_file,
+            os.path.join(package_directory, config.ADAPTIVE_ROUTING['STATE_FILE']),
+        )
+
+    def test_switcher_routes_with_policy(self):
+        """Test that the switcher selects strategies with the domain's learned thresholds."""
+        self.policy.record('algebra', 0.65, 'SLOW', False, {'adjust': True, 'recommendation': 'FAST'})
+        self.policy.record('algebra', 0.65, 'SLOW', False, {'adjust': True, 'recommendation': 'FAST'})
+        switcher = ThinkingSwitcher(
+            analyzer=mock.Mock(), fast_strategy=mock.Mock(), slow_strategy=mock.Mock(),
+            combined_strategy=mock.Mock(), routing_policy=self.policy,
+        )
+        analysis = {'complexity_score': 0.65, 'complexity_level': 'Complex', 'domain': 'algebra'}
+
+        self.assertEqual(switcher._select_initial_strategy(analysis), 'FAST_THEN_SLOW')
+        self.assertEqual(switcher._select_initial_strategy(dict(analysis, domain='calculus')), 'SLOW')
+
+
+
+class TestExpectedCostSelector(unittest.TestCase):
+    """Test cases for expected-cost strategy selection."""
+
+    def setUp(self):
+        """Set up a selector with the configured priors."""
+        self.selector = ExpectedCostSelector(window=50, prior_weight=5, accuracy_target=0.8, exploration_rate=0)
+
+    def test_priors_match_strategy_mapping(self):
+        """Test that without history the selector picks the mapped strategies."""
+        self.assertEqual(self.selector.select('Simple'), 'FAST')
+        self.assertEqual(self.selector.select('Medium'), 'FAST_THEN_SLOW')
+        self.assertEqual(self.selector.select('Complex'), 'SLOW')
+
+    def test_tight_deadline_selects_cheaper_strategy(self):
+        """Test that a deadline the costlier strategies would miss selects a faster one."""
+        self.assertEqual(self.selector.select('Complex', deadline=time.monotonic() + 1.5), 'FAST')
+        self.assertEqual(self.selector.select('Complex', deadline=time.monotonic() + 3.0), 'FAST_THEN_SLOW')
+        self.assertEqual(self.selector.select('Complex', accuracy_target=0.25), 'FAST')
+
+    def test_learns_from_observed_solves(self):
+        """Test that Fast Thinking succeeding on Medium problems makes it the choice."""
+        for _ in range(20):
+            self.selector.observe('Medium', 'FAST', 0.5, 80, True)
+
+        estimates = self.selector.estimates('Medium')
+
+        self.assertEqual(estimates['FAST']['samples'], 20)
+        self.assertGreater(estimates['FAST']['success'], 0.9)
+        self.assertEqual(self.selector.select('Medium'), 'FAST')
+
+    def test_explores_unselected_strategies(self):
+        """Test that exploring selections re-sample strategies the target rules out."""
+        selector = ExpectedCostSelector(
+            window=50, prior_weight=5, accuracy_target=0.8, exploration_rate=1.0, seed=0
+        )
+        self.assertEqual(selector.select('Medium'), 'FAST')
+        selector.observe('Medium', 'FAST', 0.5, 80, True)
+        self.assertEqual(selector.select('Medium'), 'FAST_THEN_SLOW')
+        selector.observe('Medium', 'FAST_THEN_SLOW', 2.0, 300, True)
+        self.assertEqual(selector.select('Medium'), 'SLOW')
+        # The deadline still binds
+        self.assertEqual(selector.select('Medium', deadline=time.monotonic() + 1.5), 'FAST')
+
+    def test_switcher_records_verified_outcomes(self):
+        """Test that a verified wrong answer counts as a failure, however confident."""
+        fast = mock.Mock(max_steps=3, token_budget=100, verification_effort=0.2)
+        fast.solve.return_value = make_result('FAST', '5', 0.95)
+        analyzer = mock.Mock()
+        analyzer.analyze.return_value = {'complexity_score': 0.1, 'complexity_level': 'Simple'}
+        switcher = ThinkingSwitcher(
+            analyzer=analyzer, fast_strategy=fast, slow_strategy=mock.Mock(),
+            combined_strategy=mock.Mock(), strategy_selector=self.selector,
+        )
+        before = self.selector.estimates('Simple')['FAST']['success']
+
+        switcher.solve('What is 2 + 2?', check_answer=lambda answer: answer == '4')
+
+        estimates = self.selector.estimates('Simple')['FAST']
+        self.assertEqual(estimates['samples'], 1)
+        self.assertLess(estimates['success'], before)
+
+    def test_switcher_records_outcomes(self):
+        """Test that the switcher selects with the selector and reports each solve to it."""
+        fast = mock.Mock(max_steps=3, token_budget=100, verification_effort=0.2)
+        fast.solve.return_value = make_result('FAST', '4', 0.95)
+        analyzer = mock.Mock()
+        analyzer.analyze.return_value = {'complexity_score': 0.5, 'complexity_level': 'Medium'}
+        switcher = ThinkingSwitcher(
+            analyzer=analyzer, fast_strategy=fast, slow_strategy=mock.Mock(),
+            combined_strategy=mock.Mock(), strategy_selector=self.selector,
+        )
+
+        solution = switcher.solve('What is 2 + 2?', deadline=time.monotonic() + 1.5)
+
+        self.assertEqual(solution['initial_strategy'], 'FAST')
+        self.assertEqual(self.selector.estimates('Medium')['FAST']['samples'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
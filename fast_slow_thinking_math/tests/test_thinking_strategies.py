@@ -0,0 +1,146 @@
+"""
+Test module for the Thinking Strategies.
+"""
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from src.thinking_strategies.combined import FastThenSlow
+from src.thinking_strategies.slow_thinking import SlowThinking
+
+
+class StubStrategy:
+    """Strategy stand-in that answers after a delay."""
+
+    def __init__(self, strategy, answer, confidence, delay, max_steps=3):
+        self.strategy = strategy
+        self.answer = answer
+        self.confidence = confidence
+        self.delay = delay
+        self.max_steps = max_steps
+        self.token_budget = 100
+        self.verification_effort = 0.5
+        self.started = 0
+        self.finished = 0
+
+    async def asolve(self, problem_text, budget=None, deadline=None):
+        self.started += 1
+        await asyncio.sleep(self.delay)
+        self.finished += 1
+        return {
+            'answer': self.answer,
+            'confidence': self.confidence,
+            'steps': ['step'],
+            'tokens_used': 50,
+            'strategy': self.strategy,
+            'error': None,
+            'resources': {'token_budget': self.token_budget},
+        }
+
+    def response_token_limit(self, budget=None):
+        return 2 * self.token_budget
+
+    async def aclose(self):
+        pass
+
+
+class TestSpeculativeFastThenSlow(unittest.TestCase):
+    """Test cases for the speculative Fast-then-Slow mode."""
+
+    def test_slow_cancelled_when_fast_suffices(self):
+        """Test that the Slow phase is cancelled once Fast Thinking is accepted."""
+        fast = StubStrategy('FAST', '4', 0.95, delay=0.01)
+        slow = StubStrategy('SLOW', '4', 0.95, delay=1.0)
+        strategy = FastThenSlow(fast, slow, speculative=True)
+
+        solution = strategy.solve('What is 2 + 2?')
+
+        self.assertEqual(solution['switch_decision']['decision'], 'continue')
+        self.assertEqual(slow.started, 1)
+        self.assertEqual(slow.finished, 0)
+        self.assertTrue(solution['speculation']['slow_cancelled'])
+        self.assertGreater(solution['speculation']['wasted_time'], 0.0)
+        self.assertLess(solution['speculation']['wasted_time'], 1.0)
+        # The cancelled request may have been billed: the cost is unknown, but bounded
+        self.assertIsNone(solution['speculation']['wasted_tokens'])
+        self.assertEqual(solution['speculation']['max_wasted_tokens'], 200)
+
+    def test_slow_result_used_after_switch(self):
+        """Test that a switch uses the Slow phase that was already running."""
+        fast = StubStrategy('FAST', '5', 0.2, delay=0.05)
+        slow = StubStrategy('SLOW', '4', 0.95, delay=0.05, max_steps=10)
+        strategy = FastThenSlow(fast, slow, speculative=True)
+
+        solution = asyncio.run(strategy.asolve('Solve 2x = 8'))
+
+        self.assertEqual(solution['switch_decision']['decision'], 'switch')
+        self.assertEqual(solution['answer'], '4')
+        self.assertFalse(solution['speculation']['slow_cancelled'])
+        self.assertGreater(solution['speculation']['time_saved'], 0.0)
+
+
+class TestStrategyBudgets(unittest.TestCase):
+    """Test cases for resource allocations passed to the strategies."""
+
+    def setUp(self):
+        patcher = mock.patch.dict('config.LLM_CLIENT', {'BACKEND': 'local'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.slow = SlowThinking()
+
+    def test_slow_stops_when_budget_runs_out(self):
+        """Test that a small token budget limits the LLM call and stops step-by-step solving."""
+        budget = {'token_budget': 5, 'max_steps': 10, 'verification_effort': 0.8}
+        with mock.patch.object(self.slow.llm.backend, 'create', wraps=self.slow.llm.backend.create) as create:
+            solution = self.slow.solve('Find the derivative of x^2 + 3x', budget=budget)
+
+        self.assertEqual(create.call_args.kwargs['max_tokens'], 256)
+        self.assertIsNone(solution['answer'])
+        self.assertEqual(solution['steps'][-1], 'Budget exhausted: stopping early')
+        self.assertEqual(solution['resources']['token_budget'], 5)
+
+    def test_slow_uses_configured_budget_by_default(self):
+        """Test that without an allocation the configured budget applies."""
+        solution = self.slow.solve('Find the derivative of x^2 + 3x')
+
+        self.assertIsNotNone(solution['answer'])
+        self.assertNotIn('Budget exhausted: stopping early', solution['steps'])
+        self.assertEqual(solution['resources']['token_budget'], self.slow.token_budget)
+
+
+class TestStrategyDeadlines(unittest.TestCase):
+    """Test cases for deadlines passed to the strategies."""
+
+    def setUp(self):
+        patcher = mock.patch.dict('config.LLM_CLIENT', {'BACKEND': 'local'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.slow = SlowThinking()
+
+    def test_slow_skips_llm_and_verification_near_deadline(self):
+        """Test that a near deadline skips the LLM call and verification, not the solve."""
+        deadline = time.monotonic() + 0.2
+        with mock.patch.object(self.slow.llm.backend, 'create') as create:
+            solution = self.slow.solve('Find the derivative of x^2 + 3x', deadline=deadline)
+
+        create.assert_not_called()
+        self.assertIsNotNone(solution['answer'])
+        self.assertEqual(solution['steps'][-1], 'Deadline near: skipping verification')
+
+    def test_no_switch_to_slow_near_deadline(self):
+        """Test that Fast-then-Slow keeps the Fast result when Slow would miss the deadline."""
+        fast = StubStrategy('FAST', '5', 0.2, delay=0.0)
+        slow = StubStrategy('SLOW', '4', 0.95, delay=0.0, max_steps=10)
+        strategy = FastThenSlow(fast, slow, speculative=False)
+
+        solution = asyncio.run(strategy.asolve('Solve 2x = 8', deadline=time.monotonic() + 1.0))
+
+        self.assertEqual(solution['switch_decision']['decision'], 'continue')
+        self.assertIn('Deadline near', solution['switch_decision']['reason'])
+        self.assertEqual(slow.started, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()